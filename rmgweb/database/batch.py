@@ -0,0 +1,673 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG Website - A Django-powered website for Reaction Mechanism Generator     #
+#                                                                             #
+# Copyright (c) 2011-2018 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+
+"""
+This module does the work of the batch views of the database app, which
+take many species or reactions at once and stream back one record per
+result. The work for each input line is done by a function that runs in a
+pool of worker processes forked from the web process (see
+:func:`rmgweb.database.parallel.get_forked_pool`), and returns a list of
+records (dicts). The records are written out as JSON lines, CSV or Chemkin
+in the order they become ready; each record carries the number of its input
+line.
+"""
+
+import csv
+import functools
+import itertools
+import json
+import numpy
+import StringIO
+
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.views.decorators.csrf import csrf_exempt
+
+from rmgpy.data.kinetics import TemplateReaction, DepositoryReaction, LibraryReaction
+from rmgpy.kinetics import Arrhenius, ArrheniusEP, KineticsData
+from rmgpy.data.solvation import SoluteData
+from rmgpy.species import Species
+
+import rmgweb.settings
+from rmgweb.database.parallel import get_forked_pool, is_forked_worker
+from rmgweb.database.tools import database, generateReactions, generateSpeciesListThermo, generateSpeciesThermo, \
+    getAllSpeciesThermo, getSpeciesIdentifier, reactionHasReactants
+from rmgweb.main.tools import moleculeFromIdentifier
+
+
+def runBatch(function, tasks, families=False):
+    """
+    Return an iterator over the results of calling `function` on each of
+    the `tasks`, in the order they finish. With ``BATCH_PROCESSES`` greater
+    than 1 the tasks run in a forked pool of worker processes; if `families`
+    is ``True``, all kinetics families are loaded before forking it.
+    """
+    processes = rmgweb.settings.BATCH_PROCESSES
+    if processes > 1 and not is_forked_worker():
+        pool = get_forked_pool('batch', database, processes, families=families)
+        return pool.imap_unordered(function, tasks)
+    return itertools.imap(function, tasks)
+
+
+def getClientAddress(request):
+    """
+    Return the address of the client making the `request`. Behind
+    ``TRUSTED_PROXY_COUNT`` reverse proxies, each appending the address it
+    received the request from to the ``X-Forwarded-For`` header, this is the
+    address the outermost proxy saw; entries before it may be forged by the
+    client.
+    """
+    proxies = rmgweb.settings.TRUSTED_PROXY_COUNT
+    if proxies:
+        addresses = [address.strip() for address in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')]
+        addresses = [address for address in addresses if address]
+        if len(addresses) >= proxies:
+            return addresses[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def isBatchRateLimited(request):
+    """
+    Return ``True`` if the client making the batch `request` has already
+    made its share of batch requests in the last ``BATCH_RATE_PERIOD``
+    seconds: ``BATCH_RATE_LIMIT`` requests per client address, or
+    ``BATCH_USER_RATE_LIMIT`` requests per logged-in user.
+    """
+    if request.user.is_authenticated():
+        limit = rmgweb.settings.BATCH_USER_RATE_LIMIT
+        key = 'batch-requests-user-{0}'.format(request.user.pk)
+    else:
+        limit = rmgweb.settings.BATCH_RATE_LIMIT
+        key = 'batch-requests-{0}'.format(getClientAddress(request))
+    if limit is None:
+        return False
+    cache = caches['batch']
+    cache.add(key, 0, rmgweb.settings.BATCH_RATE_PERIOD)
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # The count expired in between
+        cache.set(key, 1, rmgweb.settings.BATCH_RATE_PERIOD)
+        count = 1
+    return count > limit
+
+
+def batchView(view):
+    """
+    Decorate a batch `view` so that scripts can POST to it without a CSRF
+    token, while POSTs from logged-in users, whose session cookie a browser
+    would send along with a forged cross-site POST, must still pass the CSRF
+    check. POSTs from clients over the rate limit of
+    :func:`isBatchRateLimited` are refused before any work is started.
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method == 'POST':
+            if request.user.is_authenticated():
+                response = CsrfViewMiddleware().process_view(request, view, args, kwargs)
+                if response is not None:
+                    return response
+            if isBatchRateLimited(request):
+                response = HttpResponse('Too many batch requests; please try again later.\n',
+                                        content_type='text/plain', status=429)
+                response['Retry-After'] = str(rmgweb.settings.BATCH_RATE_PERIOD)
+                return response
+        return view(request, *args, **kwargs)
+    return csrf_exempt(wrapper)
+
+
+def getErrorRecord(number, line, error):
+    """
+    Return the record reported for input line `number` with text `line`
+    when it could not be processed.
+    """
+    return {'line': number, 'input': line, 'error': str(error)}
+
+
+def streamJSONLines(results):
+    """
+    Yield each record of the given iterator of record lists as a line of JSON.
+    """
+    for records in results:
+        for record in records:
+            yield json.dumps(record) + '\n'
+
+
+def streamCSV(results, fields):
+    """
+    Yield a CSV header line with the given `fields`, then each record of the
+    given iterator of record lists as a CSV line. List-valued fields of a
+    record are spread over columns named ``field[0]``, ``field[1]``, etc.,
+    and dict-valued fields over columns named ``field[key]``; these columns
+    must be included in `fields`.
+    """
+    yield getCSVLine(fields)
+    for records in results:
+        for record in records:
+            row = {}
+            for key, value in record.iteritems():
+                if isinstance(value, list):
+                    for index, item in enumerate(value):
+                        row['{0}[{1:d}]'.format(key, index)] = item
+                elif isinstance(value, dict):
+                    for name, item in value.iteritems():
+                        row['{0}[{1}]'.format(key, name)] = item
+                else:
+                    row[key] = value
+            yield getCSVLine([row.get(field, '') for field in fields])
+
+
+def streamChemkin(results, header, footer=''):
+    """
+    Yield the given `header`, then the ``chemkin`` entry of each record of
+    the given iterator of record lists, then the `footer`. Records without an
+    entry are written as comments giving their error.
+    """
+    yield header
+    for records in results:
+        for record in records:
+            if 'chemkin' in record:
+                yield record['chemkin']
+            else:
+                yield '! Line {0:d}: {1}: {2}\n'.format(record['line'], record['input'], record.get('error', ''))
+    yield footer
+
+
+def getCSVLine(values):
+    """
+    Return the given list of `values` formatted as a line of CSV.
+    """
+    output = StringIO.StringIO()
+    csv.writer(output).writerow([value.encode('utf-8') if isinstance(value, unicode) else value for value in values])
+    return output.getvalue()
+
+################################################################################
+
+def parseReactionLine(line):
+    """
+    Return the lists of reactant and product identifiers in the given
+    reaction `line`, written as ``A + B >> C + D``. The products are
+    ``None`` if there is no ``>>``.
+    """
+    if '>>' in line:
+        left, right = line.split('>>', 1)
+    else:
+        left, right = line, None
+    reactants = [identifier.strip() for identifier in left.split(' + ') if identifier.strip()]
+    products = [identifier.strip() for identifier in right.split(' + ') if identifier.strip()] if right is not None else None
+    if not reactants:
+        raise ValueError('No reactants were given.')
+    return reactants, products or None
+
+
+def getKineticsBatchFields(temperatures, pressures):
+    """
+    Return the CSV columns of the kinetics batch records for the given grid
+    of `temperatures` (K) and `pressures` (bar).
+    """
+    fields = ['line', 'input', 'reaction', 'source', 'family', 'A', 'A_units', 'n', 'Ea_kJ_per_mol', 'T0_K']
+    fields.extend(['k[{0:d}]'.format(index) for index in range(len(temperatures) * len(pressures))])
+    fields.append('error')
+    return fields
+
+
+def kineticsBatchTask(task):
+    """
+    Generate the reactions and kinetics for one line of the kinetics batch
+    view. The `task` is a tuple of the line number, the line, the
+    temperatures (K) and pressures (bar) at which to evaluate the rate
+    coefficients, and the resonance flag. Returns a list of records, one for
+    each reaction and source of kinetics.
+    """
+    number, line, temperatures, pressures, resonance = task
+    try:
+        reactantIdentifiers, productIdentifiers = parseReactionLine(line)
+        reactants = [moleculeFromIdentifier(identifier) for identifier in reactantIdentifiers]
+        if productIdentifiers is not None:
+            products = [moleculeFromIdentifier(identifier) for identifier in productIdentifiers]
+        else:
+            products = None
+        reactionList = generateReactions(database, reactants, products, resonance=resonance)
+        generateSpeciesListThermo([species for reaction in reactionList for species in reaction.reactants + reaction.products], database)
+        records = [getKineticsRecord(number, line, reaction, reactants, temperatures, pressures)
+                   for reaction in reactionList]
+    except Exception, e:
+        return [getErrorRecord(number, line, e)]
+    if not records:
+        return [getErrorRecord(number, line, 'No reactions were found.')]
+    return records
+
+
+def getKineticsRecord(number, line, reaction, reactants, temperatures, pressures):
+    """
+    Return the kinetics batch record of a `reaction` generated for input
+    line `number`, written in the direction of the given `reactants`.
+    """
+    # If the kinetics are ArrheniusEP, replace them with Arrhenius
+    if isinstance(reaction.kinetics, ArrheniusEP):
+        reaction.kinetics = reaction.kinetics.toArrhenius(reaction.getEnthalpyOfReaction(298))
+
+    kinetics = reaction.kinetics
+    if reactionHasReactants(reaction, reactants):
+        left, right = reaction.reactants, reaction.products
+    else:
+        left, right = reaction.products, reaction.reactants
+        if isinstance(kinetics, Arrhenius) or isinstance(kinetics, KineticsData):
+            reverseKinetics = reaction.generateReverseRateCoefficient()
+            reverseKinetics.Tmin = kinetics.Tmin
+            reverseKinetics.Tmax = kinetics.Tmax
+            reverseKinetics.Pmin = kinetics.Pmin
+            reverseKinetics.Pmax = kinetics.Pmax
+            kinetics = reverseKinetics
+        else:
+            kinetics = None
+
+    if isinstance(reaction, TemplateReaction):
+        source = '{0} (RMG-Py {1})'.format(reaction.family, reaction.estimator)
+    elif isinstance(reaction, DepositoryReaction):
+        source = reaction.depository.name
+    elif isinstance(reaction, LibraryReaction):
+        source = reaction.library.name
+    else:
+        source = ''
+
+    arrow = ' <=> ' if reaction.reversible else ' => '
+    record = {
+        'line': number,
+        'input': line,
+        'reaction': ' + '.join([getSpeciesSMILES(species) for species in left]) + arrow +
+                    ' + '.join([getSpeciesSMILES(species) for species in right]),
+        'source': source,
+        'family': getattr(reaction, 'family', None) or '',
+    }
+    if isinstance(kinetics, Arrhenius):
+        record['A'] = kinetics.A.value
+        record['A_units'] = kinetics.A.units
+        record['n'] = kinetics.n.value_si
+        record['Ea_kJ_per_mol'] = kinetics.Ea.value_si / 1000.
+        record['T0_K'] = kinetics.T0.value_si
+    if kinetics is not None:
+        record['k'] = [kinetics.getRateCoefficient(T, P * 1e5) for T in temperatures for P in pressures]
+    else:
+        record['error'] = 'No kinetics are available in this direction.'
+    return record
+
+
+def getSpeciesSMILES(species):
+    """
+    Return the SMILES string of the given :class:`Species` or
+    :class:`Molecule`.
+    """
+    molecule = species.molecule[0] if hasattr(species, 'molecule') else species
+    return molecule.toSMILES()
+
+################################################################################
+
+# The start of the Chemkin thermo output, giving the default temperature ranges
+CHEMKIN_THERMO_HEADER = 'THERM ALL\n   300.000  1000.000  5000.000\n\n'
+
+def getSpeciesBatchTasks(lines, *options):
+    """
+    Parse the species identifiers on the given `lines` (pairs of line
+    number and text) and group the lines by species identity, so that each
+    unique species is only handled once. Returns a list of error records for
+    the lines that could not be parsed, and a list of tasks, one per unique
+    species. Each task is a tuple of the molecule, the list of lines that
+    gave it, and the given `options`.
+    """
+    errors = []
+    groups = {}
+    for number, line in lines:
+        try:
+            molecule = moleculeFromIdentifier(line)
+            identifier = getSpeciesIdentifier(molecule)
+        except Exception, e:
+            errors.append(getErrorRecord(number, line, e))
+            continue
+        if identifier not in groups:
+            groups[identifier] = (molecule, [])
+        groups[identifier][1].append((number, line))
+    tasks = [(molecule, group) + options for molecule, group in groups.itervalues()]
+    return errors, tasks
+
+
+def thermoBatchTask(task):
+    """
+    Get the thermo of one unique species for the thermo batch view. The
+    `task` is made by :func:`getSpeciesBatchTasks` with the best-source-only
+    flag and a flag for including Chemkin entries as options. Returns a list of records, one for
+    each input line and source of thermo.
+    """
+    molecule, group, best, chemkin = task
+    try:
+        thermoList, symmetryNumber = getAllSpeciesThermo(database, molecule)
+    except Exception, e:
+        return [getErrorRecord(number, line, e) for number, line in group]
+    if best:
+        thermoList = getBestThermo(thermoList)
+    if not thermoList:
+        return [getErrorRecord(number, line, 'No thermo data were found.') for number, line in group]
+    records = []
+    for number, line in group:
+        for rank, (data, nasa, nasa_string, section, label, entry) in enumerate(thermoList):
+            record = getThermoRecord(number, line, molecule, data, nasa, section, label)
+            if chemkin:
+                species = Species(index=number, label=record['species'], molecule=[molecule], thermo=nasa)
+                record['chemkin'] = getChemkinThermoEntry(species, record['source'], commented=rank > 0)
+            records.append(record)
+    return records
+
+
+def getBestThermo(thermoList):
+    """
+    Return a list of the one item of the given `thermoList` (as returned by
+    :func:`getAllSpeciesThermo`) that RMG would use: the first library
+    result if there is one, and group additivity otherwise.
+    """
+    for item in thermoList:
+        if item[3] != 'depository':
+            return [item]
+    return thermoList[:1]
+
+
+def getThermoRecord(number, line, molecule, data, nasa, section, label):
+    """
+    Return the thermo batch record of the given thermo `data` and fitted
+    NASA polynomials `nasa` of `molecule` for input line `number`.
+    """
+    if section is None:
+        source = 'Group additivity'
+    elif section == 'depository':
+        source = 'Depository ({0})'.format(label)
+    else:
+        source = database.get_thermo_database(section, label).name
+    low, high = nasa.polynomials
+    return {
+        'line': number,
+        'input': line,
+        'species': molecule.toSMILES(),
+        'source': source,
+        'H298_kJ_per_mol': data.getEnthalpy(298) / 1000.,
+        'S298_J_per_mol_K': data.getEntropy(298),
+        'Tmin_K': low.Tmin.value_si,
+        'Tint_K': low.Tmax.value_si,
+        'Tmax_K': high.Tmax.value_si,
+        'nasa_low': list(low.coeffs),
+        'nasa_high': list(high.coeffs),
+    }
+
+
+def getChemkinThermoEntry(species, source, commented=False):
+    """
+    Return the Chemkin thermo entry of the given `species`, preceded by a
+    comment giving its `source`. If `commented` is ``True`` the entry itself
+    is commented out too, so alternative sources can be written alongside the
+    one used without repeating a species name.
+    """
+    from rmgpy.chemkin import writeThermoEntry
+    entry = writeThermoEntry(species)
+    if commented:
+        entry = ''.join(['! ' + line for line in entry.splitlines(True)])
+    return '! {0}\n{1}\n'.format(source, entry)
+
+################################################################################
+
+# The column headings of the Chemkin transport output
+CHEMKIN_TRANSPORT_HEADER = (
+    '! {0:15} {1:8} {2:9} {3:9} {4:9} {5:9} {6:9} {7:9}\n'.format('Species', 'Shape', 'LJ-depth', 'LJ-diam', 'DiplMom', 'Polzblty', 'RotRelaxNum', 'Data') +
+    '! {0:15} {1:8} {2:9} {3:9} {4:9} {5:9} {6:9} {7:9}\n'.format('Name', 'Index', 'epsilon/k_B', 'sigma', 'mu', 'alpha', 'Zrot', 'Source')
+)
+
+def transportBatchTask(task):
+    """
+    Get the transport properties, and optionally the statmech estimate, of
+    one unique species for the transport batch view. The `task` is made by
+    :func:`getSpeciesBatchTasks` with a flag for including statmech and a
+    flag for including Chemkin entries as options. Returns a list of
+    records, one for each input line and source of transport data.
+    """
+    molecule, group, statmech, chemkin = task
+    try:
+        species = Species(molecule=[molecule])
+        species.generate_resonance_structures()
+        transportList = database.transport.getAllTransportProperties(species)
+        frequencies = getStatmechFrequencies(molecule) if statmech else None
+    except Exception, e:
+        return [getErrorRecord(number, line, e) for number, line in group]
+    if not transportList:
+        return [getErrorRecord(number, line, 'No transport data were found.') for number, line in group]
+    records = []
+    for number, line in group:
+        for rank, (data, library, entry) in enumerate(transportList):
+            record = getTransportRecord(number, line, molecule, data, library)
+            if frequencies is not None:
+                record['frequencies_per_cm'] = frequencies
+            if chemkin:
+                species = Species(index=number, label=record['species'], molecule=[molecule])
+                record['chemkin'] = getChemkinTransportEntry(species, data, record['source'], commented=rank > 0)
+            records.append(record)
+    return records
+
+
+def getStatmechFrequencies(molecule):
+    """
+    Return the characteristic vibrational frequencies (in cm^-1) of the
+    given `molecule` estimated by the statmech database, which fits them to
+    the estimated heat capacity of the species.
+    """
+    from rmgpy.statmech import HarmonicOscillator
+    species = Species(molecule=[molecule])
+    generateSpeciesThermo(species, database)
+    conformer = database.statmech.getStatmechData(species.molecule[0], species.thermo)
+    return [float(frequency) for mode in conformer.modes if isinstance(mode, HarmonicOscillator)
+            for frequency in mode.frequencies.value_si]
+
+
+def getTransportRecord(number, line, molecule, data, library):
+    """
+    Return the transport batch record of the given transport `data` of
+    `molecule` from `library` (``None`` for group additivity) for input line
+    `number`.
+    """
+    from rmgpy import constants
+    return {
+        'line': number,
+        'input': line,
+        'species': molecule.toSMILES(),
+        'source': library.label if library is not None else 'Group additivity',
+        'shape_index': data.shapeIndex,
+        'epsilon_K': data.epsilon.value_si / constants.R,
+        'sigma_angstrom': data.sigma.value_si * 1e10,
+        'dipole_debye': data.dipoleMoment.value_si * constants.c * 1e21 if data.dipoleMoment else 0,
+        'polarizability_angstrom3': data.polarizability.value_si * 1e30 if data.polarizability else 0,
+        'rotrelaxcollnum': data.rotrelaxcollnum or 0,
+    }
+
+
+def getChemkinTransportEntry(species, data, source, commented=False):
+    """
+    Return the Chemkin transport line of the given `species` with transport
+    `data`, in the format written by RMG-Py, naming the species the same way
+    as :func:`getChemkinThermoEntry`. If `commented` is ``True`` the line is
+    commented out, so alternative sources can be written alongside the one
+    used without repeating a species name.
+    """
+    from rmgpy import constants
+    from rmgpy.chemkin import getSpeciesIdentifier as getChemkinIdentifier
+    entry = '{0:19} {1:d}   {2:9.3f} {3:9.3f} {4:9.3f} {5:9.3f} {6:9.3f}    ! {7:s}\n'.format(
+        getChemkinIdentifier(species),
+        data.shapeIndex,
+        data.epsilon.value_si / constants.R,
+        data.sigma.value_si * 1e10,
+        data.dipoleMoment.value_si * constants.c * 1e21 if data.dipoleMoment else 0,
+        data.polarizability.value_si * 1e30 if data.polarizability else 0,
+        data.rotrelaxcollnum or 0,
+        source,
+    )
+    return '! ' + entry if commented else entry
+
+################################################################################
+
+# The Abraham descriptors of a solute, in the order used by the solvation matrix
+SOLUTE_DESCRIPTORS = ['S', 'B', 'E', 'L', 'A', 'V']
+
+def solvationBatchTask(task):
+    """
+    Get the solute data of one unique species for the solvation batch view.
+    The `task` is made by :func:`getSpeciesBatchTasks`. Returns a list of
+    records, one for each input line, giving the solute descriptors from the
+    first source RMG would use (a solute library, else group additivity).
+    The solvation corrections are added by :func:`addSolvationCorrections`.
+    """
+    molecule, group = task
+    try:
+        species = Species(molecule=[molecule])
+        species.generate_resonance_structures()
+        soluteDataList = database.solvation.getAllSoluteData(species)
+    except Exception, e:
+        return [getErrorRecord(number, line, e) for number, line in group]
+    if not soluteDataList:
+        return [getErrorRecord(number, line, 'No solute data were found.') for number, line in group]
+    soluteData, library, entry = soluteDataList[0]
+    return [{
+        'line': number,
+        'input': line,
+        'species': molecule.toSMILES(),
+        'source': library.name if library is not None else 'Group additivity',
+        'descriptors': dict([(descriptor, getattr(soluteData, descriptor) or 0.0) for descriptor in SOLUTE_DESCRIPTORS]),
+    } for number, line in group]
+
+
+def getSolventCoefficients(solventDataList):
+    """
+    Return an array of shape ``(solvents, 3, 7)`` of the coefficients giving
+    the enthalpy (J/mol), entropy (J/mol*K) and Gibbs free energy (J/mol) of
+    solvation in each solvent of `solventDataList` as linear functions of 1
+    and the :data:`SOLUTE_DESCRIPTORS`. The coefficients are found by
+    evaluating ``getSolvationCorrection`` at the origin and at each unit
+    vector of the descriptors, which is exact since the Abraham and Mintz
+    relationships are linear in the solute descriptors, and keeps the matrix
+    consistent with RMG's own corrections.
+    """
+    probes = numpy.vstack([numpy.zeros(len(SOLUTE_DESCRIPTORS)), numpy.eye(len(SOLUTE_DESCRIPTORS))])
+    coefficients = numpy.zeros((len(solventDataList), 3, len(probes)))
+    for index, solventData in enumerate(solventDataList):
+        for probe, values in enumerate(probes):
+            soluteData = SoluteData(**dict(zip(SOLUTE_DESCRIPTORS, values)))
+            correction = database.solvation.getSolvationCorrection(soluteData, solventData)
+            coefficients[index, :, probe] = [correction.enthalpy, correction.entropy, correction.gibbs]
+        coefficients[index, :, 1:] -= coefficients[index, :, 0:1]
+    return coefficients
+
+
+def getSolvationMatrix(descriptors, coefficients):
+    """
+    Return an array of shape ``(solutes, solvents, 3)`` of the enthalpy,
+    entropy and Gibbs free energy of solvation of each solute in each
+    solvent, given an array of the solute `descriptors` of shape ``(solutes,
+    6)`` and the solvent `coefficients` from :func:`getSolventCoefficients`.
+    """
+    descriptors = numpy.hstack([numpy.ones((descriptors.shape[0], 1)), descriptors])
+    return numpy.einsum('nk,mqk->nmq', descriptors, coefficients)
+
+
+def getSoluteDescriptors(records):
+    """
+    Return the array of the solute descriptors of the given solvation batch
+    `records`, of shape ``(records, 6)``.
+    """
+    return numpy.array([[record['descriptors'][descriptor] for descriptor in SOLUTE_DESCRIPTORS] for record in records]).reshape(-1, len(SOLUTE_DESCRIPTORS))
+
+
+def addSolvationCorrections(results, solvents, coefficients):
+    """
+    Yield each list of solvation batch records from the given iterator of
+    record lists, after adding the enthalpy (kJ/mol), entropy (J/mol*K) and
+    Gibbs free energy (kJ/mol) of solvation of each solute in each of the
+    `solvents` (labels), whose coefficients are given by
+    :func:`getSolventCoefficients`.
+    """
+    for records in results:
+        solutes = [record for record in records if 'descriptors' in record]
+        if solutes:
+            matrix = getSolvationMatrix(getSoluteDescriptors(solutes), coefficients)
+            for record, row in zip(solutes, matrix):
+                record['dH_kJ_per_mol'] = dict(zip(solvents, row[:, 0] / 1000.))
+                record['dS_J_per_mol_K'] = dict(zip(solvents, row[:, 1]))
+                record['dG_kJ_per_mol'] = dict(zip(solvents, row[:, 2] / 1000.))
+        yield records
+
+
+def getSolvationBatchFields(solvents):
+    """
+    Return the CSV columns of the solvation batch records for the given
+    `solvents` (labels).
+    """
+    fields = ['line', 'input', 'species', 'source']
+    fields.extend(['descriptors[{0}]'.format(descriptor) for descriptor in SOLUTE_DESCRIPTORS])
+    for quantity in ['dG_kJ_per_mol', 'dH_kJ_per_mol', 'dS_J_per_mol_K']:
+        fields.extend(['{0}[{1}]'.format(quantity, solvent) for solvent in solvents])
+    fields.append('error')
+    return fields
+
+
+def getSolvationNPZ(results, solvents, coefficients):
+    """
+    Return the contents of a NumPy ``.npz`` file holding the solvation matrix
+    of all the solutes in the given iterator of solvation batch record lists
+    and the given `solvents`. The arrays are ``line``, ``input``,
+    ``species``, ``source`` and ``descriptors`` (with columns in the order of
+    ``descriptor_names``) for the solutes, ``solvents``, and ``dG``
+    (kJ/mol), ``dH`` (kJ/mol) and ``dS`` (J/mol*K) of shape ``(solutes,
+    solvents)``. Lines that failed are listed with their error in
+    ``error_line`` and ``error``.
+    """
+    records = sorted([record for records in results for record in records], key=lambda record: record['line'])
+    solutes = [record for record in records if 'descriptors' in record]
+    errors = [record for record in records if 'descriptors' not in record]
+    descriptors = getSoluteDescriptors(solutes)
+    matrix = getSolvationMatrix(descriptors, coefficients)
+    output = StringIO.StringIO()
+    numpy.savez_compressed(output,
+        line=numpy.array([record['line'] for record in solutes], numpy.int64),
+        input=numpy.array([record['input'] for record in solutes], numpy.str_),
+        species=numpy.array([record['species'] for record in solutes], numpy.str_),
+        source=numpy.array([record['source'] for record in solutes], numpy.str_),
+        descriptor_names=numpy.array(SOLUTE_DESCRIPTORS, numpy.str_),
+        descriptors=descriptors,
+        solvents=numpy.array(solvents, numpy.str_),
+        dH=matrix[:, :, 0] / 1000.,
+        dS=matrix[:, :, 1],
+        dG=matrix[:, :, 2] / 1000.,
+        error_line=numpy.array([record['line'] for record in errors], numpy.int64),
+        error=numpy.array([record['error'] for record in errors], numpy.str_),
+    )
+    return output.getvalue()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG Website - A Django-powered website for Reaction Mechanism Generator     #
+#                                                                             #
+# Copyright (c) 2011-2018 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+
+"""
+This module provides the in-memory LRU caches used by the database views,
+optionally backed by one of the Django caches configured in ``CACHES``
+(e.g. an on-disk cache shared by all web processes).
+
+Every cache is registered by name, so that its hit and miss counters can be
+reported by the ``cache-stats`` view.
+"""
+
+import collections
+import threading
+
+from django.core.cache import caches
+from django.core.cache.backends.base import InvalidCacheBackendError
+
+# All LRU caches, by name
+registry = {}
+
+
+class LRUCache(object):
+    """
+    A thread-safe least-recently-used cache. The attributes are:
+
+    =============== ============================================================
+    Attribute       Description
+    =============== ============================================================
+    `name`          The name of the cache, used in its statistics
+    `maxsize`       The maximum number of items kept in memory
+    `backend`       The Django cache used as a second level, or ``None``
+    `hits`          The number of lookups answered from memory
+    `backendHits`   The number of lookups answered from the Django cache
+    `misses`        The number of lookups that were not answered
+    =============== ============================================================
+
+    Items found in the Django cache are moved into memory. Items must be
+    picklable if a Django cache is used.
+    """
+
+    def __init__(self, name, maxsize=256, backend=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.backend = None
+        if backend:
+            try:
+                self.backend = caches[backend]
+            except InvalidCacheBackendError:
+                print 'Cache "{0}" is not configured; {1} is cached in memory only.'.format(backend, name)
+        self.items = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.backendHits = 0
+        self.misses = 0
+        registry[name] = self
+
+    def get(self, key, default=None):
+        """
+        Return the item cached for `key`, or `default` if there is none.
+        """
+        with self.lock:
+            try:
+                value = self.items.pop(key)
+            except KeyError:
+                pass
+            else:
+                self.items[key] = value
+                self.hits += 1
+                return value
+        if self.backend is not None:
+            value = self.backend.get(self.name + ':' + key)
+            if value is not None:
+                with self.lock:
+                    self.backendHits += 1
+                self.store(key, value)
+                return value
+        with self.lock:
+            self.misses += 1
+        return default
+
+    def set(self, key, value):
+        """
+        Cache `value` for `key`, in memory and in the Django cache.
+        """
+        self.store(key, value)
+        if self.backend is not None:
+            self.backend.set(self.name + ':' + key, value)
+
+    def store(self, key, value):
+        """
+        Cache `value` for `key` in memory only, evicting the least recently
+        used items if the cache is full.
+        """
+        with self.lock:
+            self.items.pop(key, None)
+            self.items[key] = value
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove all items from memory. The Django cache is left alone, since
+        its keys include the database version.
+        """
+        with self.lock:
+            self.items.clear()
+
+    def getStats(self):
+        """
+        Return a dict of the size and hit/miss counters of the cache.
+        """
+        with self.lock:
+            return {
+                'size': len(self.items),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'backend_hits': self.backendHits,
+                'misses': self.misses,
+            }
+
+
+def getCacheStats():
+    """
+    Return a dict mapping the name of each registered cache to its
+    statistics.
+    """
+    return dict([(name, cache.getStats()) for name, cache in registry.iteritems()])
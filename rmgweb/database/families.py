@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG Website - A Django-powered website for Reaction Mechanism Generator     #
+#                                                                             #
+# Copyright (c) 2011-2018 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+
+"""
+This module provides a lazily loaded registry of kinetics families, used in
+place of the ``families`` dict of the RMG-Py kinetics database. Loading and
+training every family takes minutes, while most pages only need one family,
+so each family is only loaded (and trained) the first time it is looked up.
+
+Iterating over the labels of the registry does not load any families, but
+any access to the families themselves through ``values()``, ``items()``,
+``pop()`` and friends loads them first, so code that needs every family (e.g.
+reaction generation in RMG-Py) keeps working unchanged. Code that only needs
+the labels should use :func:`get_family_labels` or ``keys()``.
+"""
+
+import os
+import threading
+
+
+class LazyFamilyRegistry(dict):
+    """
+    A dict mapping kinetics family labels to :class:`KineticsFamily` objects
+    that loads each family on first access. The attributes are:
+
+    =============== ============================================================
+    Attribute       Description
+    =============== ============================================================
+    `path`          The kinetics families directory of the RMG database
+    `loader`        A function that takes a family label and returns the loaded family
+    `lock`          A lock serializing the loading of families
+    =============== ============================================================
+
+    Families that have not been loaded yet are stored as ``None``. The
+    `loader` is not pickled, and must be attached again after unpickling.
+    """
+
+    def __init__(self, path, loader=None, labels=None):
+        dict.__init__(self)
+        self.path = path
+        self.loader = loader
+        self.lock = threading.RLock()
+        if labels is None:
+            labels = get_family_labels(path)
+        for label in labels:
+            dict.__setitem__(self, label, None)
+
+    def __reduce__(self):
+        # Only pickle the families that are already loaded
+        labels = dict.keys(self)
+        loaded = [(label, family) for label, family in dict.iteritems(self) if family is not None]
+        return (LazyFamilyRegistry, (self.path, None, labels), None, None, iter(loaded))
+
+    def __getitem__(self, label):
+        family = dict.__getitem__(self, label)
+        if family is None:
+            with self.lock:
+                family = dict.__getitem__(self, label)
+                if family is None:
+                    if self.loader is None:
+                        raise KeyError(label)
+                    family = self.loader(label)
+                    dict.__setitem__(self, label, family)
+        return family
+
+    def is_loaded(self, label):
+        """
+        Return ``True`` if the family with the given `label` has been loaded.
+        """
+        return dict.get(self, label) is not None
+
+    def load_all(self):
+        """
+        Load all families that have not been loaded yet.
+        """
+        for label in sorted(dict.keys(self)):
+            self[label]
+
+    def copy(self):
+        # The copy loads the families not loaded yet by itself
+        registry = LazyFamilyRegistry(self.path, self.loader, labels=[])
+        dict.update(registry, self)
+        return registry
+
+    def get(self, label, default=None):
+        if label in self:
+            return self[label]
+        return default
+
+    def pop(self, label, *default):
+        if label in self:
+            family = self[label]
+            dict.pop(self, label)
+            return family
+        return dict.pop(self, label, *default)
+
+    def popitem(self):
+        for label in self:
+            return label, self.pop(label)
+        raise KeyError('popitem(): dictionary is empty')
+
+    def setdefault(self, label, default=None):
+        if label in self:
+            return self[label]
+        dict.__setitem__(self, label, default)
+        return default
+
+    def itervalues(self):
+        self.load_all()
+        return dict.itervalues(self)
+
+    def iteritems(self):
+        self.load_all()
+        return dict.iteritems(self)
+
+    def values(self):
+        self.load_all()
+        return dict.values(self)
+
+    def items(self):
+        self.load_all()
+        return dict.items(self)
+
+    def viewvalues(self):
+        self.load_all()
+        return dict.viewvalues(self)
+
+    def viewitems(self):
+        self.load_all()
+        return dict.viewitems(self)
+
+
+def get_family_labels(path):
+    """
+    Return the labels of the kinetics families in the directory at `path`,
+    i.e. the names of its subdirectories.
+    """
+    return sorted([label for label in os.listdir(path) if os.path.isdir(os.path.join(path, label))])
@@ -336,4 +336,99 @@ class RateEvaluationForm(forms.Form):
     temperature = forms.FloatField(label="Temperature")    
     temperature_units = forms.ChoiceField(choices=temp_units)
     pressure = forms.FloatField(label="Pressure")
-    pressure_units = forms.ChoiceField(choices=p_units)
\ No newline at end of file
+    pressure_units = forms.ChoiceField(choices=p_units)
+
+class BatchForm(forms.Form):
+    """
+    The base class of the forms for the batch views, which take a list of
+    items (one per line) either typed in or uploaded as a file.
+    """
+    items = forms.CharField(label="Items (one per line)", widget=forms.widgets.Textarea(attrs={'rows': 20, 'cols': 60}), required=False)
+    file = forms.FileField(label="Or upload a file", required=False)
+    format_choices = (('jsonl', 'JSON lines'), ('csv', 'CSV'))
+    format = forms.ChoiceField(label="Output format", choices=format_choices, initial='jsonl')
+
+    def clean(self):
+        """
+        Make sure that a list of items was given, and combine the typed and
+        uploaded items into the `lines` of the cleaned data.
+        """
+        cleaned_data = super(BatchForm, self).clean()
+        text = cleaned_data.get('items') or ''
+        upload = cleaned_data.get('file')
+        if upload is not None:
+            text += '\n' + upload.read()
+        lines = [(number + 1, line.strip()) for number, line in enumerate(str(text).splitlines())]
+        lines = [(number, line) for number, line in lines if line and not line.startswith('#')]
+        if not lines:
+            raise forms.ValidationError('No items were given.')
+        cleaned_data['lines'] = lines
+        return cleaned_data
+
+    def cleanFloatList(self, field):
+        """
+        Return the comma-separated list of numbers in the given `field` as a
+        list of floats.
+        """
+        try:
+            values = [float(value) for value in self.cleaned_data[field].split(',') if value.strip()]
+        except ValueError:
+            raise forms.ValidationError('Invalid list of numbers.')
+        if not values:
+            raise forms.ValidationError('At least one value is required.')
+        return values
+
+
+class KineticsBatchForm(BatchForm):
+    """
+    This form provides a means of specifying many reactions to get kinetic
+    data for, one per line as ``A + B >> C + D`` (or just ``A + B``), with
+    each species given as SMILES, InChI or an adjacency list with semicolons
+    in place of newlines.
+    """
+    temperatures = forms.CharField(label="Temperatures (K)", initial='300,400,500,600,800,1000,1500,2000')
+    pressures = forms.CharField(label="Pressures (bar)", initial='1')
+    resonance = forms.BooleanField(label="Generate Resonance Structures", widget=forms.CheckboxInput(), initial=True, required=False)
+
+    def clean_temperatures(self):
+        return self.cleanFloatList('temperatures')
+
+    def clean_pressures(self):
+        return self.cleanFloatList('pressures')
+
+
+class ThermoBatchForm(BatchForm):
+    """
+    This form provides a means of specifying many species to get thermo
+    data for, one per line, each given as SMILES, InChI or an adjacency list
+    with semicolons in place of newlines.
+    """
+    format_choices = (('jsonl', 'JSON lines'), ('chemkin', 'Chemkin'))
+    format = forms.ChoiceField(label="Output format", choices=format_choices, initial='jsonl')
+    sources_choices = (('best', 'Best source only'), ('all', 'All sources'))
+    sources = forms.ChoiceField(label="Sources", choices=sources_choices, initial='best')
+
+
+class TransportBatchForm(BatchForm):
+    """
+    This form provides a means of specifying many species to get transport
+    (and optionally statmech) data for, one per line, each given as SMILES,
+    InChI or an adjacency list with semicolons in place of newlines.
+    """
+    format_choices = (('jsonl', 'JSON lines'), ('chemkin', 'Chemkin'))
+    format = forms.ChoiceField(label="Output format", choices=format_choices, initial='jsonl')
+    statmech = forms.BooleanField(label="Include Statmech Estimates", widget=forms.CheckboxInput(), initial=False, required=False)
+
+
+class SolvationBatchForm(BatchForm):
+    """
+    This form provides a means of specifying many solutes, one per line,
+    each given as SMILES, InChI or an adjacency list with semicolons in place
+    of newlines, and the solvents to get their solvation corrections in.
+    """
+    format_choices = (('jsonl', 'JSON lines'), ('csv', 'CSV'), ('npz', 'NumPy (.npz)'))
+    format = forms.ChoiceField(label="Output format", choices=format_choices, initial='jsonl')
+    solvents = forms.CharField(label="Solvents (comma separated, or blank for all)", required=False)
+
+    def clean_solvents(self):
+        return [solvent.strip() for solvent in self.cleaned_data['solvents'].split(',') if solvent.strip()]
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG Website - A Django-powered website for Reaction Mechanism Generator     #
+#                                                                             #
+# Copyright (c) 2011-2018 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+
+"""
+Management command that compares how long a page listing many structures
+takes to load with its structures drawn as separate images and with them
+inlined as an SVG sprite (see ``STRUCTURE_SPRITES``). The page is requested
+through the Django test client, and in the per-image mode every image it
+refers to is then requested too, over a number of concurrent connections
+as a browser would.
+"""
+
+import re
+import shutil
+import tempfile
+import time
+from multiprocessing.pool import ThreadPool
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+import rmgweb.settings
+
+
+class Command(BaseCommand):
+    help = 'Compare the load time of a structure table page with separate images and with an inline SVG sprite.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path',
+                            help='Path of the page, e.g. /database/kinetics/families/H_Abstraction/rules')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Number of timed loads of the page in each mode.')
+        parser.add_argument('--connections', type=int, default=6,
+                            help='Number of images requested at once, as by a browser.')
+        parser.add_argument('--cold', action='store_true', default=False,
+                            help='Start every load with an empty image cache.')
+        parser.add_argument('--host', default=None,
+                            help='Host name to request the page as (defaults to the first of ALLOWED_HOSTS).')
+
+    def handle(self, *args, **options):
+        import rmgweb.main.images
+
+        host = options['host']
+        if host is None:
+            hosts = [name.lstrip('.') for name in rmgweb.settings.ALLOWED_HOSTS if name != '*']
+            host = hosts[0] if hosts else 'localhost'
+        self.client_options = {'HTTP_HOST': host}
+        cache_path = rmgweb.settings.IMAGE_CACHE_PATH
+
+        # Only time the page itself, not drawing images in the background
+        rmgweb.settings.PRERENDER_IMAGES = False
+        # Load the database and warm the caches before timing anything
+        for sprite in ['0', '1']:
+            response = Client(**self.client_options).get(options['path'], {'sprite': sprite})
+            if response.status_code != 200:
+                raise CommandError('Requesting {0} failed with status {1:d}.'.format(options['path'], response.status_code))
+
+        results = {}
+        for sprite in ['0', '1']:
+            results[sprite] = []
+            for index in range(options['repeat']):
+                if options['cold']:
+                    rmgweb.settings.IMAGE_CACHE_PATH = tempfile.mkdtemp(prefix='rmgweb-images')
+                    rmgweb.main.images._image_cache = None
+                try:
+                    results[sprite].append(self.load_page(options['path'], sprite, options['connections']))
+                finally:
+                    if options['cold']:
+                        shutil.rmtree(rmgweb.settings.IMAGE_CACHE_PATH, ignore_errors=True)
+                        rmgweb.settings.IMAGE_CACHE_PATH = cache_path
+                        rmgweb.main.images._image_cache = None
+
+        self.stdout.write('{0:<8} {1:>10} {2:>10} {3:>8} {4:>10} {5:>10}'.format(
+            'Mode', 'Page (s)', 'Total (s)', 'Images', 'Page (kB)', 'Total (kB)'))
+        for sprite, label in [('0', 'images'), ('1', 'sprite')]:
+            page_time, total_time, count, page_size, total_size = [median(values) for values in zip(*results[sprite])]
+            self.stdout.write('{0:<8} {1:>10.3f} {2:>10.3f} {3:>8d} {4:>10.1f} {5:>10.1f}'.format(
+                label, page_time, total_time, int(count), page_size / 1024.0, total_size / 1024.0))
+
+    def load_page(self, path, sprite, connections):
+        """
+        Load the page at `path` with sprites turned on or off by `sprite`,
+        followed by every image it refers to. Returns the time taken to load
+        the page and to load everything, the number of images, and the size
+        of the page and of everything, in bytes.
+        """
+        start = time.time()
+        page = Client(**self.client_options).get(path, {'sprite': sprite}).content
+        page_time = time.time() - start
+        urls = set([url for url in re.findall(r'<img[^>]*\ssrc="([^"]+)"', page)
+                    if not url.startswith(rmgweb.settings.STATIC_URL)])
+        pool = ThreadPool(connections)
+        try:
+            sizes = pool.map(self.load_image, sorted(urls))
+        finally:
+            pool.close()
+            pool.join()
+        total_time = time.time() - start
+        return page_time, total_time, len(urls), len(page), len(page) + sum(sizes)
+
+    def load_image(self, url):
+        """
+        Load the image at `url`, returning its size in bytes.
+        """
+        return len(Client(**self.client_options).get(url).content)
+
+
+def median(values):
+    """
+    Return the median of the given list of `values`.
+    """
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.0
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG Website - A Django-powered website for Reaction Mechanism Generator     #
+#                                                                             #
+# Copyright (c) 2011-2018 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+
+"""
+Management command that loads the RMG database and draws the images of every
+molecule and group in it into the image cache, reporting the progress as it
+goes. Run it after a deploy so that no visitor waits for images to be drawn.
+"""
+
+import multiprocessing
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+import rmgweb.settings
+
+
+class Command(BaseCommand):
+    help = 'Draw the images of every structure in the RMG database into the image cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count(),
+                            help='Number of worker processes (defaults to the number of CPUs).')
+        parser.add_argument('--families', action='store_true', default=False,
+                            help='Load every kinetics family first, so that their structures are drawn too.')
+        parser.add_argument('--force', action='store_true', default=False,
+                            help='Check every image even if the images are up to date.')
+
+    def handle(self, *args, **options):
+        from rmgweb.database.prerender import get_prerender_status, prerender_images
+        from rmgweb.database.tools import database
+        from rmgweb.main.images import get_image_cache
+
+        if get_image_cache() is None:
+            raise CommandError('Images are not cached because IMAGE_CACHE_PATH is not set.')
+
+        # Pre-render in this process only, rather than in the background after loading
+        rmgweb.settings.PRERENDER_IMAGES = False
+        start = time.time()
+        database.load()
+        if options['families']:
+            database.kinetics.families.values()
+        self.stdout.write('Loaded RMG database in {0:.1f} s.'.format(time.time() - start))
+
+        start = time.time()
+        status = prerender_images(database, options['processes'], force=options['force'], callback=self.report)
+        if status is None:
+            raise CommandError('Images are already being pre-rendered by process {0}.'.format(get_prerender_status().get('pid')))
+        if status['state'] == 'failed':
+            raise CommandError('Pre-rendering failed: {0}'.format(status['error']))
+        if status['started'] < start:
+            self.stdout.write('Images are up to date; pre-rendered {0} structures at {1}.'.format(
+                status['total'], time.ctime(status['finished'])))
+            return
+        self.stdout.write('Drew {0} images of {1} structures ({2} already cached, {3} errors) in {4:.1f} s.'.format(
+            status['rendered'], status['total'], status['skipped'], status['errors'], status['finished'] - status['started']))
+        if status['errors']:
+            self.stdout.write('Last error: {0}'.format(status['error']))
+
+    def report(self, status):
+        """
+        Report the progress of pre-rendering every 100 structures.
+        """
+        if status['done'] % 100 == 0 or status['done'] == status['total']:
+            elapsed = time.time() - status['started']
+            self.stdout.write('{0} of {1} structures ({2} images drawn) in {3:.1f} s'.format(
+                status['done'], status['total'], status['rendered'], elapsed))
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG Website - A Django-powered website for Reaction Mechanism Generator     #
+#                                                                             #
+# Copyright (c) 2011-2018 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+
+"""
+Management command that stands in for the RMG-Java PopulateReactions
+service by replaying the responses recorded by the RMG-Java client (see
+``RMG_JAVA_RECORD_PATH``), so that the website can be run, tested and
+benchmarked without RMG-Java.
+"""
+
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+import rmgweb.settings
+
+
+class Command(BaseCommand):
+    help = 'Serve recorded RMG-Java responses in place of the RMG-Java service.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=None,
+                            help='Directory of the recorded responses (defaults to RMG_JAVA_RECORD_PATH).')
+        parser.add_argument('--host', default=rmgweb.settings.RMG_JAVA_HOST,
+                            help='Host name to listen on.')
+        parser.add_argument('--port', type=int, default=rmgweb.settings.RMG_JAVA_PORT,
+                            help='Port to listen on.')
+        parser.add_argument('--protocol', choices=['legacy', 'framed'], default=rmgweb.settings.RMG_JAVA_PROTOCOL,
+                            help='Protocol to speak.')
+        parser.add_argument('--delay', type=float, default=0.0,
+                            help='Seconds to wait before each response, to simulate RMG-Java.')
+
+    def handle(self, *args, **options):
+        from rmgweb.database.rmgjava import ReplayServer
+
+        path = options['path'] or rmgweb.settings.RMG_JAVA_RECORD_PATH
+        if not path or not os.path.isdir(path):
+            raise CommandError('No directory of recorded responses given, and RMG_JAVA_RECORD_PATH is not one.')
+
+        server = ReplayServer(path, host=options['host'], port=options['port'],
+                              protocol=options['protocol'], delay=options['delay'])
+        self.stdout.write('Replaying RMG-Java responses from {0} on {1}:{2:d} ({3} protocol).'.format(
+            path, options['host'], server.port, options['protocol']))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG Website - A Django-powered website for Reaction Mechanism Generator     #
+#                                                                             #
+# Copyright (c) 2011-2018 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+
+"""
+Management command that loads the full RMG database and writes the binary
+snapshot used to warm-start web processes. Run it before a deploy so that
+the first requests do not have to parse the database. The structures in the
+database are registered under their short identifiers at the same time.
+"""
+
+import multiprocessing
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+import rmgweb.settings
+
+
+class Command(BaseCommand):
+    help = 'Load the full RMG database and write the warm-start snapshot.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=None,
+                            help='Path of the snapshot file (defaults to DATABASE_SNAPSHOT_PATH).')
+        parser.add_argument('--force', action='store_true', default=False,
+                            help='Rebuild the snapshot even if it is up to date.')
+        parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count(),
+                            help='Number of worker processes parsing the database (defaults to the number of CPUs).')
+
+    def handle(self, *args, **options):
+        from rmgweb.database.prerender import collect_structures
+        from rmgweb.database.tools import database
+        from rmgweb.main.tools import registerStructures
+
+        path = options['output'] or rmgweb.settings.DATABASE_SNAPSHOT_PATH
+        if not path:
+            raise CommandError('No snapshot path given and DATABASE_SNAPSHOT_PATH is not set.')
+
+        key = database.get_snapshot_key()
+        if not options['force'] and database.read_snapshot_key(path) == key:
+            self.stdout.write('Database snapshot {0} is up to date.'.format(path))
+            return
+
+        # Always parse from source so the snapshot reflects the database files.
+        # This process has no other threads, so it can safely fork workers.
+        rmgweb.settings.DATABASE_LOAD_PROCESSES = options['processes']
+        database.restore_attempted = True
+        start = time.time()
+        database.load()
+        self.stdout.write('Loaded RMG database in {0:.1f} s.'.format(time.time() - start))
+
+        # A full load already writes the snapshot to DATABASE_SNAPSHOT_PATH,
+        # unless kinetics families are loaded lazily; saving the snapshot
+        # loads and trains every family, so that restores do not have to
+        if path != rmgweb.settings.DATABASE_SNAPSHOT_PATH or database.snapshot_key != key:
+            start = time.time()
+            database.save_snapshot(path, key)
+            self.stdout.write('Loaded all kinetics families and saved the snapshot in {0:.1f} s.'.format(time.time() - start))
+        self.stdout.write('Wrote database snapshot {0}.'.format(path))
+
+        # Web processes register structures when they are first shown, but
+        # registering them all here saves the first visitors the queries
+        start = time.time()
+        structures = registerStructures(collect_structures(database))
+        self.stdout.write('Registered {0} structures in {1:.1f} s.'.format(len(structures), time.time() - start))
@@ -0,0 +1,312 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG Website - A Django-powered website for Reaction Mechanism Generator     #
+#                                                                             #
+# Copyright (c) 2011-2018 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+
+"""
+This module loads parts of the RMG database, and generates reactions from
+the kinetics families, in pools of worker processes.
+
+Each directory of the database that :class:`RMGWebDatabase` loads as a unit
+(e.g. ``thermo/libraries``) is parsed by a separate worker, as is each
+kinetics family. A worker loads the directory into a fresh database object
+and returns the attributes of that object the directory fills in (the whole
+object for the solvation and statmech databases), pickled with the highest
+protocol. The parent process applies them to its own copy of the component,
+so nothing that RMG-Py loads in place is lost or shared with the live
+component. Training the kinetics
+families needs the thermo database and is left to the parent.
+
+Reactions are generated by a pool of processes forked from the web process
+once its database is loaded, so every worker starts with a copy of it. The
+kinetics families are split into one contiguous shard per worker; each
+worker matches its families and estimates the kinetics of the resulting
+reactions, and the results are joined in family order, exactly as
+:meth:`KineticsDatabase.generate_reactions_from_families` would return them.
+The pool is replaced when the loaded database changes. Other pools forked
+the same way (e.g. for the batch views) are made by :func:`get_forked_pool`.
+"""
+
+import cPickle
+import math
+import multiprocessing
+import os
+import sys
+import threading
+
+from rmgpy.data.thermo import ThermoDatabase
+from rmgpy.data.kinetics import KineticsDatabase, KineticsFamily
+from rmgpy.data.transport import TransportDatabase
+from rmgpy.data.rmg import SolvationDatabase
+from rmgpy.data.rmg import StatmechDatabase
+
+from rmgweb.database.families import LazyFamilyRegistry, get_family_labels
+
+
+def init_worker():
+    """
+    Set up a worker process. Pickling the loaded database objects recurses
+    deeply, as for the database snapshot.
+    """
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+
+
+# The attributes of the component filled in by loading each section of the
+# database, or None if the section is the whole component
+SECTION_ATTRIBUTES = {
+    os.path.join('thermo', 'depository'): ['depository'],
+    os.path.join('thermo', 'libraries'): ['libraries', 'libraryOrder'],
+    os.path.join('thermo', 'groups'): ['groups'],
+    os.path.join('transport', 'libraries'): ['libraries', 'libraryOrder'],
+    os.path.join('transport', 'groups'): ['groups'],
+    'solvation': None,
+    os.path.join('kinetics', 'libraries'): ['libraries', 'libraryOrder'],
+    'statmech': None,
+}
+
+
+def load_task(task):
+    """
+    Load one part of the RMG database in a worker process. The `task` is a
+    tuple of the database path, the directory relative to it, and a family
+    label for a single kinetics family (or ``None``). Returns the task and
+    the pickled result: the loaded family, or otherwise a dict of the
+    attributes of the component filled in by loading the directory (see
+    ``SECTION_ATTRIBUTES``), along with any others it set.
+    """
+    path, section, label = task
+    dirpath = os.path.join(path, section)
+    if label is not None:
+        kinetics = KineticsDatabase()
+        result = KineticsFamily(label=label)
+        result.load(os.path.join(dirpath, label), kinetics.local_context, kinetics.global_context,
+                    depositoryLabels='all')
+    else:
+        if section == os.path.join('thermo', 'depository'):
+            db = ThermoDatabase()
+            load = db.loadDepository
+        elif section == os.path.join('thermo', 'libraries'):
+            db = ThermoDatabase()
+            load = db.loadLibraries
+        elif section == os.path.join('thermo', 'groups'):
+            db = ThermoDatabase()
+            load = db.loadGroups
+        elif section == os.path.join('transport', 'libraries'):
+            db = TransportDatabase()
+            load = db.loadLibraries
+        elif section == os.path.join('transport', 'groups'):
+            db = TransportDatabase()
+            load = db.loadGroups
+        elif section == 'solvation':
+            db = SolvationDatabase()
+            load = db.load
+        elif section == os.path.join('kinetics', 'libraries'):
+            db = KineticsDatabase()
+            load = db.loadLibraries
+        elif section == 'statmech':
+            db = StatmechDatabase()
+            load = db.load
+        else:
+            raise ValueError('Invalid database section "{0}".'.format(section))
+        before = dict(db.__dict__)
+        load(dirpath)
+        attributes = SECTION_ATTRIBUTES[section]
+        if attributes is None:
+            attributes = db.__dict__.keys()
+        # Loading may fill existing objects in place, so always return the
+        # attributes of the section, whether or not they were rebound
+        result = dict([(key, value) for key, value in db.__dict__.iteritems()
+                       if key in attributes or key not in before or before[key] is not value])
+    return task, cPickle.dumps(result, cPickle.HIGHEST_PROTOCOL)
+
+
+def load_sections(path, sections, processes, families=True, callback=None):
+    """
+    Load the given `sections` of the RMG database at `path`, a list of
+    directories relative to `path`, in a pool of `processes` worker
+    processes. The ``kinetics/families`` section is split into one task per
+    family, and is skipped if `families` is ``False``. If given, `callback`
+    is called with a description of each finished task.
+
+    Returns a dict mapping each section to the attributes to set on its
+    component, and a dict mapping the labels of the loaded kinetics families
+    to the families.
+    """
+    tasks = []
+    families_section = os.path.join('kinetics', 'families')
+    for section in sections:
+        if section == families_section:
+            if families:
+                tasks.extend([(path, section, label) for label in get_family_labels(os.path.join(path, section))])
+        else:
+            tasks.append((path, section, None))
+
+    changes = {}
+    loaded_families = {}
+    pool = multiprocessing.Pool(processes, initializer=init_worker)
+    try:
+        for index, ((_, section, label), data) in enumerate(pool.imap_unordered(load_task, tasks)):
+            if label is not None:
+                loaded_families[label] = cPickle.loads(data)
+            else:
+                changes[section] = cPickle.loads(data)
+            if callback is not None:
+                name = section if label is None else os.path.join(section, label)
+                callback('Loaded {0} ({1} of {2})'.format(name, index + 1, len(tasks)))
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    return changes, loaded_families
+
+
+################################################################################
+
+# The pools of worker processes forked from the web process, by name, with
+# the state of the database they were forked with
+forked_pools = {}
+forked_pools_lock = threading.Lock()
+
+# Whether this process is a worker of a forked pool
+forked_worker = False
+
+
+def init_forked_worker():
+    """
+    Set up a worker process of a forked pool.
+    """
+    global forked_worker
+    forked_worker = True
+    init_worker()
+
+
+def is_forked_worker():
+    """
+    Return ``True`` in a worker process of a forked pool, which cannot start
+    pools of its own.
+    """
+    return forked_worker
+
+
+def get_database_state(database):
+    """
+    Return a value identifying the loaded state of `database`, which changes
+    whenever a component is (re)loaded or another kinetics family is loaded.
+    """
+    families = database.kinetics.families
+    if isinstance(families, LazyFamilyRegistry):
+        loaded = len([label for label in families if families.is_loaded(label)])
+    else:
+        loaded = len(families)
+    components = ['thermo', 'transport', 'solvation', 'kinetics', 'statmech']
+    return tuple([database.get_version(component) for component in components]) + (loaded,)
+
+
+def retire_pool(pool):
+    """
+    Close the given `pool`, letting its workers finish any tasks still being
+    streamed from them, and join it in a background thread so that the
+    workers are reaped once they exit.
+    """
+    pool.close()
+    thread = threading.Thread(target=pool.join)
+    thread.setDaemon(True)
+    thread.start()
+
+
+def get_forked_pool(name, database, processes, families=False):
+    """
+    Return the pool of `processes` worker processes with the given `name`,
+    forking a new one if the loaded `database` has changed since the current
+    pool was made. If `families` is ``True``, every kinetics family is
+    loaded first, so that the workers inherit them.
+    """
+    with forked_pools_lock:
+        if families:
+            database.kinetics.families.values()
+        state = get_database_state(database)
+        pool, pool_state = forked_pools.get(name, (None, None))
+        if pool is None or pool_state != state:
+            if pool is not None:
+                retire_pool(pool)
+            pool = multiprocessing.Pool(processes, initializer=init_forked_worker)
+            forked_pools[name] = (pool, state)
+        return pool
+
+
+def generate_reactions_task(task):
+    """
+    Generate the reactions of one kinetics family in a worker process. The
+    `task` is a tuple of the family label, the reactants, the products and
+    the resonance flag. Returns the pickled list of ``(reaction,
+    kineticsList)`` pairs, where the sources and entries of the kinetics
+    estimates refer to depositories by label and to entries by index.
+    """
+    from rmgweb.database.tools import database, getKineticsList
+    label, reactants, products, resonance = task
+    results = []
+    for reaction in database.kinetics.generate_reactions_from_families(reactants, products, only_families=[label], resonance=resonance):
+        if reaction.kinetics is not None:
+            results.append((reaction, None))
+            continue
+        kineticsList = []
+        for kinetics, source, entry, isForward in getKineticsList(reaction):
+            if source is not None and not isinstance(source, str):
+                # A depository of the family
+                source = (source.label, entry.index)
+                entry = None
+            kineticsList.append([kinetics, source, entry, isForward])
+        results.append((reaction, kineticsList))
+    return cPickle.dumps(results, cPickle.HIGHEST_PROTOCOL)
+
+
+def generate_family_reactions(database, reactants, products, only_families, resonance, processes):
+    """
+    Generate the reactions of the given `reactants` (and `products`) from
+    the kinetics families of `database` (only those in `only_families`, if
+    given) in a pool of `processes` worker processes. Returns a list of
+    ``(reaction, kineticsList)`` pairs, as used by
+    :func:`rmgweb.database.tools.getReactionDataList`, in family order.
+    """
+    from rmgweb.database.tools import getEntryIndex
+    pool = get_forked_pool('reactions', database, processes, families=True)
+    labels = [label for label in database.kinetics.families.keys() if only_families is None or label in only_families]
+    tasks = [(label, reactants, products, resonance) for label in labels]
+    chunksize = max(1, int(math.ceil(len(tasks) / float(processes))))
+    results = []
+    for data in pool.map(generate_reactions_task, tasks, chunksize):
+        for reaction, kineticsList in cPickle.loads(data):
+            if kineticsList is not None:
+                for item in kineticsList:
+                    if isinstance(item[1], tuple):
+                        depository = database.get_kinetics_database('families', item[1][0])
+                        item[1:3] = [depository, getEntryIndex(depository).byIndex[item[1][1]]]
+            results.append((reaction, kineticsList))
+    return results
@@ -0,0 +1,399 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG Website - A Django-powered website for Reaction Mechanism Generator     #
+#                                                                             #
+# Copyright (c) 2011-2018 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+
+"""
+This module pre-renders the images of every molecule and group in the loaded
+RMG database into the image cache (see :mod:`rmgweb.main.images`), so that
+the first visitor to a library or group table does not wait for every
+structure in it to be drawn.
+
+The structures are collected from the entries of the thermo, transport,
+solvation, statmech and kinetics databases (of the kinetics families, only
+those already loaded), registered under the short identifiers used in their
+URLs and drawn in every image format by a pool of worker processes. Images
+already in the cache are skipped. This is normally done once per deploy by
+``manage.py prerenderimages``, outside the web processes; only if
+``PRERENDER_IMAGES`` is set do the web processes pre-render in the background
+after loading the database. The progress is written to a JSON status
+file at ``PRERENDER_STATUS_PATH`` shared by all web processes. A lock on the
+file next to it makes sure only one process pre-renders at a time, and a run
+is skipped if one has already finished for the same database and RMG-Py
+version.
+"""
+
+import errno
+import fcntl
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import traceback
+
+from rmgpy.data.base import Entry
+from rmgpy.molecule.group import Group
+from rmgpy.molecule.molecule import Molecule
+from rmgpy.reaction import Reaction
+from rmgpy.species import Species
+
+import rmgweb.settings
+from rmgweb.database.families import LazyFamilyRegistry
+from rmgweb.database.parallel import get_database_state, init_worker
+from rmgweb.main.images import draw_structure, get_image_cache, get_image_key, IMAGE_CONTENT_TYPES
+from rmgweb.main.tools import getStructureData, registerStructures
+
+# The background thread pre-rendering images in this process
+prerender_thread = None
+prerender_thread_lock = threading.Lock()
+
+
+def get_prerender_key(database):
+    """
+    Return a string identifying the images that pre-rendering the loaded
+    `database` would draw, made from the loaded versions of its components
+    and the RMG-Py version.
+    """
+    from rmgpy import __version__
+    return hashlib.sha1(repr((get_database_state(database), __version__))).hexdigest()
+
+
+def get_entry_databases(database):
+    """
+    Return the libraries, depositories and group trees of the loaded
+    `database` whose entries have structures to draw.
+    """
+    databases = []
+    attributes = [
+        ('thermo', ['depository', 'libraries', 'groups']),
+        ('transport', ['libraries', 'groups']),
+        ('solvation', ['libraries', 'groups']),
+        ('statmech', ['depository', 'libraries', 'groups']),
+        ('kinetics', ['libraries']),
+    ]
+    for component, names in attributes:
+        for name in names:
+            value = getattr(getattr(database, component), name, None)
+            if isinstance(value, dict):
+                databases.extend(value.values())
+            elif value is not None:
+                databases.append(value)
+
+    families = database.kinetics.families
+    for label in sorted(families.keys()):
+        if isinstance(families, LazyFamilyRegistry) and not families.is_loaded(label):
+            # Loading a family just to draw it is not worth the memory
+            continue
+        databases.extend(get_family_databases(families[label]))
+    return databases
+
+
+def get_family_databases(family):
+    """
+    Return the group tree, rules and depositories of the kinetics `family`.
+    """
+    return [family.groups, family.rules] + list(family.depositories)
+
+
+def add_structures(item, structures, seen, owned=None):
+    """
+    Add the molecules and groups in the given `item` (an entry, or the item
+    of one) to the `structures` dict, mapping their identifiers to the
+    ``(kind, identifier, adjlist)`` tuples of :func:`getStructureData`.
+    Every object visited is added to the `seen` set of ids, so that
+    structures shared between entries are only looked at once. If given,
+    the ids of the entries, species, molecules and groups are also added to
+    the `owned` set. If `structures` is ``None``, only `owned` is filled in.
+    """
+    if id(item) in seen:
+        return
+    seen.add(id(item))
+    if owned is not None and isinstance(item, (Entry, Species, Group, Molecule)):
+        owned.add(id(item))
+    if isinstance(item, Entry):
+        add_structures(item.item, structures, seen, owned)
+    elif isinstance(item, (list, tuple)):
+        for child in item:
+            add_structures(child, structures, seen, owned)
+    elif isinstance(item, Reaction):
+        for child in item.reactants + item.products:
+            add_structures(child, structures, seen, owned)
+    elif isinstance(item, Species):
+        # Only the first resonance structure is drawn on the website
+        if len(item.molecule) > 0:
+            add_structures(item.molecule[0], structures, seen, owned)
+    elif isinstance(item, (Group, Molecule)) and structures is not None:
+        data = getStructureData(item)
+        structures[data[1]] = data
+
+
+def collect_structures(database):
+    """
+    Return a list of the unique molecules and groups in the entries of the
+    loaded `database`, as ``(kind, identifier, adjlist)`` tuples (see
+    :func:`getStructureData`). Nothing is looked up in the web database;
+    :func:`registerStructures` gives the adjacency lists stored for the
+    identifiers, which the views drawing images by identifier use.
+    """
+    structures = {}
+    seen = set()
+    for entry_database in get_entry_databases(database):
+        add_structures(entry_database.entries.values(), structures, seen)
+    return [structures[identifier] for identifier in sorted(structures)]
+
+
+def collect_owned_structures(databases):
+    """
+    Return the set of ids of the entries, species, molecules and groups in
+    the entries of the given entry `databases`, whose markup is memoized
+    (see :func:`rmgweb.main.tools.setDatabaseStructures`). Unlike
+    :func:`collect_structures`, no identifiers are computed, so this is cheap
+    enough to run whenever the database is loaded.
+    """
+    owned = set()
+    seen = set()
+    for entry_database in databases:
+        add_structures(entry_database.entries.values(), None, seen, owned)
+    return owned
+
+
+def prerender_task(task):
+    """
+    Draw the images of one structure in every format into the image cache,
+    in a worker process. The `task` is a tuple of the kind of structure,
+    its identifier and its adjacency list. Returns the number of images
+    drawn and skipped, and a description of the error, if any.
+    """
+    kind, identifier, adjlist = task
+    cache = get_image_cache()
+    rendered = skipped = 0
+    try:
+        for format in sorted(IMAGE_CONTENT_TYPES):
+            key = get_image_key(kind, adjlist, format)
+            if cache.get_mtime(key, format) is not None:
+                skipped += 1
+                continue
+            data = draw_structure(kind, adjlist, format)
+            if data is None:
+                raise ValueError('Invalid adjacency list.')
+            cache.set(key, format, data)
+            rendered += 1
+    except Exception, e:
+        return rendered, skipped, '{0} {1}: {2!s}'.format(kind, identifier, e)
+    return rendered, skipped, None
+
+
+################################################################################
+
+def read_status(path):
+    """
+    Return the pre-rendering status saved at `path`, or an empty dict if
+    there is none.
+    """
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return {}
+
+
+def write_status(path, status):
+    """
+    Save the pre-rendering `status` to `path`. The file is replaced in a
+    single rename, so other processes never read a partial status.
+    """
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory)
+    except OSError, e:
+        if e.errno != errno.EEXIST:
+            raise
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.prerender')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(status, f)
+    os.rename(temp_path, path)
+
+
+def acquire_lock(path):
+    """
+    Return the open lock file of the pre-rendering status at `path`, locked
+    by this process, or ``None`` if another run holds the lock. Closing the
+    file releases the lock.
+    """
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory)
+    except OSError, e:
+        if e.errno != errno.EEXIST:
+            raise
+    f = open(path + '.lock', 'a')
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except IOError, e:
+        f.close()
+        if e.errno in (errno.EAGAIN, errno.EACCES):
+            return None
+        raise
+    return f
+
+
+def get_prerender_status():
+    """
+    Return the status of the latest pre-rendering run, as saved by
+    :func:`prerender_images`, with ``running`` set if it is still in
+    progress. A run whose process died without finishing is reported as
+    ``'interrupted'``.
+    """
+    path = rmgweb.settings.PRERENDER_STATUS_PATH
+    status = read_status(path)
+    lock = acquire_lock(path)
+    if lock is None:
+        status['running'] = True
+    else:
+        lock.close()
+        status['running'] = False
+        if status.get('state') in ('collecting', 'rendering'):
+            status['state'] = 'interrupted'
+    return status
+
+
+def prerender_images(database, processes, force=False, callback=None):
+    """
+    Draw the images of every molecule and group in the loaded `database`
+    into the image cache in a pool of `processes` worker processes, saving
+    the progress to ``PRERENDER_STATUS_PATH`` as it goes. If given,
+    `callback` is called with the status after each structure. Unless
+    `force` is set, nothing is drawn if a run has already finished for the
+    same database and RMG-Py version.
+
+    Returns the final status, or ``None`` if images are not cached or
+    another process is already pre-rendering them.
+    """
+    if get_image_cache() is None:
+        return None
+    path = rmgweb.settings.PRERENDER_STATUS_PATH
+    key = get_prerender_key(database)
+    lock = acquire_lock(path)
+    if lock is None:
+        return None
+    try:
+        status = read_status(path)
+        if not force and status.get('key') == key and status.get('state') == 'finished':
+            return status
+
+        status = {
+            'state': 'collecting',
+            'pid': os.getpid(),
+            'key': key,
+            'started': time.time(),
+            'finished': None,
+            'total': 0,
+            'done': 0,
+            'rendered': 0,
+            'skipped': 0,
+            'errors': 0,
+            'error': '',
+        }
+        write_status(path, status)
+        try:
+            # Draw the adjacency lists stored for the identifiers, so that the
+            # images are cached under the keys the views drawing them use
+            structures = registerStructures(collect_structures(database))
+            status['state'] = 'rendering'
+            status['total'] = len(structures)
+            write_status(path, status)
+            print 'Pre-rendering the images of {0} structures in process {1}'.format(len(structures), os.getpid())
+
+            written = time.time()
+            pool = multiprocessing.Pool(processes, initializer=init_worker)
+            try:
+                for rendered, skipped, error in pool.imap_unordered(prerender_task, structures, chunksize=16):
+                    status['done'] += 1
+                    status['rendered'] += rendered
+                    status['skipped'] += skipped
+                    if error is not None:
+                        status['errors'] += 1
+                        status['error'] = error
+                    # Saving the status after every structure would cost more than drawing it
+                    if time.time() - written > 1.0:
+                        write_status(path, status)
+                        written = time.time()
+                    if callback is not None:
+                        callback(status)
+                pool.close()
+            except:
+                pool.terminate()
+                raise
+            finally:
+                pool.join()
+        except Exception, e:
+            traceback.print_exc()
+            status['state'] = 'failed'
+            status['error'] = str(e)
+        else:
+            status['state'] = 'finished'
+        status['finished'] = time.time()
+        write_status(path, status)
+        return status
+    finally:
+        lock.close()
+
+
+def _prerender(database, force):
+    """
+    Run :func:`prerender_images` on the loaded `database` and close the
+    database connection used. This is the target of the background thread.
+    """
+    from django.db import connection
+
+    try:
+        prerender_images(database, rmgweb.settings.PRERENDER_PROCESSES, force)
+    except Exception:
+        traceback.print_exc()
+    finally:
+        connection.close()
+
+
+def start_prerender(database, force=False):
+    """
+    Pre-render the images of the structures in the loaded `database` with
+    :func:`prerender_images` in a background thread, using
+    ``PRERENDER_PROCESSES`` worker processes. Returns ``False`` if this
+    process is already doing so.
+    """
+    global prerender_thread
+    with prerender_thread_lock:
+        if prerender_thread is not None and prerender_thread.is_alive():
+            return False
+        prerender_thread = threading.Thread(target=_prerender, args=(database, force))
+        prerender_thread.setDaemon(True)
+        prerender_thread.start()
+    return True
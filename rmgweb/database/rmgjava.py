@@ -0,0 +1,466 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG Website - A Django-powered website for Reaction Mechanism Generator     #
+#                                                                             #
+# Copyright (c) 2011-2018 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+
+"""
+This module is the client of the RMG-Java PopulateReactions service, which
+the database app queries for kinetics estimated by RMG-Java.
+
+The service speaks one of two protocols over TCP:
+
+* ``'legacy'``, the protocol of the original RMG-Java server, in which each
+  request is sent on a new connection and the response is read until the
+  server closes it. Since a connection closed early cannot be told apart
+  from a complete response, responses missing the parts that are parsed
+  (see :func:`is_complete_response`) are treated as failed requests.
+* ``'framed'``, in which requests and responses are each preceded by their
+  length as a 4-byte big-endian integer, so that a connection can be kept
+  open and reused for many requests.
+
+:class:`RMGJavaClient` keeps a pool of persistent connections when using the
+framed protocol, retries requests the server could not take, and can send
+many requests at once from a pool of threads. :class:`ReplayServer` stands
+in for the service by replaying responses recorded by the client (see
+``RMG_JAVA_RECORD_PATH``), so that the client can be tested and benchmarked
+without RMG-Java.
+"""
+
+import errno
+import hashlib
+import os
+import Queue
+import SocketServer
+import socket
+import struct
+import sys
+import threading
+import time
+from multiprocessing.pool import ThreadPool
+
+import rmgweb.settings
+
+# The size of the chunks in which responses are read from the socket
+CHUNK_SIZE = 65536
+
+# The format of the length prefix of the framed protocol
+FRAME_HEADER = struct.Struct('!I')
+
+
+class RMGJavaError(Exception):
+    """
+    An exception raised when the RMG-Java service cannot be queried.
+    """
+    pass
+
+
+class RMGJavaClient(object):
+    """
+    A client of the RMG-Java PopulateReactions service. The attributes are:
+
+    =============== ============================================================
+    Attribute       Description
+    =============== ============================================================
+    `host`          The host name of the service
+    `port`          The port of the service
+    `protocol`      Either ``'legacy'`` or ``'framed'``
+    `pool_size`     The maximum number of connections (and threads) used at once
+    `timeout`       The number of seconds to wait for the service on a socket
+    `retries`       The number of times a failed request is retried
+    `retry_delay`   The number of seconds before the first retry, doubled for each one after
+    `record_path`   The directory that requests and responses are recorded to, or ``None``
+    `connections`   The idle persistent connections (framed protocol only)
+    =============== ============================================================
+
+    """
+
+    def __init__(self, host='localhost', port=5000, protocol='legacy', pool_size=4, timeout=10.0,
+                 retries=3, retry_delay=0.5, record_path=None):
+        if protocol not in ['legacy', 'framed']:
+            raise ValueError('Invalid RMG-Java protocol "{0}".'.format(protocol))
+        self.host = host
+        self.port = port
+        self.protocol = protocol
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.record_path = record_path
+        self.reset()
+
+    def reset(self):
+        """
+        Forget the idle connections and the thread pool, e.g. in a process
+        forked from the one that made them.
+        """
+        self.pid = os.getpid()
+        self.connections = Queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(self.pool_size)
+        self.threads = None
+        self.lock = threading.Lock()
+
+    def close(self):
+        """
+        Close the idle connections and stop the thread pool.
+        """
+        while True:
+            try:
+                connection = self.connections.get_nowait()
+            except Queue.Empty:
+                break
+            connection.close()
+        if self.threads is not None:
+            self.threads.close()
+            self.threads = None
+
+    def query(self, request):
+        """
+        Send the given `request` (a PopulateReactions input file) to the
+        service and return its response. Requests that fail because the
+        service is busy or unreachable are retried, and an
+        :class:`RMGJavaError` is raised if they still fail.
+        """
+        if self.pid != os.getpid():
+            self.reset()
+        delay = self.retry_delay
+        for attempt in range(self.retries + 1):
+            try:
+                with self.slots:
+                    response = self._send(request)
+                break
+            except (socket.error, RMGJavaError), e:
+                if attempt == self.retries:
+                    raise RMGJavaError('Unable to query RMG-Java at {0}:{1:d} ({2}).'.format(self.host, self.port, e))
+                time.sleep(delay)
+                delay *= 2
+        if self.record_path is not None:
+            self.record(request, response)
+        return response
+
+    def query_async(self, request, callback=None):
+        """
+        Send the given `request` to the service from the thread pool, and
+        return the :class:`multiprocessing.pool.AsyncResult` giving the
+        response (or raising an :class:`RMGJavaError`).
+        """
+        if self.pid != os.getpid():
+            self.reset()
+        with self.lock:
+            if self.threads is None:
+                self.threads = ThreadPool(self.pool_size)
+        return self.threads.apply_async(self.query, (request,), callback=callback)
+
+    def query_many(self, requests):
+        """
+        Send all of the given `requests` to the service at once, using up to
+        `pool_size` connections, and return the list of responses in the same
+        order. A response is ``None`` if its request failed.
+        """
+        results = [self.query_async(request) for request in requests]
+        responses = []
+        for result in results:
+            try:
+                responses.append(result.get())
+            except RMGJavaError, e:
+                print >> sys.stderr, str(e)
+                responses.append(None)
+        return responses
+
+    def _send(self, request):
+        """
+        Send the given `request` on a connection and return the response.
+        With the framed protocol, pooled connections that turn out to have
+        been closed are discarded, and the request is sent again on another.
+        """
+        if self.protocol == 'legacy':
+            connection = self._connect()
+            try:
+                connection.sendall(request)
+                response = read_until_closed(connection)
+            finally:
+                connection.close()
+            if not is_complete_response(response):
+                raise RMGJavaError('Incomplete response from RMG-Java ({0:d} bytes).'.format(len(response)))
+            return response
+
+        while True:
+            try:
+                connection = self.connections.get_nowait()
+                pooled = True
+            except Queue.Empty:
+                connection = self._connect()
+                pooled = False
+            try:
+                write_frame(connection, request)
+                response = read_frame(connection)
+                if response is None:
+                    raise RMGJavaError('Connection closed by RMG-Java before responding.')
+            except (socket.error, RMGJavaError):
+                # The state of the connection is unknown, so don't reuse it
+                connection.close()
+                if pooled:
+                    # Idle connections may have been closed by the service;
+                    # try the next one, or a new connection, right away
+                    continue
+                raise
+            except:
+                connection.close()
+                raise
+            # Only connections that delivered a full response go back in the pool
+            self.connections.put(connection)
+            return response
+
+    def _connect(self):
+        """
+        Return a new connection to the service.
+        """
+        connection = socket.create_connection((self.host, self.port), self.timeout)
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return connection
+
+    def record(self, request, response):
+        """
+        Save the given `request` and its `response` in `record_path`, for
+        replaying by a :class:`ReplayServer`.
+        """
+        if not os.path.exists(self.record_path):
+            try:
+                os.makedirs(self.record_path)
+            except OSError, e:
+                if e.errno != errno.EEXIST:
+                    raise
+        key = get_request_key(request)
+        for extension, content in [('request', request), ('response', response)]:
+            path = os.path.join(self.record_path, '{0}.{1}'.format(key, extension))
+            with open(path + '.tmp', 'wb') as f:
+                f.write(content)
+            os.rename(path + '.tmp', path)
+
+
+def read_until_closed(connection):
+    """
+    Return everything read from the socket `connection` until the other end
+    closes it.
+    """
+    chunks = []
+    while True:
+        chunk = connection.recv(CHUNK_SIZE)
+        if not chunk:
+            return ''.join(chunks)
+        chunks.append(chunk)
+
+
+def is_complete_response(response):
+    """
+    Return ``True`` if the `response` to a PopulateReactions job read over
+    the legacy protocol is complete, i.e. it is made of the species
+    dictionary and the list of reactions parsed by
+    :func:`rmgweb.database.tools.parseRMGJavaResponse`, and its last reaction
+    line has all of the fields of the kinetics. Empty responses, and those
+    cut off before or in the middle of a line, are not.
+    """
+    sections = response.split('\n\n\n', 1)
+    if len(sections) < 2:
+        return False
+    sections = sections[1].split('\n\n')
+    if len(sections) < 2:
+        return False
+    last = sections[1].split('\n')[-1]
+    # The reaction, A, n and Ea, and any comments, separated by tabs
+    return last == '' or len(last.split('\t')) >= 4
+
+
+def read_exactly(connection, size):
+    """
+    Return the next `size` bytes read from the socket `connection`, or
+    ``None`` if it is closed before any are read.
+    """
+    chunks = []
+    remaining = size
+    while remaining > 0:
+        chunk = connection.recv(min(remaining, CHUNK_SIZE))
+        if not chunk:
+            if remaining == size:
+                return None
+            raise RMGJavaError('Connection closed in the middle of a message.')
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return ''.join(chunks)
+
+
+def read_frame(connection):
+    """
+    Return the next message of the framed protocol read from the socket
+    `connection`, or ``None`` if it is closed before a message starts.
+    """
+    header = read_exactly(connection, FRAME_HEADER.size)
+    if header is None:
+        return None
+    length, = FRAME_HEADER.unpack(header)
+    if length == 0:
+        return ''
+    message = read_exactly(connection, length)
+    if message is None:
+        raise RMGJavaError('Connection closed in the middle of a message.')
+    return message
+
+
+def write_frame(connection, message):
+    """
+    Send the given `message` on the socket `connection` using the framed
+    protocol.
+    """
+    connection.sendall(FRAME_HEADER.pack(len(message)) + message)
+
+
+def get_request_key(request):
+    """
+    Return the key under which the response to `request` is recorded.
+    """
+    return hashlib.sha1(request).hexdigest()
+
+################################################################################
+
+# The client used by the web process, made on first use from the settings
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """
+    Return the :class:`RMGJavaClient` configured by the ``RMG_JAVA_*``
+    settings, shared by all threads of the process.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = RMGJavaClient(
+                host=rmgweb.settings.RMG_JAVA_HOST,
+                port=rmgweb.settings.RMG_JAVA_PORT,
+                protocol=rmgweb.settings.RMG_JAVA_PROTOCOL,
+                pool_size=rmgweb.settings.RMG_JAVA_POOL_SIZE,
+                timeout=rmgweb.settings.RMG_JAVA_TIMEOUT,
+                retries=rmgweb.settings.RMG_JAVA_RETRIES,
+                retry_delay=rmgweb.settings.RMG_JAVA_RETRY_DELAY,
+                record_path=rmgweb.settings.RMG_JAVA_RECORD_PATH,
+            )
+        return _client
+
+################################################################################
+
+class ReplayServer(SocketServer.ThreadingTCPServer):
+    """
+    A stand-in for the RMG-Java service that answers each request with the
+    response recorded for it in `path` by :meth:`RMGJavaClient.record`, or
+    with `missing` if there is none. Responses can also be added directly to
+    the `responses` dict, keyed by request. Speaks the given `protocol`. Use
+    port 0 to pick a free port, available afterwards as `port`.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, path=None, host='localhost', port=0, protocol='legacy', missing='', delay=0.0):
+        if protocol not in ['legacy', 'framed']:
+            raise ValueError('Invalid RMG-Java protocol "{0}".'.format(protocol))
+        self.path = path
+        self.protocol = protocol
+        self.missing = missing
+        self.delay = delay
+        self.responses = {}
+        self.requests = 0
+        self.connections = 0
+        self.counter_lock = threading.Lock()
+        SocketServer.ThreadingTCPServer.__init__(self, (host, port), ReplayHandler)
+        self.port = self.server_address[1]
+        self.thread = None
+
+    def get_response(self, request):
+        """
+        Return the recorded response to the given `request`.
+        """
+        with self.counter_lock:
+            self.requests += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if request in self.responses:
+            return self.responses[request]
+        if self.path is not None:
+            path = os.path.join(self.path, get_request_key(request) + '.response')
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    return f.read()
+        return self.missing
+
+    def start(self):
+        """
+        Serve requests in a background thread.
+        """
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.setDaemon(True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop serving requests and close the listening socket.
+        """
+        self.shutdown()
+        self.server_close()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+
+class ReplayHandler(SocketServer.BaseRequestHandler):
+    """
+    Handles one connection to a :class:`ReplayServer`.
+    """
+
+    def handle(self):
+        server = self.server
+        with server.counter_lock:
+            server.connections += 1
+        if server.protocol == 'legacy':
+            # The request is a PopulateReactions input file, which ends with END
+            chunks = []
+            while True:
+                chunk = self.request.recv(CHUNK_SIZE)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                if ''.join(chunks[-2:]).rstrip().endswith('END'):
+                    break
+            self.request.sendall(server.get_response(''.join(chunks)))
+        else:
+            while True:
+                try:
+                    request = read_frame(self.request)
+                except (socket.error, RMGJavaError):
+                    break
+                if request is None:
+                    break
+                write_frame(self.request, server.get_response(request))
@@ -33,9 +33,17 @@ This module contains additional classes and functions used by the database
 app that don't belong to any other module.
 """
 
-import socket
+import copy
+import cPickle
+import hashlib
+import subprocess
 import sys
 import os
+import tempfile
+import threading
+import time
+import traceback
+import weakref
 import rmgweb.settings
 import pybel
 import openbabel as ob
@@ -48,20 +56,41 @@ from rmgpy.molecule.molecule import Molecule
 from rmgpy.species import Species
 from rmgpy.reaction import Reaction, same_species_lists
 from rmgpy.data.base import Entry
-from rmgpy.data.kinetics import TemplateReaction, DepositoryReaction
+from rmgpy.data.kinetics import TemplateReaction, DepositoryReaction, LibraryReaction
 from rmgweb.main.tools import *
 
-from rmgpy.data.thermo import ThermoDatabase
-from rmgpy.data.kinetics import KineticsDatabase
+from rmgpy.data.thermo import ThermoDatabase, ThermoLibrary
+from rmgpy.data.kinetics import KineticsDatabase, KineticsFamily, KineticsLibrary
 from rmgpy.data.transport import TransportDatabase
 from rmgpy.data.rmg import SolvationDatabase
 from rmgpy.data.rmg import RMGDatabase
 from rmgpy.data.rmg import StatmechDatabase
 
+from rmgweb.database.cache import LRUCache
+from rmgweb.database.families import LazyFamilyRegistry
+from rmgweb.database.parallel import generate_family_reactions, is_forked_worker, load_sections
+from rmgweb.database.prerender import collect_owned_structures, get_entry_databases, get_family_databases, \
+    get_prerender_key, start_prerender
+from rmgweb.database.rmgjava import RMGJavaError, get_client as getRMGJavaClient
+from rmgweb.database.watcher import DatabaseWatcher
+
 
 class RMGWebDatabase(object):
     """Wrapper class for RMGDatabase that provides loading functionality."""
 
+    # The directories of the RMG database that are loaded as a unit, relative to DATABASE_PATH
+    component_dirs = [
+        os.path.join('thermo', 'depository'),
+        os.path.join('thermo', 'libraries'),
+        os.path.join('thermo', 'groups'),
+        os.path.join('transport', 'libraries'),
+        os.path.join('transport', 'groups'),
+        'solvation',
+        os.path.join('kinetics', 'libraries'),
+        os.path.join('kinetics', 'families'),
+        'statmech',
+    ]
+
     def __init__(self):
         self.database = RMGDatabase()
         self.database.kinetics = KineticsDatabase()
@@ -71,6 +100,22 @@ class RMGWebDatabase(object):
         self.database.solvation = SolvationDatabase()
         self.database.loadForbiddenStructures(os.path.join(rmgweb.settings.DATABASE_PATH, 'forbiddenStructures.py'))
         self.timestamps = {}
+        self.versions = {}
+        self.loaded_dirs = set()
+        self.snapshot_key = None
+        self.snapshot_timestamps = None
+        self.restore_attempted = False
+        self.prerender_key = None
+        self.load_lock = threading.RLock()
+        self.reload_lock = threading.Lock()
+        self.reload_thread = None
+        self.progress = {'state': '', 'component': '', 'section': '', 'step': '', 'started': None, 'finished': None, 'error': ''}
+        if rmgweb.settings.DATABASE_WATCHER:
+            self.watcher = DatabaseWatcher(mode=rmgweb.settings.DATABASE_WATCHER,
+                                           debounce=rmgweb.settings.DATABASE_WATCHER_DEBOUNCE,
+                                           interval=rmgweb.settings.DATABASE_WATCHER_INTERVAL)
+        else:
+            self.watcher = None
 
     @property
     def kinetics(self):
@@ -109,9 +154,35 @@ class RMGWebDatabase(object):
         Walk the directory tree from dirpath, calling reset_timestamp(file) on each file.
         """
         print "Resetting 'last loaded' timestamps for {0} in process {1}".format(dirpath, os.getpid())
+        prefix = dirpath.rstrip(os.sep) + os.sep
+        for path in [path for path in self.timestamps if path.startswith(prefix)]:
+            del self.timestamps[path]
+        self.versions.pop(os.path.relpath(dirpath, rmgweb.settings.DATABASE_PATH).split(os.sep)[0], None)
         for root, dirs, files in os.walk(dirpath):
             for name in files:
                 self.reset_timestamp(os.path.join(root, name))
+        self.loaded_dirs.add(dirpath)
+        if self.watcher is not None:
+            self.watcher.watch(dirpath)
+        # The structures shown on the website may have changed
+        invalidateStructureMarkup()
+
+    def get_version(self, component):
+        """
+        Return a string identifying the loaded version of the given
+        `component` of the database, made from the modification times of its
+        files when they were loaded. It is the same in every process that
+        has loaded the same files.
+        """
+        version = self.versions.get(component)
+        if version is None:
+            prefix = os.path.join(rmgweb.settings.DATABASE_PATH, component) + os.sep
+            sha1 = hashlib.sha1()
+            for path in sorted([path for path in self.timestamps if path.startswith(prefix)]):
+                sha1.update('{0}\0{1!r}\0'.format(os.path.relpath(path, prefix), self.timestamps[path]))
+            version = sha1.hexdigest()
+            self.versions[component] = version
+        return version
 
     def is_file_modified(self, path):
         """
@@ -140,7 +211,12 @@ class RMGWebDatabase(object):
     def is_dir_modified(self, dirpath):
         """
         Returns True if anything in the directory at dirpath has been modified since reset_dir_timestamps(dirpath).
+
+        Once the directory is being watched for changes this is a set lookup;
+        otherwise every file in the directory is checked.
         """
+        if self.watcher is not None and self.watcher.is_watching(dirpath):
+            return self.watcher.is_dirty(dirpath)
         to_check = set([path for path in self.timestamps if path.startswith(dirpath)])
         for root, dirs, files in os.walk(dirpath):
             for name in files:
@@ -155,90 +231,566 @@ class RMGWebDatabase(object):
         # Passed all tests.
         return False
 
+    def get_modified_files(self, dirpath):
+        """
+        Return the set of files in the directory at dirpath that have been
+        added, modified or removed since reset_dir_timestamps(dirpath).
+        """
+        if self.watcher is not None and self.watcher.is_watching(dirpath):
+            return self.watcher.changed_files(dirpath)
+        prefix = dirpath.rstrip(os.sep) + os.sep
+        modified = set([path for path in self.timestamps if path.startswith(prefix) and self.is_file_modified(path)])
+        for root, dirs, files in os.walk(dirpath):
+            for name in files:
+                path = os.path.join(root, name)
+                if path not in self.timestamps:
+                    modified.add(path)
+        return modified
+
+    def get_modified_labels(self, dirpath, loaded, get_label):
+        """
+        Return the set of labels of the items loaded from the directory at
+        `dirpath` whose files have been modified, so that only those items
+        need to be reloaded. `loaded` is the dictionary of items loaded from
+        the directory and `get_label` maps a file path relative to `dirpath`
+        to the label of the item it belongs to, or ``None``.
+
+        Returns ``None`` if the whole directory must be reloaded instead,
+        i.e. if it was never loaded or a file was added, removed or changed
+        that does not belong to an already loaded item.
+        """
+        if dirpath not in self.loaded_dirs:
+            return None
+        labels = set()
+        for path in self.get_modified_files(dirpath):
+            if os.path.isdir(path):
+                continue
+            exists = os.path.exists(path)
+            if not exists and path not in self.timestamps:
+                # A temporary file that was created and removed again
+                continue
+            label = get_label(os.path.relpath(path, dirpath))
+            if not exists or label is None or label not in loaded:
+                return None
+            labels.add(label)
+        return labels
+
+    def read_family(self, label, kinetics=None):
+        """
+        Load the kinetics family with the given `label`, including all of its
+        depositories, from the RMG database files. The family is not trained.
+        """
+        kinetics = kinetics or self.database.kinetics
+        dirpath = os.path.join(rmgweb.settings.DATABASE_PATH, 'kinetics', 'families')
+        family = KineticsFamily(label=label)
+        family.load(os.path.join(dirpath, label), kinetics.local_context, kinetics.global_context,
+                    depositoryLabels='all')
+        return family
+
+    def all_families_loaded(self):
+        """
+        Return ``True`` unless kinetics families are loaded lazily and some
+        of them have not been loaded yet.
+        """
+        families = self.database.kinetics.families
+        if isinstance(families, LazyFamilyRegistry):
+            return all([families.is_loaded(label) for label in dict.keys(families)])
+        return True
+
+    def load_family(self, label):
+        """
+        Load and train the kinetics family with the given `label`. This is
+        the loader of the lazy family registry.
+        """
+        # Make sure to load the entire thermo database prior to adding training values to the rules
+        self.load('thermo', '')
+        print 'Loading kinetics family {0} in process {1}'.format(label, os.getpid())
+        family = self.read_family(label)
+        self.train_family(family)
+        # Memoize the markup of its structures, like those of the rest of the database
+        addDatabaseStructures(collect_owned_structures(get_family_databases(family)))
+        return family
+
+    def train_family(self, family):
+        """
+        Add rate rules to the given kinetics `family` from its training set and
+        fill in the remaining rules by averaging. The thermo database must be
+        loaded first.
+        """
+        oldentries = len(family.rules.entries)
+        family.addKineticsRulesFromTrainingSet(thermoDatabase=self.database.thermo)
+        newentries = len(family.rules.entries)
+        if newentries != oldentries:
+            print '{0} new entries added to {1} family after adding rules from training set.'.format(
+                newentries - oldentries, family.label)
+        # Filling in rate rules in kinetics families by averaging...
+        family.fillKineticsRulesByAveragingUp()
+
+    ################################################################################
+
+    def get_snapshot_key(self):
+        """
+        Return a string identifying the current state of the RMG-database
+        files, made from the git commit of the RMG-database repository and a
+        hash of the modification times of every file in the database. A
+        snapshot is only valid while this key is unchanged.
+        """
+        try:
+            commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                                             cwd=rmgweb.settings.DATABASE_PATH, stderr=subprocess.STDOUT).strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = 'unknown'
+        mtimes = hashlib.sha1()
+        for root, dirs, files in os.walk(rmgweb.settings.DATABASE_PATH):
+            dirs.sort()
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                try:
+                    mtime = os.stat(path).st_mtime
+                except OSError:
+                    # File was removed while walking the tree
+                    continue
+                mtimes.update('{0}\t{1!r}\n'.format(path, mtime))
+        return '{0}-{1}'.format(commit, mtimes.hexdigest())
+
+    def save_snapshot(self, path=None, key=None):
+        """
+        Write the currently loaded database to a binary snapshot at `path`,
+        which defaults to ``DATABASE_SNAPSHOT_PATH``. The snapshot is written
+        to a temporary file first and then renamed, so processes reading the
+        snapshot concurrently never see a partially written file. Every
+        kinetics family is loaded and trained first, even if families are
+        loaded lazily, so that restoring the snapshot never has to.
+        """
+        path = path or rmgweb.settings.DATABASE_SNAPSHOT_PATH
+        key = key or self.get_snapshot_key()
+        families = self.database.kinetics.families
+        if isinstance(families, LazyFamilyRegistry):
+            families.load_all()
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        print "Writing database snapshot to {0} in process {1}".format(path, os.getpid())
+        # The entry trees are deep enough to exceed the default recursion limit when pickled
+        recursion_limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(recursion_limit, 10000))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.snapshot')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                # The key is written separately so it can be checked without unpickling the database
+                cPickle.dump(key, f, cPickle.HIGHEST_PROTOCOL)
+                cPickle.dump((self.database, self.timestamps), f, cPickle.HIGHEST_PROTOCOL)
+            os.rename(temp_path, path)
+        except:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        finally:
+            sys.setrecursionlimit(recursion_limit)
+        self.snapshot_key = key
+        self.snapshot_timestamps = dict(self.timestamps)
+
+    def update_snapshot(self, path=None):
+        """
+        Rewrite the snapshot at `path`, which defaults to
+        ``DATABASE_SNAPSHOT_PATH``, if the database files have changed since
+        it was saved or restored. The snapshot key is only recomputed if any
+        files have been reloaded since then. Returns ``True`` if the snapshot
+        was written.
+        """
+        path = path or rmgweb.settings.DATABASE_SNAPSHOT_PATH
+        if self.timestamps == self.snapshot_timestamps:
+            return False
+        key = self.get_snapshot_key()
+        if key == self.snapshot_key:
+            self.snapshot_timestamps = dict(self.timestamps)
+            return False
+        self.set_progress('Writing database snapshot')
+        self.save_snapshot(path, key)
+        return True
+
+    def read_snapshot_key(self, path=None):
+        """
+        Return the key that the snapshot at `path` was written with, or
+        ``None`` if there is no readable snapshot.
+        """
+        path = path or rmgweb.settings.DATABASE_SNAPSHOT_PATH
+        try:
+            with open(path, 'rb') as f:
+                return cPickle.load(f)
+        except (IOError, EOFError, cPickle.UnpicklingError):
+            return None
+
+    def restore_snapshot(self, path=None):
+        """
+        Replace the loaded database with the snapshot at `path`, if its key
+        matches the current state of the database files. Returns ``True`` if
+        the snapshot was restored and ``False`` otherwise.
+        """
+        path = path or rmgweb.settings.DATABASE_SNAPSHOT_PATH
+        self.restore_attempted = True
+        if not path or not os.path.isfile(path):
+            return False
+        key = self.get_snapshot_key()
+        try:
+            with open(path, 'rb') as f:
+                if cPickle.load(f) != key:
+                    print "Database snapshot {0} is out of date; loading from source.".format(path)
+                    return False
+                database, timestamps = cPickle.load(f)
+        except Exception, e:
+            print "Unable to restore database snapshot {0}: {1!s}".format(path, e)
+            return False
+        print "Restored database snapshot from {0} in process {1}".format(path, os.getpid())
+        # Update the existing RMGDatabase in place, since RMG-Py keeps a module
+        # level reference to it (used e.g. by getFamilyLibraryObject)
+        self.database.__dict__.update(database.__dict__)
+        self.timestamps = timestamps
+        self.versions = {}
+        self.snapshot_key = key
+        self.snapshot_timestamps = dict(timestamps)
+        invalidateStructureMarkup()
+        if isinstance(self.database.kinetics.families, LazyFamilyRegistry):
+            self.database.kinetics.families.loader = self.load_family
+        # Find the directories that were loaded when the snapshot was written
+        self.loaded_dirs = set()
+        for dirpath in self.component_dirs:
+            dirpath = os.path.join(rmgweb.settings.DATABASE_PATH, dirpath)
+            prefix = dirpath.rstrip(os.sep) + os.sep
+            if any(path.startswith(prefix) for path in timestamps):
+                self.loaded_dirs.add(dirpath)
+                if self.watcher is not None:
+                    self.watcher.watch(dirpath)
+        return True
+
     ################################################################################
 
+    def get_dirpaths(self, component='', section=''):
+        """
+        Return the paths of the directories that are loaded for the given
+        `component` and `section` of the RMG database.
+        """
+        dirpaths = []
+        for path in self.component_dirs:
+            parts = path.split(os.sep)
+            if component in ['', parts[0]] and (section == '' or len(parts) == 1 or section == parts[1]):
+                dirpaths.append(os.path.join(rmgweb.settings.DATABASE_PATH, path))
+        return dirpaths
+
+    def set_progress(self, step):
+        """
+        Record the current step of loading the database in `progress`.
+        """
+        print '{0} in process {1}'.format(step, os.getpid())
+        self.progress['step'] = step
+
+    def is_reloading(self):
+        """
+        Return ``True`` if a background reload started by
+        :meth:`start_reload` is still running.
+        """
+        return self.reload_thread is not None and self.reload_thread.is_alive()
+
+    def start_reload(self, component='', section=''):
+        """
+        Reload the requested `component` of the RMG database in a background
+        thread. Requests continue to be served from the current copy of the
+        database until each reloaded component is complete and swapped in.
+        Returns ``False`` if a reload is already running.
+        """
+        with self.reload_lock:
+            if self.is_reloading():
+                return False
+            self.progress = {
+                'state': 'running',
+                'component': component,
+                'section': section,
+                'step': '',
+                'started': time.time(),
+                'finished': None,
+                'error': '',
+            }
+            self.reload_thread = threading.Thread(target=self._reload, args=(component, section))
+            self.reload_thread.setDaemon(True)
+            self.reload_thread.start()
+        return True
+
+    def _reload(self, component, section):
+        """
+        Run :meth:`load` and record its outcome in `progress`. This is the
+        target of the background reload thread.
+        """
+        try:
+            self.load(component, section)
+        except Exception, e:
+            traceback.print_exc()
+            self.progress['state'] = 'failed'
+            self.progress['error'] = str(e)
+        else:
+            self.progress['state'] = 'finished'
+        self.progress['finished'] = time.time()
+
     def load(self, component='', section=''):
         """
         Load the requested `component` of the RMG database if modified since last loaded.
+
+        Where possible only the modified parts are reloaded: a single thermo
+        or kinetics library, or a single kinetics family (which is then
+        retrained). Otherwise the whole section is reloaded.
+
+        Each component is loaded into a copy of the current component, which
+        then replaces it in a single assignment, so other threads never see a
+        partially loaded component. The sections being loaded get new
+        containers in the copy, and components that RMG-Py loads into
+        existing objects (solvation and statmech) are loaded into new ones,
+        so nothing shared with the live component is changed. If another thread is already loading the
+        database, this returns immediately as long as the requested parts
+        have been loaded before. With ``DATABASE_BACKGROUND_RELOAD`` set,
+        changes to parts that have been loaded before are always picked up
+        by a background reload (see :meth:`start_reload`) instead.
+
+        The first call in a process tries to restore the database from the
+        snapshot at ``DATABASE_SNAPSHOT_PATH``. After a full load (empty
+        `component`), the snapshot is rewritten if the database has changed,
+        unless kinetics families are loaded lazily and some are not loaded.
+        The markup of the structures in the loaded database is then memoized
+        and, only with ``PRERENDER_IMAGES`` set, their images drawn in the
+        background (see :mod:`rmgweb.database.prerender`).
         """
+        dirpaths = self.get_dirpaths(component, section)
+        loaded = all([dirpath in self.loaded_dirs for dirpath in dirpaths])
+        if (loaded and rmgweb.settings.DATABASE_BACKGROUND_RELOAD
+                and threading.current_thread() is not self.reload_thread):
+            # Keep serving the current copy and pick up any changes in the background
+            if any([self.is_dir_modified(dirpath) for dirpath in dirpaths]):
+                self.start_reload(component, section)
+            return
+        if not self.load_lock.acquire(False):
+            if loaded:
+                return
+            self.load_lock.acquire()
+        try:
+            self._load(component, section)
+        finally:
+            self.load_lock.release()
+
+    def load_parallel(self, dirpaths, processes):
+        """
+        Load the directories at `dirpaths` in a pool of `processes` worker
+        processes, and swap the loaded components in. Each kinetics family is
+        loaded by a separate worker (unless families are loaded lazily), and
+        then trained here, so the thermo database is loaded as well if needed.
+        """
+        families_dirpath = os.path.join(rmgweb.settings.DATABASE_PATH, 'kinetics', 'families')
+        lazy = rmgweb.settings.DATABASE_LAZY_FAMILIES
+        if families_dirpath in dirpaths and not lazy:
+            dirpaths = dirpaths + [dirpath for dirpath in self.get_dirpaths('thermo')
+                                   if dirpath not in self.loaded_dirs and dirpath not in dirpaths]
+        self.set_progress('Loading {0} database directories in {1} processes'.format(len(dirpaths), processes))
+        sections = [os.path.relpath(dirpath, rmgweb.settings.DATABASE_PATH) for dirpath in dirpaths]
+        changes, families = load_sections(rmgweb.settings.DATABASE_PATH, sections, processes,
+                                          families=not lazy, callback=self.set_progress)
+
+        components = {}
+        for section in sections:
+            name = section.split(os.sep)[0]
+            if name not in components:
+                components[name] = copy.copy(getattr(self.database, name))
+            components[name].__dict__.update(changes.get(section, {}))
+        if 'thermo' in components:
+            sort_thermo_libraries(components['thermo'])
+        if families_dirpath in dirpaths:
+            if lazy:
+                components['kinetics'].families = LazyFamilyRegistry(families_dirpath, self.load_family)
+            else:
+                components['kinetics'].families = families
+        for dirpath in dirpaths:
+            self.reset_dir_timestamps(dirpath)
+
+        # Swap in the thermo database before training the kinetics families
+        for name in ['thermo', 'transport', 'solvation', 'statmech']:
+            if name in components:
+                setattr(self.database, name, components[name])
+        labels = sorted(families)
+        for index, label in enumerate(labels):
+            self.set_progress('Training kinetics family {0} ({1} of {2})'.format(label, index + 1, len(labels)))
+            self.train_family(families[label])
+        if 'kinetics' in components:
+            self.database.kinetics = components['kinetics']
+
+    def _load(self, component, section):
+        """
+        Load the requested `component` of the RMG database. The caller must
+        hold `load_lock`.
+        """
+        snapshot_path = rmgweb.settings.DATABASE_SNAPSHOT_PATH
+        if snapshot_path and not self.restore_attempted:
+            self.set_progress('Restoring database snapshot')
+            self.restore_snapshot(snapshot_path)
+
+        processes = rmgweb.settings.DATABASE_LOAD_PROCESSES
+        if processes > 1:
+            dirpaths = [dirpath for dirpath in self.get_dirpaths(component, section) if dirpath not in self.loaded_dirs]
+            families_dirpath = os.path.join(rmgweb.settings.DATABASE_PATH, 'kinetics', 'families')
+            if len(dirpaths) > 1 or (families_dirpath in dirpaths and not rmgweb.settings.DATABASE_LAZY_FAMILIES):
+                self.load_parallel(dirpaths, processes)
+
         if component in ['thermo', '']:
+            thermo = copy.copy(self.database.thermo)
+            modified = False
             if section in ['depository', '']:
                 dirpath = os.path.join(rmgweb.settings.DATABASE_PATH, 'thermo', 'depository')
                 if self.is_dir_modified(dirpath):
-                    self.database.thermo.loadDepository(dirpath)
+                    self.set_progress('Loading thermo depository')
+                    thermo.depository = {}
+                    thermo.loadDepository(dirpath)
                     self.reset_dir_timestamps(dirpath)
+                    modified = True
             if section in ['libraries', '']:
                 dirpath = os.path.join(rmgweb.settings.DATABASE_PATH, 'thermo', 'libraries')
                 if self.is_dir_modified(dirpath):
-                    self.database.thermo.loadLibraries(dirpath)
-                    # put them in our preferred order, so that when we look up thermo in order to estimate kinetics,
-                    # we use our favorite values first.
-                    preferred_order = [
-                        'primaryThermoLibrary',
-                        'DFT_QCI_thermo',
-                        'GRI-Mech3.0',
-                        'CBS_QB3_1dHR',
-                        'KlippensteinH2O2',
-                    ]
-                    new_order = [i for i in preferred_order if i in self.database.thermo.libraryOrder]
-                    for i in self.database.thermo.libraryOrder:
-                        if i not in new_order:
-                            new_order.append(i)
-                    self.database.thermo.libraryOrder = new_order
+                    labels = self.get_modified_labels(dirpath, thermo.libraries, get_thermo_library_label)
+                    if labels is None:
+                        self.set_progress('Loading thermo libraries')
+                        thermo.libraries, thermo.libraryOrder = {}, []
+                        thermo.loadLibraries(dirpath)
+                        sort_thermo_libraries(thermo)
+                    else:
+                        # Reload only the modified libraries, keeping their place in libraryOrder
+                        thermo.libraries = thermo.libraries.copy()
+                        for label in labels:
+                            self.set_progress('Reloading thermo library {0}'.format(label))
+                            library = ThermoLibrary()
+                            library.load(os.path.join(dirpath, label + '.py'), thermo.local_context, thermo.global_context)
+                            library.label = label
+                            thermo.libraries[label] = library
                     self.reset_dir_timestamps(dirpath)
+                    modified = True
             if section in ['groups', '']:
                 dirpath = os.path.join(rmgweb.settings.DATABASE_PATH, 'thermo', 'groups')
                 if self.is_dir_modified(dirpath):
-                    self.database.thermo.loadGroups(dirpath)
+                    self.set_progress('Loading thermo groups')
+                    thermo.groups = {}
+                    thermo.loadGroups(dirpath)
                     self.reset_dir_timestamps(dirpath)
+                    modified = True
+            if modified:
+                self.database.thermo = thermo
 
         if component in ['transport', '']:
+            transport = copy.copy(self.database.transport)
+            modified = False
             if section in ['libraries', '']:
                 dirpath = os.path.join(rmgweb.settings.DATABASE_PATH, 'transport', 'libraries')
                 if self.is_dir_modified(dirpath):
-                    self.database.transport.loadLibraries(dirpath)
+                    self.set_progress('Loading transport libraries')
+                    transport.libraries, transport.libraryOrder = {}, []
+                    transport.loadLibraries(dirpath)
                     self.reset_dir_timestamps(dirpath)
+                    modified = True
             if section in ['groups', '']:
                 dirpath = os.path.join(rmgweb.settings.DATABASE_PATH, 'transport', 'groups')
                 if self.is_dir_modified(dirpath):
-                    self.database.transport.loadGroups(dirpath)
+                    self.set_progress('Loading transport groups')
+                    transport.groups = {}
+                    transport.loadGroups(dirpath)
                     self.reset_dir_timestamps(dirpath)
+                    modified = True
+            if modified:
+                self.database.transport = transport
 
         if component in ['solvation', '']:
             dirpath = os.path.join(rmgweb.settings.DATABASE_PATH, 'solvation')
             if self.is_dir_modified(dirpath):
-                self.database.solvation.load(dirpath)
+                self.set_progress('Loading solvation database')
+                # The solvent and solute libraries are loaded in place, so
+                # load into a new database rather than a copy of the live one
+                solvation = SolvationDatabase()
+                solvation.load(dirpath)
                 self.reset_dir_timestamps(dirpath)
+                self.database.solvation = solvation
 
         if component in ['kinetics', '']:
+            kinetics = copy.copy(self.database.kinetics)
+            modified = False
             if section in ['libraries', '']:
                 dirpath = os.path.join(rmgweb.settings.DATABASE_PATH, 'kinetics', 'libraries')
                 if self.is_dir_modified(dirpath):
-                    self.database.kinetics.loadLibraries(dirpath)
+                    labels = self.get_modified_labels(dirpath, kinetics.libraries, get_kinetics_library_label)
+                    if labels is None:
+                        self.set_progress('Loading kinetics libraries')
+                        kinetics.libraries, kinetics.libraryOrder = {}, []
+                        kinetics.loadLibraries(dirpath)
+                    else:
+                        kinetics.libraries = kinetics.libraries.copy()
+                        for label in labels:
+                            self.set_progress('Reloading kinetics library {0}'.format(label))
+                            library = KineticsLibrary(label=label)
+                            library.load(os.path.join(dirpath, label, 'reactions.py'), kinetics.local_context, kinetics.global_context)
+                            kinetics.libraries[label] = library
                     self.reset_dir_timestamps(dirpath)
+                    modified = True
             if section in ['families', '']:
                 dirpath = os.path.join(rmgweb.settings.DATABASE_PATH, 'kinetics', 'families')
                 if self.is_dir_modified(dirpath):
-                    self.database.kinetics.loadFamilies(dirpath, families='all', depositories='all')
+                    labels = self.get_modified_labels(dirpath, kinetics.families, get_kinetics_family_label)
+                    if labels is None and rmgweb.settings.DATABASE_LAZY_FAMILIES:
+                        # Families are loaded and trained on first access
+                        self.set_progress('Listing kinetics families')
+                        kinetics.families = LazyFamilyRegistry(dirpath, self.load_family)
+                        families = []
+                    elif labels is None:
+                        self.set_progress('Loading kinetics families')
+                        kinetics.families = {}
+                        kinetics.loadFamilies(dirpath, families='all', depositories='all')
+                        families = kinetics.families.values()
+                    else:
+                        # Reload only the modified families
+                        kinetics.families = kinetics.families.copy()
+                        families = []
+                        for label in labels:
+                            if isinstance(kinetics.families, LazyFamilyRegistry) and not kinetics.families.is_loaded(label):
+                                # Will be read from the modified files when first accessed
+                                continue
+                            self.set_progress('Reloading kinetics family {0}'.format(label))
+                            family = self.read_family(label, kinetics)
+                            kinetics.families[label] = family
+                            families.append(family)
                     self.reset_dir_timestamps(dirpath)
 
-                    # Make sure to load the entire thermo database prior to adding training values to the rules
-                    self.load('thermo', '')
-                    for family in self.database.kinetics.families.values():
-                        oldentries = len(family.rules.entries)
-                        family.addKineticsRulesFromTrainingSet(thermoDatabase=self.database.thermo)
-                        newentries = len(family.rules.entries)
-                        if newentries != oldentries:
-                            print '{0} new entries added to {1} family after adding rules from training set.'.format(
-                                newentries - oldentries, family.label)
-                        # Filling in rate rules in kinetics families by averaging...
-                        family.fillKineticsRulesByAveragingUp()
+                    if families:
+                        # Make sure to load the entire thermo database prior to adding training values to the rules
+                        self.load('thermo', '')
+                    for index, family in enumerate(families):
+                        self.set_progress('Training kinetics family {0} ({1} of {2})'.format(family.label, index + 1, len(families)))
+                        self.train_family(family)
+                    modified = True
+            if modified:
+                self.database.kinetics = kinetics
 
         if component in ['statmech', '']:
             dirpath = os.path.join(rmgweb.settings.DATABASE_PATH, 'statmech')
             if self.is_dir_modified(dirpath):
-                self.database.statmech.load(dirpath)
+                self.set_progress('Loading statmech database')
+                statmech = StatmechDatabase()
+                statmech.load(dirpath)
                 self.reset_dir_timestamps(dirpath)
+                self.database.statmech = statmech
+
+        # Writing a complete snapshot would load every lazily loaded family in
+        # this process; that is left to 'manage.py snapshotdatabase'
+        if component == '' and snapshot_path and self.all_families_loaded():
+            self.update_snapshot(snapshot_path)
+
+        if not is_forked_worker():
+            setDatabaseStructures(collect_owned_structures(get_entry_databases(self)))
+            # Structures are registered under their short identifiers when
+            # first shown; drawing them all is left to 'manage.py
+            # prerenderimages' unless the web processes are told to
+            if rmgweb.settings.PRERENDER_IMAGES:
+                key = get_prerender_key(self)
+                if key != self.prerender_key and start_prerender(self):
+                    self.prerender_key = key
 
     def get_transport_database(self, section, subsection):
         """
@@ -347,16 +899,296 @@ class RMGWebDatabase(object):
 
 ################################################################################
 
+class EntryIndex(object):
+    """
+    A secondary index of the entries of an RMG-Py database, for looking up
+    entries by their index. The attributes are:
+
+    =============== ============================================================
+    Attribute       Description
+    =============== ============================================================
+    `entries`       A list of all entries, with list-valued entries flattened
+    `byIndex`       A dict mapping each entry index to the (first) entry with that index
+    `first`         The smallest positive entry index, or ``None`` if there is none
+    `last`          The largest positive entry index, or ``None`` if there is none
+    `maximum`       The largest entry index, or 0 if there are no entries
+    =============== ============================================================
+
+    """
+
+    def __init__(self, db):
+        self.source = db.entries
+        self.size = len(db.entries)
+        self.entries = []
+        for item in db.entries.values():
+            if isinstance(item, list):
+                self.entries.extend(item)
+            else:
+                self.entries.append(item)
+        self.byIndex = {}
+        for entry in self.entries:
+            self.byIndex.setdefault(entry.index, entry)
+        positive = [index for index in self.byIndex if index > 0]
+        self.first = min(positive) if positive else None
+        self.last = max(positive) if positive else None
+        self.maximum = max(self.byIndex) if self.byIndex else 0
+
+    def is_current(self, db):
+        """
+        Return ``True`` if the index still matches the entries of `db`.
+        """
+        return self.source is db.entries and self.size == len(db.entries)
+
+# The entry index of each database, dropped along with the database on reload
+_entry_indices = weakref.WeakKeyDictionary()
+
+def getEntryIndex(db):
+    """
+    Return the :class:`EntryIndex` of the given database `db`, building it
+    if necessary.
+    """
+    index = _entry_indices.get(db)
+    if index is None or not index.is_current(db):
+        index = EntryIndex(db)
+        _entry_indices[db] = index
+    return index
+
+# The untrained reactions of each kinetics family, as cached by
+# rmgweb.database.views.getUntrainedReactions, dropped along with the family
+# on reload
+untrained_reactions = weakref.WeakKeyDictionary()
+
+def invalidateEntryIndex(db):
+    """
+    Discard the entry index of the given database `db`, which must be done
+    after its entries are modified. The memoized markup of the structures
+    is discarded too, since they may have been modified in place, as are
+    the cached untrained reactions, which an edited entry may be part of.
+    """
+    _entry_indices.pop(db, None)
+    untrained_reactions.clear()
+    invalidateStructureMarkup()
+
+def getReactionFingerprint(reaction, keys=None):
+    """
+    Return a hashable fingerprint of the given `reaction`, made from the
+    InChIKeys (or, failing that, the formulas) of its reactants and
+    products. Isomorphic reactions (in either direction) always have the
+    same fingerprint, so only reactions with equal fingerprints need to be
+    checked for isomorphism.
+
+    If given, `keys` is a dict used to remember the key of each species
+    object between calls, which should only be shared while the species
+    objects are alive.
+    """
+    if keys is None:
+        keys = {}
+    sides = []
+    for species_list in [reaction.reactants, reaction.products]:
+        side = []
+        for species in species_list:
+            key = keys.get(id(species))
+            if key is None:
+                key = keys[id(species)] = getSpeciesKey(species)
+            side.append(key)
+        sides.append(tuple(sorted(side)))
+    return tuple(sorted(sides))
+
+def getSpeciesKey(species):
+    """
+    Return the InChIKey of the given `species`, which may be a
+    :class:`Species`, :class:`Molecule` or an :class:`Entry` of either, or
+    its formula if no InChIKey can be generated.
+    """
+    molecule = species.item if isinstance(species, Entry) else species
+    if isinstance(molecule, Species):
+        molecule = molecule.molecule[0]
+    try:
+        return molecule.toInChIKey()
+    except Exception:
+        return molecule.getFormula()
+
+################################################################################
+
+def sort_thermo_libraries(thermo):
+    """
+    Put the libraries of the given `thermo` database in our preferred order,
+    so that when we look up thermo in order to estimate kinetics, we use our
+    favorite values first.
+    """
+    preferred_order = [
+        'primaryThermoLibrary',
+        'DFT_QCI_thermo',
+        'GRI-Mech3.0',
+        'CBS_QB3_1dHR',
+        'KlippensteinH2O2',
+    ]
+    new_order = [i for i in preferred_order if i in thermo.libraryOrder]
+    for i in thermo.libraryOrder:
+        if i not in new_order:
+            new_order.append(i)
+    thermo.libraryOrder = new_order
+
+def get_thermo_library_label(path):
+    """
+    Return the label of the thermo library stored in the file at `path`,
+    relative to the thermo libraries directory.
+    """
+    name, ext = os.path.splitext(path)
+    if ext.lower() == '.py' and os.sep not in name:
+        return name
+    return None
+
+def get_kinetics_library_label(path):
+    """
+    Return the label of the kinetics library that the file at `path`,
+    relative to the kinetics libraries directory, belongs to.
+    """
+    dirname, name = os.path.split(path)
+    if dirname and name in ['reactions.py', 'dictionary.txt']:
+        return dirname
+    return None
+
+def get_kinetics_family_label(path):
+    """
+    Return the label of the kinetics family that the file at `path`,
+    relative to the kinetics families directory, belongs to.
+    """
+    parts = path.split(os.sep)
+    if len(parts) > 1:
+        return parts[0]
+    return None
+
+################################################################################
+
+# Estimated species thermo and the thermo of all sources, by species identity
+# and thermo database version
+thermo_cache = LRUCache('thermo', maxsize=rmgweb.settings.THERMO_CACHE_SIZE, backend='thermo')
+
+def getThermoCacheKey(database, species, kind):
+    """
+    Return the key of the `kind` of thermo data for `species` in the thermo
+    cache, or ``None`` if the data should not be cached.
+    """
+    if not isinstance(database, RMGWebDatabase):
+        return None
+    try:
+        identity = (kind, getSpeciesIdentifier(species), database.get_version('thermo'))
+    except Exception:
+        # No InChI for this species
+        return None
+    return hashlib.sha1(repr(identity)).hexdigest()
+
 def generateSpeciesThermo(species, database):
     """
     Generate the thermodynamics data for a given :class:`Species` object
-    `species` using the provided `database`.
+    `species` using the provided `database`. The thermo data and resonance
+    structures are cached by species identity and thermo database version;
+    the `species` is given its own copies, which the caller may modify.
     """
+    key = getThermoCacheKey(database, species, 'estimate')
+    if key is not None:
+        cached = thermo_cache.get(key)
+        if cached is not None:
+            thermo, molecules = cached
+            species.molecule = cPickle.loads(molecules)
+            species.thermo = copy.deepcopy(thermo)
+            return
     species.generate_resonance_structures()
     species.thermo = database.thermo.getThermoData(species)
-        
+    if key is not None:
+        thermo_cache.set(key, (copy.deepcopy(species.thermo), cPickle.dumps(species.molecule, cPickle.HIGHEST_PROTOCOL)))
+
+def getAllSpeciesThermo(database, molecule):
+    """
+    Return the thermo data of the given `molecule` from every source in the
+    thermo `database` (depository, libraries and group additivity), and the
+    symmetry number of the species (or ``None`` if group additivity gives no
+    result). Each item of the returned list is a tuple of the thermo data,
+    its fitted NASA polynomials, their Chemkin string, the section and label
+    of the source library (``None`` for group additivity) and the entry. The
+    results are cached by species identity and thermo database version, and
+    the thermo data and polynomials returned are copies the caller may modify.
+    """
+    from rmgpy.chemkin import writeThermoEntry
+    from rmgpy.data.thermo import findCp0andCpInf
+    from rmgpy.thermo.thermoengine import processThermoData
+
+    species = Species(molecule=[molecule])
+    key = getThermoCacheKey(database, species, 'all')
+    if key is not None:
+        cached = thermo_cache.get(key)
+        if cached is not None:
+            records, symmetryNumber = cached
+            try:
+                thermoList = []
+                for data, nasa, nasa_string, section, label, index in records:
+                    data, nasa = copy.deepcopy((data, nasa))
+                    if section is None:
+                        entry = Entry(data=data)
+                    else:
+                        entry = getEntryIndex(database.get_thermo_database(section, label)).byIndex[index]
+                    thermoList.append((data, nasa, nasa_string, section, label, entry))
+                return thermoList, symmetryNumber
+            except (KeyError, ValueError):
+                # Refers to a part of the database that is no longer there
+                pass
+
+    species.generate_resonance_structures()
+    symmetryNumber = None
+    thermoList = []
+    for data, library, entry in database.thermo.getAllThermoData(species):
+        # Make sure we calculate Cp0 and CpInf
+        findCp0andCpInf(species, data)
+        # Round trip conversion via Wilhoit for proper fitting
+        nasa = processThermoData(species, data)
+        # Generate Chemkin style NASA polynomial
+        species.thermo = nasa
+        nasa_string = writeThermoEntry(species)
+        if library is None:
+            section, label = None, None
+            symmetryNumber = species.getSymmetryNumber()
+            entry = Entry(data=data)
+        elif library in database.thermo.depository.values():
+            section, label = 'depository', library.label
+        else:
+            section, label = 'libraries', library.label
+        thermoList.append((data, nasa, nasa_string, section, label, entry))
+
+    if key is not None:
+        records = [copy.deepcopy((data, nasa)) + (nasa_string, section, label, entry.index if section is not None else None)
+                   for data, nasa, nasa_string, section, label, entry in thermoList]
+        thermo_cache.set(key, (records, symmetryNumber))
+    return thermoList, symmetryNumber
+
+def generateSpeciesListThermo(speciesList, database):
+    """
+    Generate the thermodynamics data for each :class:`Species` object in
+    `speciesList` using the provided `database`. The data are only generated
+    once for each unique species, and copied to the isomorphic ones.
+    """
+    unique = {}
+    keys = {}
+    for species in speciesList:
+        if id(species) in keys:
+            # The same object was already handled
+            continue
+        key = keys[id(species)] = getSpeciesKey(species)
+        bucket = unique.setdefault(key, [])
+        for other in bucket:
+            if species.isIsomorphic(other):
+                species.thermo = copy.deepcopy(other.thermo)
+                break
+        else:
+            generateSpeciesThermo(species, database)
+            bucket.append(species)
+
 ################################################################################
 
+# Generated reactions, as lists of records made by reactionToRecord(), which
+# are never handed out themselves; the views modify the reactions they get
+reaction_cache = LRUCache('reactions', maxsize=rmgweb.settings.REACTION_CACHE_SIZE, backend='reactions')
+
 def generateReactions(database, reactants, products=None, only_families=None, resonance=True):
     """
     Generate the reactions (and associated kinetics) for a given set of
@@ -365,94 +1197,234 @@ def generateReactions(database, reactants, products=None, only_families=None, re
     the database. This means that the same reaction may appear multiple times
     with different kinetics in the output.
 
-    If `only_families` is a list of strings, only those labeled families are 
+    If `only_families` is a list of strings, only those labeled families are
     used: no libraries and no RMG-Java kinetics are returned.
+
+    The results are cached by the identity of the reactants and products and
+    the loaded versions of the kinetics and thermo databases. Every call
+    returns new reactions, species and kinetics, which the caller may modify.
     """
-    from rmgpy.rmg.model import getFamilyLibraryObject
-    # get RMG-py reactions
-    reaction_list = database.kinetics.generate_reactions(reactants, products, only_families=only_families, resonance=resonance)
+    key = getReactionCacheKey(database, reactants, products, only_families, resonance)
+    if key is not None:
+        records = reaction_cache.get(key)
+        if records is not None:
+            try:
+                return [reactionFromRecord(database, record) for record in records]
+            except (KeyError, ValueError):
+                # Refers to a part of the database that is no longer there
+                pass
+    reaction_list = _generateReactions(database, reactants, products, only_families, resonance)
+    if key is not None:
+        reaction_cache.set(key, [reactionToRecord(reaction) for reaction in reaction_list])
+    return reaction_list
+
+def getReactionCacheKey(database, reactants, products, only_families, resonance):
+    """
+    Return the key of :func:`generateReactions` results in the reaction
+    cache, or ``None`` if the results should not be cached.
+    """
+    if not isinstance(database, RMGWebDatabase):
+        return None
+    try:
+        identity = (
+            [getSpeciesIdentifier(reactant) for reactant in reactants],
+            [getSpeciesIdentifier(product) for product in products] if products is not None else None,
+            sorted(only_families) if only_families is not None else None,
+            bool(resonance),
+            database.get_version('kinetics'),
+            database.get_version('thermo'),
+        )
+    except Exception:
+        # No InChI for this species
+        return None
+    return hashlib.sha1(repr(identity)).hexdigest()
+
+def getSpeciesIdentifier(species):
+    """
+    Return the augmented InChI of the given `species`, which may be a
+    :class:`Species` or :class:`Molecule`.
+    """
+    if isinstance(species, Species):
+        species = species.molecule[0]
+    return species.toAugmentedInChI()
+
+def reactionToRecord(reaction):
+    """
+    Return a compact, picklable record of a reaction returned by
+    :func:`generateReactions`, which refers to kinetics depositories,
+    libraries and their entries by label and index. The reactants, products
+    and kinetics are copied, so the record does not change along with the
+    `reaction`.
+    """
+    common = copy.deepcopy((reaction.reactants, reaction.products, reaction.kinetics)) + \
+        (reaction.degeneracy, reaction.reversible)
+    if isinstance(reaction, TemplateReaction):
+        return ('template',) + common + (reaction.family, reaction.estimator, reaction.template)
+    elif isinstance(reaction, DepositoryReaction):
+        return ('depository',) + common + (reaction.family, reaction.depository.label, reaction.entry.index)
+    elif isinstance(reaction, LibraryReaction):
+        return ('library',) + common + (reaction.library.label, reaction.entry.index, reaction.duplicate)
+    else:
+        return ('reaction', copy.deepcopy(reaction))
+
+def reactionFromRecord(database, record):
+    """
+    Return the reaction described by a `record` made by
+    :func:`reactionToRecord`, looking up depositories, libraries and entries
+    in `database`. Raises :class:`KeyError` or :class:`ValueError` if they
+    do not exist. The reactants, products and kinetics are copied from the
+    record, so that modifying the reaction leaves the record alone.
+    """
+    if record[0] == 'reaction':
+        return copy.deepcopy(record[1])
+    reactants, products, kinetics = copy.deepcopy(record[1:4])
+    degeneracy, reversible = record[4:6]
+    if record[0] == 'template':
+        family, estimator, template = record[6:]
+        return TemplateReaction(reactants=reactants, products=products, kinetics=kinetics, degeneracy=degeneracy,
+                                reversible=reversible, family=family, estimator=estimator, template=template)
+    elif record[0] == 'depository':
+        family, label, index = record[6:]
+        depository = database.get_kinetics_database('families', label)
+        return DepositoryReaction(reactants=reactants, products=products, kinetics=kinetics, degeneracy=degeneracy,
+                                  reversible=reversible, depository=depository, family=family,
+                                  entry=getEntryIndex(depository).byIndex[index])
+    elif record[0] == 'library':
+        label, index, duplicate = record[6:]
+        library = database.kinetics.libraries[label]
+        return LibraryReaction(reactants=reactants, products=products, kinetics=kinetics, degeneracy=degeneracy,
+                               reversible=reversible, duplicate=duplicate, library=library,
+                               entry=getEntryIndex(library).byIndex[index])
+    raise ValueError('Invalid reaction record type "{0}".'.format(record[0]))
+
+def _generateReactions(database, reactants, products=None, only_families=None, resonance=True):
+    """
+    Generate the reactions (and associated kinetics) for a given set of
+    `reactants` and an optional set of `products`, without using the
+    reaction cache. See :func:`generateReactions`.
+
+    With ``REACTION_GENERATION_PROCESSES`` greater than 1, family matching
+    and kinetics estimation are split over a pool of worker processes; the
+    results are the same, in the same order, as in a single process.
+    """
+    # if only one reactant, react it with itself bimolecularly, with RMG-py
+    # the java version already does this (it includes A+A reactions when you react A)
+    reactant_lists = [reactants]
     if len(reactants) == 1:
-        # if only one reactant, react it with itself bimolecularly, with RMG-py
-        # the java version already does this (it includes A+A reactions when you react A)
-        reactants2 = [reactants[0], reactants[0]]
-        reaction_list.extend(database.kinetics.generate_reactions(reactants2, products, only_families=only_families, resonance=resonance))
-    
-    # get RMG-py kinetics
+        reactant_lists.append([reactants[0], reactants[0]])
+
+    processes = rmgweb.settings.REACTION_GENERATION_PROCESSES
+    reaction_kinetics = []
+    for reactant_list in reactant_lists:
+        if processes > 1 and isinstance(database, RMGWebDatabase) and not is_forked_worker():
+            # get RMG-py reactions from libraries here, and from families in the worker processes
+            if only_families is None:
+                for reaction in database.kinetics.generate_reactions_from_libraries(reactant_list, products):
+                    reaction_kinetics.append((reaction, None))
+            reaction_kinetics.extend(generate_family_reactions(database, reactant_list, products, only_families,
+                                                             resonance, processes))
+        else:
+            # get RMG-py reactions
+            for reaction in database.kinetics.generate_reactions(reactant_list, products, only_families=only_families, resonance=resonance):
+                # If the reaction already has kinetics (e.g. from a library),
+                # assume the kinetics are satisfactory
+                reaction_kinetics.append((reaction, getKineticsList(reaction) if reaction.kinetics is None else None))
+
+    return getReactionDataList(reaction_kinetics)
+
+def getKineticsList(reaction):
+    """
+    Return all of the kinetics estimates for the given template `reaction`,
+    from its family's depositories, rate rules and group additivity, as a
+    list of ``[kinetics, source, entry, isForward]`` items.
+    """
+    from rmgpy.rmg.model import getFamilyLibraryObject
+    # Only reactions from families should be missing kinetics
+    assert isinstance(reaction, TemplateReaction)
+
+    # Get all of the kinetics for the reaction
+    family = getFamilyLibraryObject(reaction.family)
+    kineticsList = family.getKinetics(reaction, templateLabels=reaction.template, degeneracy=reaction.degeneracy, returnAllKinetics=True)
+    if family.ownReverse and hasattr(reaction,'reverse'):
+        kineticsListReverse = family.getKinetics(reaction.reverse, templateLabels=reaction.reverse.template, degeneracy=reaction.reverse.degeneracy, returnAllKinetics=True)
+        for kinetics, source, entry, isForward in kineticsListReverse:
+            for kinetics0, source0, entry0, isForward0 in kineticsList:
+                if source0 is not None and source is not None and entry0 is entry and isForward != isForward0:
+                    # We already have this estimate from the forward direction, so don't duplicate it in the results
+                    break
+            else:
+                kineticsList.append([kinetics, source, entry, not isForward])
+        # We're done with the "reverse" attribute, so delete it to save a bit of memory
+        delattr(reaction,'reverse')
+    return kineticsList
+
+def getReactionDataList(reaction_kinetics):
+    """
+    Return the list of reactions returned by :func:`generateReactions`,
+    given a list of ``(reaction, kineticsList)`` pairs of generated
+    reactions and their kinetics estimates from :func:`getKineticsList`
+    (``None`` for reactions that already have kinetics). A new reaction is
+    made for each kinetics estimate.
+    """
     reaction_data_list = []
-    template_reactions = []
-    for reaction in reaction_list:
-        # If the reaction already has kinetics (e.g. from a library),
-        # assume the kinetics are satisfactory
-        if reaction.kinetics is not None:
+    template_reactions = {}
+    species_keys = {}
+    for reaction, kineticsList in reaction_kinetics:
+        if kineticsList is None:
             reaction_data_list.append(reaction)
+            continue
+
+        # Determine if we've already processed an isomorphic reaction with a different template
+        # (only reactions with the same fingerprint can be isomorphic)
+        duplicate = False
+        bucket = template_reactions.setdefault(getReactionFingerprint(reaction, species_keys), [])
+        for t_rxn in bucket:
+            if reaction.isIsomorphic(t_rxn):
+                assert set(reaction.template) != set(t_rxn.template), 'There should not be duplicate reactions with identical templates.'
+                duplicate = True
+                break
         else:
-            # Set the reaction kinetics
-            # Only reactions from families should be missing kinetics
-            assert isinstance(reaction, TemplateReaction)
-
-            # Determine if we've already processed an isomorphic reaction with a different template
-            duplicate = False
-            for t_rxn in template_reactions:
-                if reaction.isIsomorphic(t_rxn):
-                    assert set(reaction.template) != set(t_rxn.template), 'There should not be duplicate reactions with identical templates.'
-                    duplicate = True
-                    break
+            # We haven't encountered this reaction yet, so add it to the list
+            bucket.append(reaction)
+
+        # Make a new reaction object for each kinetics result
+        for kinetics, source, entry, isForward in kineticsList:
+            if duplicate and source != 'rate rules':
+                # We've already processed this reaction with a different template,
+                # so we only need the new rate rule estimates
+                continue
+
+            if isForward:
+                reactant_species = reaction.reactants[:]
+                product_species = reaction.products[:]
             else:
-                # We haven't encountered this reaction yet, so add it to the list
-                template_reactions.append(reaction)
-
-            # Get all of the kinetics for the reaction
-            family = getFamilyLibraryObject(reaction.family)
-            kineticsList = family.getKinetics(reaction, templateLabels=reaction.template, degeneracy=reaction.degeneracy, returnAllKinetics=True)
-            if family.ownReverse and hasattr(reaction,'reverse'):
-                kineticsListReverse = family.getKinetics(reaction.reverse, templateLabels=reaction.reverse.template, degeneracy=reaction.reverse.degeneracy, returnAllKinetics=True)
-                for kinetics, source, entry, isForward in kineticsListReverse:
-                    for kinetics0, source0, entry0, isForward0 in kineticsList:
-                        if source0 is not None and source is not None and entry0 is entry and isForward != isForward0:
-                            # We already have this estimate from the forward direction, so don't duplicate it in the results
-                            break
-                    else:
-                        kineticsList.append([kinetics, source, entry, not isForward])
-                # We're done with the "reverse" attribute, so delete it to save a bit of memory
-                delattr(reaction,'reverse')
-            # Make a new reaction object for each kinetics result
-            for kinetics, source, entry, isForward in kineticsList:
-                if duplicate and source != 'rate rules':
-                    # We've already processed this reaction with a different template,
-                    # so we only need the new rate rule estimates
-                    continue
+                reactant_species = reaction.products[:]
+                product_species = reaction.reactants[:]
 
-                if isForward:
-                    reactant_species = reaction.reactants[:]
-                    product_species = reaction.products[:]
-                else:
-                    reactant_species = reaction.products[:]
-                    product_species = reaction.reactants[:]
-                
-                if source == 'rate rules' or source == 'group additivity':
-                    rxn = TemplateReaction(
-                        reactants = reactant_species,
-                        products = product_species,
-                        kinetics = kinetics,
-                        degeneracy = reaction.degeneracy,
-                        reversible = reaction.reversible,
-                        family = reaction.family,
-                        estimator = source,
-                        template = reaction.template,
-                    )
-                else:
-                    rxn = DepositoryReaction(
-                        reactants = reactant_species,
-                        products = product_species,
-                        kinetics = kinetics,
-                        degeneracy = reaction.degeneracy,
-                        reversible = reaction.reversible,
-                        depository = source,
-                        family = reaction.family,
-                        entry = entry,
-                    )                    
-                    
-                reaction_data_list.append(rxn)
+            if source == 'rate rules' or source == 'group additivity':
+                rxn = TemplateReaction(
+                    reactants = reactant_species,
+                    products = product_species,
+                    kinetics = kinetics,
+                    degeneracy = reaction.degeneracy,
+                    reversible = reaction.reversible,
+                    family = reaction.family,
+                    estimator = source,
+                    template = reaction.template,
+                )
+            else:
+                rxn = DepositoryReaction(
+                    reactants = reactant_species,
+                    products = product_species,
+                    kinetics = kinetics,
+                    degeneracy = reaction.degeneracy,
+                    reversible = reaction.reversible,
+                    depository = source,
+                    family = reaction.family,
+                    entry = entry,
+                )
+
+            reaction_data_list.append(rxn)
 
     return reaction_data_list
     
@@ -496,6 +1468,125 @@ def getRMGJavaKinetics(reactantList, productList=None):
     to the RMG-Java service, then parse the output to find the kinetics of
     the reaction we are interested in.
     """
+    request = getRMGJavaRequest(reactantList)
+    print "SENDING REQUEST FOR RMG-JAVA SEARCH TO SERVER"
+    try:
+        response = getRMGJavaClient().query(request)
+    except RMGJavaError, e:
+        print >> sys.stderr, 'Unable to query RMG-Java for kinetics. (Is the RMG-Java server running?)'
+        print >> sys.stderr, str(e)
+        sys.stderr.flush()
+        return []
+    print "FINISHED REQUEST."
+    return parseRMGJavaResponse(response, reactantList, productList)
+
+def getManyRMGJavaKinetics(queries):
+    """
+    Get the kinetics as estimated by RMG-Java for each of the given
+    `queries`, a list of pairs of reactant and product lists (or ``None``)
+    as taken by :func:`getRMGJavaKinetics`. The requests are all sent to the
+    RMG-Java service at once, over as many connections as the client allows.
+    Returns the list of reactions found for each query, which is empty if
+    the query failed.
+    """
+    requests = [getRMGJavaRequest(reactantList) for reactantList, productList in queries]
+    responses = getRMGJavaClient().query_many(requests)
+    return [parseRMGJavaResponse(response, reactantList, productList) if response is not None else []
+            for response, (reactantList, productList) in zip(responses, queries)]
+
+def getRMGJavaRequest(reactantList):
+    """
+    Return the input file of the PopulateReactions job sent to RMG-Java to
+    find the reactions of the given list of reactant :class:`Molecule`
+    objects.
+    """
+    # Generate species list for Java request
+    popreactants = ''
+    added_reactants = set()
+    for index, reactant in enumerate(reactantList):
+        assert isinstance(reactant, Molecule)
+        reactant.clearLabeledAtoms()
+        for r in added_reactants:
+            if r.isIsomorphic(reactant):
+                break # already added this reactant
+        else: # exhausted the added_reactants list without finding duplicate and breaking
+            added_reactants.add(reactant)
+            popreactants += 'reactant{0:d} (molecule/cm3) 1\n{1}\n\n'.format(index+1, reactant.toAdjacencyList(removeLonePairs=True))
+    popreactants += 'END\n'
+    return popreactants
+
+class RMGJavaSpeciesIndex(object):
+    """
+    An index of the species in a response from RMG-Java, used to find the
+    name of the species isomorphic to a given molecule without comparing it
+    to every species. The attributes are:
+
+    =============== ============================================================
+    Attribute       Description
+    =============== ============================================================
+    `byFormula`     A dict mapping each formula to a list of the ``(name, molecule)`` pairs with it
+    `byInChI`       A dict mapping each formula to a dict mapping InChIs to lists of the pairs with them, made when first needed
+    `names`         A dict mapping the ids of the molecules already identified to their names
+    =============== ============================================================
+
+    """
+
+    def __init__(self, species):
+        self.byFormula = {}
+        self.byInChI = {}
+        self.names = {}
+        for name, molecule in species:
+            self.byFormula.setdefault(molecule.getFormula(), []).append((name, molecule))
+
+    def getCandidates(self, molecule):
+        """
+        Return the list of ``(name, molecule)`` pairs that may be isomorphic
+        to the given `molecule`: those with the same formula, starting with
+        those with the same InChI.
+        """
+        formula = molecule.getFormula()
+        candidates = self.byFormula.get(formula, [])
+        if len(candidates) < 2:
+            return candidates
+        if formula not in self.byInChI:
+            byInChI = self.byInChI[formula] = {}
+            for candidate in candidates:
+                byInChI.setdefault(getMoleculeInChI(candidate[1]), []).append(candidate)
+        matches = self.byInChI[formula].get(getMoleculeInChI(molecule), [])
+        matched = set([id(candidate) for candidate in matches])
+        return matches + [candidate for candidate in candidates if id(candidate) not in matched]
+
+    def identify(self, molecule):
+        """
+        Return the name of the species isomorphic to the given `molecule` or
+        one of its resonance isomers, or ``False`` if there is none.
+        """
+        if id(molecule) not in self.names:
+            candidates = self.getCandidates(molecule)
+            name = False
+            if candidates:
+                resonance_isomers = molecule.generate_resonance_structures()
+                for candidate_name, listmolecule in candidates:
+                    if any(isomer.isIsomorphic(listmolecule) for isomer in resonance_isomers):
+                        name = candidate_name
+                        break
+            self.names[id(molecule)] = name
+        return self.names[id(molecule)]
+
+def getMoleculeInChI(molecule):
+    """
+    Return the InChI of the given `molecule`, or ``None`` if it has none.
+    """
+    try:
+        return molecule.toInChI()
+    except Exception:
+        return None
+
+def parseRMGJavaResponse(response, reactantList, productList=None):
+    """
+    Return the reactions of the given reactant and product :class:`Molecule`
+    objects found in the `response` of RMG-Java to a PopulateReactions job.
+    """
     
     def formSpecies(species):
         """
@@ -590,57 +1681,9 @@ def getRMGJavaKinetics(reactantList, productList=None):
     
         return reactants, products, kinetics, entry
     
-    def identifySpecies(species_dict, molecule):
-        """
-        Given a species_dict list and the species adjacency list, identifies
-        whether species is found in the list and returns its name if found.
-        """
-        resonance_isomers = molecule.generate_resonance_structures()
-        for name, adjlist in species_dict:
-            listmolecule = Molecule().fromAdjacencyList(adjlist, saturateH=True)
-            for isomer in resonance_isomers:
-                if isomer.isIsomorphic(listmolecule):
-                    return name
-        return False
-
     productList = productList or []
     reactionList = []
 
-    # Generate species list for Java request
-    popreactants = ''
-    added_reactants = set()
-    for index, reactant in enumerate(reactantList):
-        assert isinstance(reactant, Molecule)
-        reactant.clearLabeledAtoms()
-        for r in added_reactants:
-            if r.isIsomorphic(reactant):
-                break # already added this reactant
-        else: # exhausted the added_reactants list without finding duplicate and breaking
-            added_reactants.add(reactant)
-            popreactants += 'reactant{0:d} (molecule/cm3) 1\n{1}\n\n'.format(index+1, reactant.toAdjacencyList(removeLonePairs=True))
-    popreactants += 'END\n'
-    
-    
-    # First send search request to PopulateReactions server
-    client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    client_socket.settimeout(10)
-    try:
-        client_socket.connect(("localhost", 5000))
-    except IOError:
-        print >> sys.stderr, 'Unable to query RMG-Java for kinetics. (Is the RMG-Java server running?)'
-        sys.stderr.flush()
-        return reactionList
-    
-    # Send request to server
-    print "SENDING REQUEST FOR RMG-JAVA SEARCH TO SERVER"
-    client_socket.sendall(popreactants)
-    partial_response = client_socket.recv(512)
-    response = partial_response
-    while partial_response:
-        partial_response = client_socket.recv(512)
-        response += partial_response
-    client_socket.close()
-    print "FINISHED REQUEST. CLOSED CONNECTION TO SERVER"
     # Clean response from server
     try:
         species_dict, reactions_list = cleanResponse(response)
@@ -651,20 +1694,20 @@ def getRMGJavaKinetics(reactantList, productList=None):
         print response
         return []
 
-    # Name the species in reaction
-    reactantNames = []
-    for reactant in reactantList:
-        reactantNames.append(identifySpecies(species_dict, reactant))
+    # Parse each species once, and index them for naming the species in reaction
+    species_list = [(key, Molecule().fromAdjacencyList(value,saturateH=True)) for key, value in species_dict]
+    species_index = RMGJavaSpeciesIndex(species_list)
+    species_dict = dict(species_list)
+
+    reactantNames = [species_index.identify(reactant) for reactant in reactantList]
     productNames = []
     for product in productList:
-        productNames.append(identifySpecies(species_dict, product))
-        # identifySpecies(species_dict, product) returns "False" if it can't find product
-        if not identifySpecies(species_dict, product):
+        productNames.append(species_index.identify(product))
+        # identify() returns "False" if it can't find product
+        if not productNames[-1]:
             print "Could not find this requested product in the species dictionary from RMG-Java:"
             print str(product)
     
-    species_dict = dict([(key, Molecule().fromAdjacencyList(value,saturateH=True)) for key, value in species_dict])
-    
     # Both products were actually found in species dictionary or were blank
     reaction = None
     if all(productNames):
@@ -707,108 +1750,73 @@ def getRMGJavaKinetics(reactantList, productList=None):
     
     return reactionList
 
-def getAbrahamAB(smiles):
+class PlattsGroupMatcher(object):
+    """
+    Estimates the Abraham hydrogen bonding descriptors A and B of molecules
+    by Platts group additivity, using the functional groups (SMARTS patterns
+    and their contributions) of the ``PlattsA`` and ``PlattsB`` sheets of the
+    workbook at `path`. The attributes are:
+
+    =============== ============================================================
+    Attribute       Description
+    =============== ============================================================
+    `path`          The path of the workbook of functional groups
+    `groups`        A dict mapping ``'A'`` and ``'B'`` to lists of the ``(smarts, name, value, pattern)`` of each group, with the compiled :class:`OBSmartsPattern`
+    `constants`     A dict mapping ``'A'`` and ``'B'`` to the constant added to the group contributions
+    =============== ============================================================
 
-    class functionalgroup():
-        """
-        functional group definitions and the associated A and B values for the Abraham hydrogen bonding descriptors
-        """
-        def __init__(self,SMART, name, data):
-            self.name = name
-            self.smarts = SMART
-            self.value = float()
-            self.value = data
-    
-    class query():
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.constants = {'A': 0.003, 'B': 0.071}
+        self.groups = {}
+        self.lock = threading.Lock()
+        workbook = xlrd.open_workbook(path)
+        for descriptor in ['A', 'B']:
+            data = workbook.sheet_by_name(u'Platts' + descriptor)
+            self.groups[descriptor] = []
+            for smarts, name, value in zip(data.col_values(0), data.col_values(1), data.col_values(2)):
+                smarts = str(smarts)
+                pattern = ob.OBSmartsPattern()
+                if not pattern.Init(smarts):
+                    # The groups after an invalid pattern are not used
+                    print "Invalid SMARTS pattern", smarts
+                    break
+                self.groups[descriptor].append((smarts, name, value, pattern))
+
+    def getAB(self, smiles):
         """
-        Defines the properties of a molecular query which may be the detergent molecule or dirt molecule
+        Return the Abraham descriptors A and B of the molecule with the given
+        `smiles`.
         """
-        def __init__(self):
-            self.name = str()
-            self.smiles = str()
-            self.A = float()
-            self.B = float()
-        
-        def MatchPlattsAGroups(self, smiles):
-            
-            # Load functional group database
-            current_dir = os.getcwd()
-            filepath = os.path.join(current_dir, 'groups.xls')
-            wb = xlrd.open_workbook(filepath)
-            wb.sheet_names()
-        
-            data = wb.sheet_by_name(u'PlattsA')
-            col1 = data.col_values(0)
-            col2 = data.col_values(1)
-            col3 = data.col_values(2)
-        
-            databaseA = []
-            for (SMART, name, A) in zip(col1, col2, col3):
-                    databaseA.append(functionalgroup(SMART, name, A))
-            
-            platts_A = 0
-            mol = pybel.readstring("smi", smiles)
-            for x in databaseA:
-                # Initialize with dummy SMLES to check for validity of real one
-                smarts = pybel.Smarts("CC")
-                smarts.obsmarts = ob.OBSmartsPattern()
-                success = smarts.obsmarts.Init(x.smarts.__str__())
-                if success:
-                    smarts = pybel.Smarts(x.smarts.__str__())
-                else:
-                    print "Invalid SMARTS pattern", x.smarts.__str__()
-                    break
-                matched = smarts.findall(mol)
-                x.num = len(matched)
-                if (x.num > 0):
-                    print "Found group", x.smarts.__str__(), 'named', x.name, 'with contribution', x.value, 'to A', x.num, 'times'
-                platts_A += (x.num) * (x.value)
-                        
-            self.A = platts_A + 0.003
-               
-        def MatchPlattsBGroups(self, smiles):
-            
-            # Load functional group database
-            current_dir = os.getcwd()
-            filepath = os.path.join(current_dir, 'groups.xls')
-            wb = xlrd.open_workbook(filepath)
-            wb.sheet_names()
-        
-            data = wb.sheet_by_name(u'PlattsB')
-            col1 = data.col_values(0)
-            col2 = data.col_values(1)
-            col3 = data.col_values(2)
-        
-            databaseB = []
-            for (SMART, name, B) in zip(col1, col2, col3):
-                    databaseB.append(functionalgroup(SMART, name, B))
-            
-            platts_B = 0
-            mol = pybel.readstring("smi", smiles)
-            for x in databaseB:
-                # Initialize with dummy SMLES to check for validity of real one
-                smarts = pybel.Smarts("CC")
-                smarts.obsmarts = ob.OBSmartsPattern()
-                success = smarts.obsmarts.Init(x.smarts.__str__())
-                if success:
-                    smarts = pybel.Smarts(x.smarts.__str__())
-                else:
-                    print "Invalid SMARTS pattern", x.smarts.__str__()
-                    break
-                matched = smarts.findall(mol)
-                x.num = len(matched)
-                if (x.num > 0):
-                    print "Found group", x.smarts.__str__(), 'named', x.name, 'with contribution', x.value, 'to B', x.num, 'times'
-                platts_B += (x.num) * (x.value)
-            
-            self.B = platts_B + 0.071 
+        mol = pybel.readstring("smi", smiles).OBMol
+        values = {}
+        # The compiled patterns keep the results of the last match
+        with self.lock:
+            for descriptor in ['A', 'B']:
+                value = 0
+                for smarts, name, contribution, pattern in self.groups[descriptor]:
+                    pattern.Match(mol)
+                    value += len(pattern.GetUMapList()) * contribution
+                values[descriptor] = value + self.constants[descriptor]
+        return values['A'], values['B']
+
+# The Platts group matcher, made from groups.xls when first needed
+_platts_group_matcher = None
 
-    molecule = query()
-    molecule.smiles = smiles
-    molecule.MatchPlattsAGroups(molecule.smiles)
-    molecule.MatchPlattsBGroups(molecule.smiles)
-    
-    return molecule.A, molecule.B
+def getAbrahamAB(smiles):
+    """
+    Return the Abraham hydrogen bonding descriptors A and B estimated by
+    Platts group additivity for the molecule with the given `smiles`, or a
+    list of them for each of a list of SMILES strings.
+    """
+    global _platts_group_matcher
+    if _platts_group_matcher is None:
+        _platts_group_matcher = PlattsGroupMatcher(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'groups.xls'))
+    if isinstance(smiles, basestring):
+        return _platts_group_matcher.getAB(smiles)
+    return [_platts_group_matcher.getAB(item) for item in smiles]
 
 
 def getLibraryLists():
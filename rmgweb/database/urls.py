@@ -31,6 +31,7 @@
 import itertools
 from django.conf.urls import url, include
 from rmgweb.database import views
+from rmgweb.main.tools import structureIdentifierView
 
 app_name = 'database'
 
@@ -41,6 +42,14 @@ urlpatterns = [
     
     # Load the whole database into memory
     url(r'^load/?$', views.load, name='load'),
+    url(r'^load/status/?$', views.loadStatus, name='load-status'),
+
+    # Pre-render the images of every structure in the database
+    url(r'^prerender/?$', views.prerender, name='prerender'),
+    url(r'^prerender/status/?$', views.prerenderStatus, name='prerender-status'),
+
+    # Statistics of the database caches
+    url(r'^cache/stats/?$', views.cacheStats, name='cache-stats'),
     
     # Export to an RMG-Java database
     url(r'^export_(?P<type>zip|tar\.gz)/?$', views.export, name='export'),
@@ -48,6 +57,7 @@ urlpatterns = [
     # Thermodynamics database
     url(r'^thermo/$', views.thermo, name='thermo'),
     url(r'^thermo/search/$', views.moleculeSearch, name='thermo-search'),
+    url(r'^thermo/batch/$', views.thermoBatch, name='thermo-batch'),
     url(r'^thermo/molecule/(?P<adjlist>[\S\s]+)$', views.thermoData, name='thermo-data'),
     url(r'^thermo/(?P<section>\w+)/(?P<subsection>.+)/(?P<index>-?\d+)/$', views.thermoEntry, name='thermo-entry'),
     url(r'^thermo/(?P<section>\w+)/(?P<subsection>.+)/(?P<adjlist>[\S\s]+)/new$', views.thermoEntryNew, name='thermo-entry-new'),
@@ -58,6 +68,7 @@ urlpatterns = [
     # Transport database
     url(r'^transport/$', views.transport, name='transport'),
     url(r'^transport/search/$', views.moleculeSearch, name='transport-search'),
+    url(r'^transport/batch/$', views.transportBatch, name='transport-batch'),
     url(r'^transport/molecule/(?P<adjlist>[\S\s]+)$', views.transportData, name='transport-data'),
     url(r'^transport/(?P<section>\w+)/(?P<subsection>.+)/(?P<index>-?\d+)/$', views.transportEntry, name='transport-entry'),
     url(r'^transport/(?P<section>\w+)/(?P<subsection>.+)/$', views.transport, name='transport'),
@@ -66,6 +77,7 @@ urlpatterns = [
     # solvation database
     url(r'^solvation/$', views.solvation, name='solvation'),
     url(r'^solvation/search/$', views.solvationSearch, name='solvation-search'),
+    url(r'^solvation/batch/$', views.solvationBatch, name='solvation-batch'),
     url(r'^solvation/results/solute=(?P<solute_adjlist>[\S\s]+)__solvent=(?P<solvent>[\S\s]+)$', views.solvationData, name='solvation-data'),
     url(r'^solvation/(?P<section>\w+)/(?P<subsection>.+)/(?P<index>-?\d+)/$', views.solvationEntry, name='solvation-entry'),
     url(r'^solvation/(?P<section>\w+)/(?P<subsection>.+)/$', views.solvation, name='solvation'),
@@ -82,6 +94,7 @@ urlpatterns = [
     # Kinetics database
     url(r'^kinetics/$', views.kinetics, name='kinetics'),
     url(r'^kinetics/search/$', views.kineticsSearch, name='kinetics-search'),
+    url(r'^kinetics/batch/$', views.kineticsBatch, name='kinetics-batch'),
 
     url(r'^kinetics/families/(?P<family>[^/]+)/(?P<type>\w+)/new$', views.kineticsEntryNew, name='kinetics-entry-new'),
     url(r'^kinetics/families/(?P<family>[^/]+)/untrained/$', views.kineticsUntrained, name='kinetics-untrained'),
@@ -92,9 +105,11 @@ urlpatterns = [
     url(r'^kinetics/(?P<section>\w+)/$', views.kinetics, name='kinetics'),
     
     # Molecule Information Page
+    url(r'^molecule/id/(?P<identifier>[0-9a-f]+)$', structureIdentifierView('molecule', views.moleculeEntry), name='molecule-entry-id'),
     url(r'^molecule/(?P<adjlist>[\S\s]+)$', views.moleculeEntry, name='molecule-entry'),
     
     #Group Information Page
+    url(r'^group/id/(?P<identifier>[0-9a-f]+)$', structureIdentifierView('group', views.groupEntry), name='group-entry-id'),
     url(r'^group/(?P<adjlist>[\S\s]+)$', views.groupEntry, name='group-entry'),
 
     # Generate Resonance Structure
@@ -30,6 +30,7 @@
 
 import StringIO  # cStringIO is faster, but can't do Unicode
 import cookielib
+import itertools
 import json
 import math
 import os
@@ -43,10 +44,11 @@ try:
     from bs4 import BeautifulSoup
 except ImportError:
     from BeautifulSoup import BeautifulSoup
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib.staticfiles.templatetags.staticfiles import static
 from django.core.urlresolvers import reverse
-from django.http import Http404, HttpResponseRedirect, HttpResponse, HttpResponseBadRequest
+from django.http import Http404, HttpResponseRedirect, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import render
 from django.template import RequestContext
 
@@ -74,10 +76,17 @@ from rmgpy.quantity import Quantity
 from rmgpy.exceptions import AtomTypeError
 
 import rmgweb.settings
-from rmgweb.database.forms import DivErrorList, EniSearchForm, KineticsEntryEditForm, \
-                                  KineticsSearchForm, MoleculeSearchForm, RateEvaluationForm
-from rmgweb.database.tools import database, generateReactions, generateSpeciesThermo, reactionHasReactants
-from rmgweb.main.tools import getStructureInfo, moleculeFromURL, moleculeToAdjlist, groupToInfo
+from rmgweb.database.batch import addSolvationCorrections, batchView, getKineticsBatchFields, getSolvationBatchFields, \
+    getSolvationNPZ, getSolventCoefficients, getSpeciesBatchTasks, kineticsBatchTask, runBatch, solvationBatchTask, streamChemkin, \
+    streamCSV, streamJSONLines, thermoBatchTask, transportBatchTask, CHEMKIN_THERMO_HEADER, CHEMKIN_TRANSPORT_HEADER
+from rmgweb.database.cache import getCacheStats
+from rmgweb.database.families import LazyFamilyRegistry, get_family_labels
+from rmgweb.database.prerender import get_prerender_status, start_prerender
+from rmgweb.database.forms import DivErrorList, EniSearchForm, KineticsBatchForm, KineticsEntryEditForm, \
+                                  KineticsSearchForm, MoleculeSearchForm, RateEvaluationForm, SolvationBatchForm, ThermoBatchForm, TransportBatchForm
+from rmgweb.database.tools import database, generateReactions, generateSpeciesThermo, generateSpeciesListThermo, reactionHasReactants, \
+    getAllSpeciesThermo, getEntryIndex, invalidateEntryIndex, getReactionFingerprint, untrained_reactions
+from rmgweb.main.tools import getStructureInfo, getStructureSprite, moleculeFromURL, moleculeToAdjlist, groupToInfo
 
 #from rmgweb.main.tools import moleculeToURL, moleculeFromURL
 
@@ -85,10 +94,44 @@ from rmgweb.main.tools import getStructureInfo, moleculeFromURL, moleculeToAdjli
 
 def load(request):
     """
-    Load the RMG database and redirect to the database homepage.
+    Start reloading the RMG database in the background and show the progress
+    of the reload. The current database continues to be served until the
+    reload is complete.
     """
-    database.load()
-    return HttpResponseRedirect(reverse('database:index'))
+    database.start_reload()
+    return render(request, 'databaseLoad.html', {'progress': database.progress})
+
+def loadStatus(request):
+    """
+    Return the progress of the background database reload as JSON.
+    """
+    progress = dict(database.progress)
+    progress['running'] = database.is_reloading()
+    return HttpResponse(json.dumps(progress), content_type="application/json")
+
+@staff_member_required
+def prerender(request):
+    """
+    Show the progress of pre-rendering the images of the structures in the
+    RMG database, and start pre-rendering them again on a POST request if
+    the web processes are allowed to (see ``PRERENDER_IMAGES``).
+    """
+    enabled = rmgweb.settings.PRERENDER_IMAGES
+    started = enabled and request.method == 'POST' and start_prerender(database, force=True)
+    return render(request, 'prerender.html', {'status': get_prerender_status(), 'started': started, 'enabled': enabled})
+
+@staff_member_required
+def prerenderStatus(request):
+    """
+    Return the progress of pre-rendering the structure images as JSON.
+    """
+    return HttpResponse(json.dumps(get_prerender_status()), content_type="application/json")
+
+def cacheStats(request):
+    """
+    Return the statistics of the database caches in this process as JSON.
+    """
+    return HttpResponse(json.dumps(getCacheStats()), content_type="application/json")
 
 def index(request):
     """
@@ -211,17 +254,16 @@ def transportEntry(request, section, subsection, index):
         raise Http404
     
     index = int(index)
+    entryIndex = getEntryIndex(db)
     if index != 0 and index != -1:
-        for entry in db.entries.values():
-            if entry.index == index:
-                break
-        else:
+        try:
+            entry = entryIndex.byIndex[index]
+        except KeyError:
             raise Http404
     else:
-        if index == 0:
-            index = min(entry.index for entry in db.entries.values() if entry.index > 0)
-        else:
-            index = max(entry.index for entry in db.entries.values() if entry.index > 0)
+        index = entryIndex.first if index == 0 else entryIndex.last
+        if index is None:
+            raise Http404
         return HttpResponseRedirect(reverse('database:transport-entry',
                                             kwargs={'section': section,
                                                     'subsection': subsection,
@@ -280,6 +322,37 @@ def transportData(request, adjlist):
 
     return render(request, 'transportData.html', {'molecule': molecule, 'structure': structure, 'transportDataList': transportDataList, 'symmetryNumber': symmetryNumber})
 
+@batchView
+def transportBatch(request):
+    """
+    A view of a form for specifying many species at once, which streams
+    back their transport data from every source, and optionally their
+    estimated vibrational frequencies, as JSON lines or a Chemkin transport
+    file. Each unique species is only looked up once, however many lines
+    give it. Accepts POSTs from scripts as well as from the form.
+    """
+    if request.method == 'POST':
+        form = TransportBatchForm(request.POST, request.FILES, error_class=DivErrorList)
+        if form.is_valid():
+            # Load the transport database, and those for statmech estimates, if necessary
+            database.load('transport')
+            statmech = form.cleaned_data['statmech']
+            if statmech:
+                database.load('thermo')
+                database.load('statmech')
+            format = form.cleaned_data['format']
+            errors, tasks = getSpeciesBatchTasks(form.cleaned_data['lines'], statmech, format == 'chemkin')
+            results = itertools.chain([errors], runBatch(transportBatchTask, tasks))
+            if format == 'chemkin':
+                response = StreamingHttpResponse(streamChemkin(results, CHEMKIN_TRANSPORT_HEADER), content_type='text/plain')
+                response['Content-Disposition'] = 'attachment; filename="tran.dat"'
+                return response
+            return getBatchResponse(format, results, None, 'transport')
+    else:
+        form = TransportBatchForm()
+
+    return render(request, 'transportBatch.html', {'form': form})
+
 #################################################################################################################################################
 
 def solvation(request, section='', subsection=''):
@@ -351,17 +424,16 @@ def solvationEntry(request, section, subsection, index):
         raise Http404
     
     index = int(index)
+    entryIndex = getEntryIndex(db)
     if index != 0 and index != -1:
-        for entry in db.entries.values():
-            if entry.index == index:
-                break
-        else:
+        try:
+            entry = entryIndex.byIndex[index]
+        except KeyError:
             raise Http404
     else:
-        if index == 0:
-            index = min(entry.index for entry in db.entries.values() if entry.index > 0)
-        else:
-            index = max(entry.index for entry in db.entries.values() if entry.index > 0)
+        index = entryIndex.first if index == 0 else entryIndex.last
+        if index is None:
+            raise Http404
         return HttpResponseRedirect(reverse('database:solvation-entry',
                                             kwargs={'section': section,
                                                     'subsection': subsection,
@@ -429,6 +501,42 @@ def solvationData(request, solute_adjlist, solvent=''):
 
     return render(request, 'solvationData.html', {'molecule': molecule, 'structure': structure, 'solvationDataList': solvationDataList, 'solventDataInfo': solventDataInfo})
 
+@batchView
+def solvationBatch(request):
+    """
+    A view of a form for specifying many solutes and solvents at once, which
+    returns the solvation corrections of every solute in every solvent as
+    JSON lines or CSV (streamed as each solute is done), or as arrays in a
+    NumPy .npz file. The solute data of each unique species and the data of
+    each solvent are only looked up once. Accepts POSTs from scripts as well
+    as from the form.
+    """
+    if request.method == 'POST':
+        form = SolvationBatchForm(request.POST, request.FILES, error_class=DivErrorList)
+        if form.is_valid():
+            # Load the solvation database if necessary
+            database.load('solvation')
+            solventLibrary = database.get_solvation_database('libraries', 'solvent')
+            solvents = form.cleaned_data['solvents'] or sorted(solventLibrary.entries.keys())
+            unknown = [solvent for solvent in solvents if solvent not in solventLibrary.entries]
+            if unknown:
+                form.add_error('solvents', 'Unknown solvents: {0}.'.format(', '.join(unknown)))
+            else:
+                coefficients = getSolventCoefficients([database.solvation.getSolventData(solvent) for solvent in solvents])
+                errors, tasks = getSpeciesBatchTasks(form.cleaned_data['lines'])
+                results = itertools.chain([errors], runBatch(solvationBatchTask, tasks))
+                format = form.cleaned_data['format']
+                if format == 'npz':
+                    response = HttpResponse(getSolvationNPZ(results, solvents, coefficients), content_type='application/octet-stream')
+                    response['Content-Disposition'] = 'attachment; filename="solvation.npz"'
+                    return response
+                return getBatchResponse(format, addSolvationCorrections(results, solvents, coefficients),
+                                        getSolvationBatchFields(solvents), 'solvation')
+    else:
+        form = SolvationBatchForm()
+
+    return render(request, 'solvationBatch.html', {'form': form})
+
 
 #################################################################################################################################################
 
@@ -494,17 +602,16 @@ def statmechEntry(request, section, subsection, index):
         raise Http404
     
     index = int(index)
+    entryIndex = getEntryIndex(db)
     if index != 0 and index != -1:
-        for entry in db.entries.values():
-            if entry.index == index:
-                break
-        else:
+        try:
+            entry = entryIndex.byIndex[index]
+        except KeyError:
             raise Http404
     else:
-        if index == 0:
-            index = min(entry.index for entry in db.entries.values() if entry.index > 0)
-        else:
-            index = max(entry.index for entry in db.entries.values() if entry.index > 0)
+        index = entryIndex.first if index == 0 else entryIndex.last
+        if index is None:
+            raise Http404
         return HttpResponseRedirect(reverse('database:statmech-entry',
                                             kwargs={'section': section,
                                                     'subsection': subsection,
@@ -628,17 +735,16 @@ def thermoEntry(request, section, subsection, index):
     except ValueError:
         raise Http404
     index = int(index)
+    entryIndex = getEntryIndex(db)
     if index != 0 and index != -1:
-        for entry in db.entries.values():
-            if entry.index == index:
-                break
-        else:
+        try:
+            entry = entryIndex.byIndex[index]
+        except KeyError:
             raise Http404
     else:
-        if index == 0:
-            index = min(entry.index for entry in db.entries.values() if entry.index > 0)
-        else:
-            index = max(entry.index for entry in db.entries.values() if entry.index > 0)
+        index = entryIndex.first if index == 0 else entryIndex.last
+        if index is None:
+            raise Http404
         return HttpResponseRedirect(reverse('database:thermo-entry',
                                             kwargs={'section': section,
                                                     'subsection': subsection,
@@ -687,35 +793,20 @@ def thermoData(request, adjlist):
     
     # Load the thermo database if necessary
     database.load('thermo')
-    from rmgpy.chemkin import writeThermoEntry
 
     adjlist = str(urllib.unquote(adjlist))
     molecule = Molecule().fromAdjacencyList(adjlist)
-    species = Species(molecule=[molecule])
-    species.generate_resonance_structures()
     
     # Get the thermo data for the molecule
-    symmetryNumber = None
+    thermoList, symmetryNumber = getAllSpeciesThermo(database, molecule)
     thermoDataList = []
-    for data, library, entry in database.thermo.getAllThermoData(species):
-        # Make sure we calculate Cp0 and CpInf
-        findCp0andCpInf(species, data)
-        # Round trip conversion via Wilhoit for proper fitting
-        nasa = processThermoData(species, data)
-        # Generate Chemkin style NASA polynomial
-        species.thermo = nasa
-        nasa_string = writeThermoEntry(species)
-        if library is None:
+    for data, nasa, nasa_string, section, label, entry in thermoList:
+        if section is None:
             source = 'Group additivity'
             href = ''
-            symmetryNumber = species.getSymmetryNumber()
-            entry = Entry(data=data)
-        elif library in database.thermo.depository.values():
-            source = 'Depository'
-            href = reverse('database:thermo-entry', kwargs={'section': 'depository', 'subsection': library.label, 'index': entry.index})
-        elif library in database.thermo.libraries.values():
-            source = library.name
-            href = reverse('database:thermo-entry', kwargs={'section': 'libraries', 'subsection': library.label, 'index': entry.index})
+        else:
+            source = 'Depository' if section == 'depository' else database.get_thermo_database(section, label).name
+            href = reverse('database:thermo-entry', kwargs={'section': section, 'subsection': label, 'index': entry.index})
         thermoDataList.append((
             entry,
             data,
@@ -729,6 +820,32 @@ def thermoData(request, adjlist):
 
     return render(request, 'thermoData.html', {'molecule': molecule, 'structure': structure, 'thermoDataList': thermoDataList, 'symmetryNumber': symmetryNumber, 'plotWidth': 500, 'plotHeight': 400 + 15 * len(thermoDataList)})
 
+@batchView
+def thermoBatch(request):
+    """
+    A view of a form for specifying many species at once, which streams
+    back their thermo data from the best or every source as JSON lines or a
+    Chemkin THERM block. Each unique species is only looked up once, however
+    many lines give it. Accepts POSTs from scripts as well as from the form.
+    """
+    if request.method == 'POST':
+        form = ThermoBatchForm(request.POST, request.FILES, error_class=DivErrorList)
+        if form.is_valid():
+            # Load the thermo database if necessary
+            database.load('thermo')
+            format = form.cleaned_data['format']
+            errors, tasks = getSpeciesBatchTasks(form.cleaned_data['lines'], form.cleaned_data['sources'] == 'best', format == 'chemkin')
+            results = itertools.chain([errors], runBatch(thermoBatchTask, tasks))
+            if format == 'chemkin':
+                response = StreamingHttpResponse(streamChemkin(results, CHEMKIN_THERMO_HEADER, 'END\n'), content_type='text/plain')
+                response['Content-Disposition'] = 'attachment; filename="thermo.txt"'
+                return response
+            return getBatchResponse(format, results, None, 'thermo')
+    else:
+        form = ThermoBatchForm()
+
+    return render(request, 'thermoBatch.html', {'form': form})
+
 ################################################################################
 
 def getDatabaseTreeAsList(database, entries):
@@ -776,9 +893,16 @@ def getKineticsTreeHTML(database, section, subsection, entries):
 def getUntrainedReactions(family):
     """
     Return a depository containing unique reactions for which no
-    training data exists.
+    training data exists. The result is cached until the depositories of the
+    family change, or any entry is edited (see :func:`invalidateEntryIndex`).
     """
     
+    # The cached depository is valid as long as no depository entries were added or replaced
+    version = [(depository.label, id(depository.entries), len(depository.entries)) for depository in family.depositories]
+    cached = untrained_reactions.get(family)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
     # Load training depository
     for depository in family.depositories:
         if 'training' in depository.label:
@@ -787,28 +911,37 @@ def getUntrainedReactions(family):
     else:
         raise Exception('Could not find training depository in {0} family.'.format(family.label))
     
+    # Reactions are bucketed by fingerprint, so that isomorphism is only
+    # checked between reactions with the same fingerprint
+    
     # Load trained reactions
-    trainedReactions = []
+    trainedReactions = {}
+    speciesKeys = {}
     for entry in training.entries.values():
-        for reaction in trainedReactions:
+        bucket = trainedReactions.setdefault(getReactionFingerprint(entry.item, speciesKeys), [])
+        for reaction in bucket:
             if reaction.isIsomorphic(entry.item):
                 break
         else:
-            trainedReactions.append(entry.item)
+            bucket.append(entry.item)
     
     # Load untrained reactions
     untrainedReactions = []
+    untrainedBuckets = {}
     for depository in family.depositories:
         if 'training' not in depository.label:
             for entry in depository.entries.values():
-                for reaction in trainedReactions:
+                fingerprint = getReactionFingerprint(entry.item, speciesKeys)
+                for reaction in trainedReactions.get(fingerprint, []):
                     if reaction.isIsomorphic(entry.item):
                         break
                 else:
-                    for reaction in untrainedReactions:
+                    bucket = untrainedBuckets.setdefault(fingerprint, [])
+                    for reaction in bucket:
                         if reaction.isIsomorphic(entry.item):
                             break
                     else:
+                        bucket.append(entry.item)
                         untrainedReactions.append(entry.item)
     
     # Sort reactions by reactant size
@@ -826,6 +959,7 @@ def getUntrainedReactions(family):
         )
         count += 1
     
+    untrained_reactions[family] = (version, untrained)
     return untrained
 
 
@@ -1206,7 +1340,9 @@ def kinetics(request, section='', subsection=''):
     try:
         db = database.get_kinetics_database(section, subsection)
     except ValueError:
-        pass
+        if section == 'families' and subsection.endswith('/untrained'):
+            # The untrained reactions are not a depository of the family
+            return HttpResponseRedirect(reverse('database:kinetics-untrained', kwargs={'family': subsection.split('/')[0]}))
 
     if db is not None:
 
@@ -1214,6 +1350,7 @@ def kinetics(request, section='', subsection=''):
         # that part of the database
 
         isGroupDatabase = False
+        sprite = getStructureSprite(request)
 
         # Sort entries by index
         if db.top is not None and len(db.top) > 0:
@@ -1223,10 +1360,7 @@ def kinetics(request, section='', subsection=''):
             tree = '<ul class="kineticsTree">\n{0}\n</ul>\n'.format(getKineticsTreeHTML(db, section, subsection, db.top))
         else:
             # If there is not a tree, consider all entries
-            entries0 = db.entries.values()
-            if any(isinstance(item, list) for item in entries0):
-                # if the entries are lists
-                entries0 = reduce(lambda x,y: x+y, entries0)
+            entries0 = list(getEntryIndex(db).entries)
             # Sort the entries by index and label
             entries0.sort(key=lambda entry: (entry.index, entry.label))
             tree = ''
@@ -1246,7 +1380,7 @@ def kinetics(request, section='', subsection=''):
             }
             if isinstance(db, KineticsGroups):
                 isGroupDatabase = True
-                entry['structure'] = getStructureInfo(entry0.item)
+                entry['structure'] = getStructureInfo(entry0.item, sprite)
                 entry['parent'] = entry0.parent
                 entry['children'] = entry0.children
             elif 'rules' in subsection:
@@ -1257,30 +1391,36 @@ def kinetics(request, section='', subsection=''):
                     # training rates that became rate rules.
                     continue
                 else:
-                    entry['reactants'] = ' + '.join([getStructureInfo(reactant) for reactant in entry0.item.reactants])
-                    entry['products'] = ' + '.join([getStructureInfo(reactant) for reactant in entry0.item.products])
+                    entry['reactants'] = ' + '.join([getStructureInfo(reactant, sprite) for reactant in entry0.item.reactants])
+                    entry['products'] = ' + '.join([getStructureInfo(reactant, sprite) for reactant in entry0.item.products])
                     entry['arrow'] = '&hArr;' if entry0.item.reversible else '&rarr;'
             else:
-                entry['reactants'] = ' + '.join([getStructureInfo(reactant) for reactant in entry0.item.reactants])
-                entry['products'] = ' + '.join([getStructureInfo(reactant) for reactant in entry0.item.products])
+                entry['reactants'] = ' + '.join([getStructureInfo(reactant, sprite) for reactant in entry0.item.reactants])
+                entry['products'] = ' + '.join([getStructureInfo(reactant, sprite) for reactant in entry0.item.products])
                 entry['arrow'] = '&hArr;' if entry0.item.reversible else '&rarr;'
 
             entries.append(entry)
             
-        return render(request, 'kineticsTable.html', {'section': section, 'subsection': subsection, 'databaseName': db.name, 'databaseDesc':db.longDesc,'entries': entries, 'tree': tree, 'isGroupDatabase': isGroupDatabase})
+        return render(request, 'kineticsTable.html', {'section': section, 'subsection': subsection, 'databaseName': db.name, 'databaseDesc':db.longDesc,'entries': entries, 'tree': tree, 'isGroupDatabase': isGroupDatabase,
+                                                   'sprite': sprite.render() if sprite is not None else ''})
 
     else:
         # No subsection was specified, so render an outline of the kinetics
         # database components
         kineticsLibraries = [(label, library) for label, library in database.kinetics.libraries.iteritems() if subsection in label]
         kineticsLibraries.sort()
-        for family in database.kinetics.families.itervalues():
-            for i in range(0,len(family.depositories)):
-                if 'untrained' in family.depositories[i].name:
-                    family.depositories.pop(i)
-            family.depositories.append(getUntrainedReactions(family))
-        kineticsFamilies = [(label, family) for label, family in database.kinetics.families.iteritems() if subsection in label]
-        kineticsFamilies.sort()
+        # Only describe the families that are loaded; loading and training
+        # every family just to list them would take minutes
+        families = database.kinetics.families
+        kineticsFamilies = []
+        for label in get_family_labels(os.path.join(rmgweb.settings.DATABASE_PATH, 'kinetics', 'families')):
+            if subsection not in label or label not in families:
+                continue
+            if isinstance(families, LazyFamilyRegistry) and not families.is_loaded(label):
+                kineticsFamilies.append((label, None, None))
+            else:
+                family = families[label]
+                kineticsFamilies.append((label, family, getUntrainedReactions(family)))
         return render(request, 'kinetics.html', {'section': section, 'subsection': subsection, 'kineticsLibraries': kineticsLibraries, 'kineticsFamilies': kineticsFamilies})
 
 def kineticsUntrained(request, family):
@@ -1289,18 +1429,20 @@ def kineticsUntrained(request, family):
     entries0.sort(key=lambda entry: (entry.index, entry.label))
     
     entries = []
+    sprite = getStructureSprite(request)
     for entry0 in entries0:
         entry = {
                 'index': entry0.index,
                 'url': entry0.label,
             }
         
-        entry['reactants'] = ' + '.join([getStructureInfo(reactant) for reactant in entry0.item.reactants])
-        entry['products'] = ' + '.join([getStructureInfo(reactant) for reactant in entry0.item.products])
+        entry['reactants'] = ' + '.join([getStructureInfo(reactant, sprite) for reactant in entry0.item.reactants])
+        entry['products'] = ' + '.join([getStructureInfo(reactant, sprite) for reactant in entry0.item.products])
         entry['arrow'] = '&hArr;' if entry0.item.reversible else '&rarr;'
         
         entries.append(entry)
-    return render(request, 'kineticsTable.html', {'section': 'families', 'subsection': family, 'databaseName': '{0}/untrained'.format(family), 'entries': entries, 'tree': None, 'isGroupDatabase': False})
+    return render(request, 'kineticsTable.html', {'section': 'families', 'subsection': family, 'databaseName': '{0}/untrained'.format(family), 'entries': entries, 'tree': None, 'isGroupDatabase': False,
+                                                   'sprite': sprite.render() if sprite is not None else ''})
 
 def getReactionUrl(reaction, family=None, estimator=None, resonance=True):
     """
@@ -1349,10 +1491,7 @@ def kineticsEntryNew(request, family, type):
     except ValueError:
         raise Http404
     
-    entries = db.entries.values()
-    if any(isinstance(item, list) for item in entries):
-        # if the entries are lists
-        entries = reduce(lambda x,y: x+y, entries)
+    entries = getEntryIndex(db).entries
     entry = None
     if request.method == 'POST':
         form = KineticsEntryEditForm(request.POST, error_class=DivErrorList)
@@ -1360,8 +1499,7 @@ def kineticsEntryNew(request, family, type):
             new_entry = form.cleaned_data['entry']
 
             # Set new entry index
-            indices = [entry.index for entry in db.entries.values()]
-            new_entry.index = max(indices or [0]) + 1
+            new_entry.index = getEntryIndex(db).maximum + 1
 
             # Confirm entry does not already exist in depository
             for entry in entries:
@@ -1426,6 +1564,7 @@ def kineticsEntryNew(request, family, type):
             if True:
                 # save it
                 db.entries[index] = new_entry
+                invalidateEntryIndex(db)
                 path = os.path.join(rmgweb.settings.DATABASE_PATH, 'kinetics', 'families', family, '{0}.py'.format(type))
                 db.save(path)
                 commit_author = '{0.first_name} {0.last_name} <{0.email}>'.format(request.user)
@@ -1474,15 +1613,10 @@ def kineticsEntryEdit(request, section, subsection, index):
     except ValueError:
         raise Http404
     
-    entries = db.entries.values()
-    if any(isinstance(item, list) for item in entries):
-        # if the entries are lists
-        entries = reduce(lambda x,y: x+y, entries)
     index = int(index)
-    for entry in entries:
-        if entry.index == index:
-            break
-    else:
+    try:
+        entry = getEntryIndex(db).byIndex[index]
+    except KeyError:
         raise Http404
     
     if request.method == 'POST':
@@ -1519,6 +1653,7 @@ def kineticsEntryEdit(request, section, subsection, index):
             if True:
                 # save it
                 db.entries[index] = new_entry
+                invalidateEntryIndex(db)
                 path = os.path.join(rmgweb.settings.DATABASE_PATH, 'kinetics', section, subsection + '.py' )
                 db.save(path)
                 commit_author = "{0.first_name} {0.last_name} <{0.email}>".format(request.user)
@@ -1595,10 +1730,6 @@ def thermoEntryNew(request, section, subsection, adjlist):
     except ValueError:
         raise Http404
     
-    entries = db.entries.values()
-    if any(isinstance(item, list) for item in entries):
-        # if the entries are lists
-        entries = reduce(lambda x,y: x+y, entries)
     entry = None
     if request.method == 'POST':
         form = ThermoEntryEditForm(request.POST, error_class=DivErrorList)
@@ -1606,8 +1737,7 @@ def thermoEntryNew(request, section, subsection, adjlist):
             new_entry = form.cleaned_data['entry']
 
             # Set new entry index
-            indices = [entry.index for entry in db.entries.values()]
-            new_entry.index = max(indices or [0]) + 1
+            new_entry.index = getEntryIndex(db).maximum + 1
 
             # Do not need to confirm entry already exists- should allow the user to store multiple 
             # thermo entries in to the depository or into separate libraries for the same molecule if the data exists.
@@ -1638,6 +1768,7 @@ def thermoEntryNew(request, section, subsection, adjlist):
             if True:
                 # save it
                 db.entries[index] = new_entry
+                invalidateEntryIndex(db)
                 path = os.path.join(rmgweb.settings.DATABASE_PATH, 'thermo', section, subsection + '.py')
                 db.save(path)
                 commit_author = '{0.first_name} {0.last_name} <{0.email}>'.format(request.user)
@@ -1704,15 +1835,10 @@ def thermoEntryEdit(request, section, subsection, index):
     except ValueError:
         raise Http404
     
-    entries = db.entries.values()
-    if any(isinstance(item, list) for item in entries):
-        # if the entries are lists
-        entries = reduce(lambda x,y: x+y, entries)
     index = int(index)
-    for entry in entries:
-        if entry.index == index:
-            break
-    else:
+    try:
+        entry = getEntryIndex(db).byIndex[index]
+    except KeyError:
         raise Http404
     
     if request.method == 'POST':
@@ -1749,6 +1875,7 @@ def thermoEntryEdit(request, section, subsection, index):
             if True:
                 # save it
                 db.entries[index] = new_entry
+                invalidateEntryIndex(db)
                 path = os.path.join(rmgweb.settings.DATABASE_PATH, 'thermo', section, subsection + '.py' )
                 db.save(path)
                 commit_author = "{0.first_name} {0.last_name} <{0.email}>".format(request.user)
@@ -1823,23 +1950,17 @@ def kineticsEntry(request, section, subsection, index):
     except ValueError:
         raise Http404
     
-    entries = db.entries.values()
-    if any(isinstance(item, list) for item in entries):
-        # if the entries are lists
-        entries = reduce(lambda x,y: x+y, entries)
-                
     index = int(index)
+    entryIndex = getEntryIndex(db)
     if index != 0 and index != -1:
-        for entry in entries:
-            if entry.index == index:
-                break
-        else:
+        try:
+            entry = entryIndex.byIndex[index]
+        except KeyError:
             raise Http404
     else:
-        if index == 0:
-            index = min(entry.index for entry in entries if entry.index > 0)
-        else:
-            index = max(entry.index for entry in entries if entry.index > 0)
+        index = entryIndex.first if index == 0 else entryIndex.last
+        if index is None:
+            raise Http404
         return HttpResponseRedirect(reverse('database:kinetics-entry',
                                             kwargs={'section': section,
                                                     'subsection': subsection,
@@ -2071,6 +2192,45 @@ def kineticsSearch(request):
 
     return render(request, 'kineticsSearch.html', {'form': form})
 
+@batchView
+def kineticsBatch(request):
+    """
+    A view of a form for specifying many reactions at once, which streams
+    back the kinetics of every matching reaction from every source as JSON
+    lines or CSV, as each input reaction is done. Accepts POSTs from scripts
+    as well as from the form.
+    """
+    if request.method == 'POST':
+        form = KineticsBatchForm(request.POST, request.FILES, error_class=DivErrorList)
+        if form.is_valid():
+            # Load the kinetics and thermo databases if necessary
+            database.load('kinetics')
+            database.load('thermo')
+            temperatures = form.cleaned_data['temperatures']
+            pressures = form.cleaned_data['pressures']
+            tasks = [(number, line, temperatures, pressures, form.cleaned_data['resonance'])
+                     for number, line in form.cleaned_data['lines']]
+            results = runBatch(kineticsBatchTask, tasks, families=True)
+            return getBatchResponse(form.cleaned_data['format'], results,
+                                    getKineticsBatchFields(temperatures, pressures), 'kinetics')
+    else:
+        form = KineticsBatchForm()
+
+    return render(request, 'kineticsBatch.html', {'form': form})
+
+def getBatchResponse(format, results, fields, name):
+    """
+    Return a streaming response writing out the records of the batch
+    `results` in the given `format`, either ``'jsonl'`` or ``'csv'`` (with
+    the given `fields` as columns).
+    """
+    if format == 'csv':
+        response = StreamingHttpResponse(streamCSV(results, fields), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="{0}.csv"'.format(name)
+    else:
+        response = StreamingHttpResponse(streamJSONLines(results), content_type='application/x-ndjson')
+    return response
+
 def kineticsResults(request, reactant1, reactant2='', reactant3='', product1='', product2='', product3='', resonance=True):
     """
     A view used to present a list of unique reactions that result from a
@@ -2102,14 +2262,19 @@ def kineticsResults(request, reactant1, reactant2='', reactant3='', product1='',
     reactionList = generateReactions(database, reactantList, productList, resonance=resonance)
 
     # Remove duplicates from the list and count the number of results
+    # (only reactions with the same fingerprint can be isomorphic)
     uniqueReactionList = []
     uniqueReactionCount = []
+    uniqueReactionBuckets = {}
+    speciesKeys = {}
     for reaction in reactionList:
-        for i, rxn in enumerate(uniqueReactionList):
-            if reaction.isIsomorphic(rxn):
+        bucket = uniqueReactionBuckets.setdefault(getReactionFingerprint(reaction, speciesKeys), [])
+        for i in bucket:
+            if reaction.isIsomorphic(uniqueReactionList[i]):
                 uniqueReactionCount[i] += 1
                 break
         else:
+            bucket.append(len(uniqueReactionList))
             uniqueReactionList.append(reaction)
             uniqueReactionCount.append(1)
     
@@ -2178,14 +2343,12 @@ def kineticsData(request, reactant1, reactant2='', reactant3='', product1='', pr
     count_template_rxns_forward = 0
     count_template_rxns_reverse = 0
 
+    # Generate the thermo data for the species involved, once per unique species
+    generateSpeciesListThermo([species for reaction in reactionList for species in reaction.reactants + reaction.products], database)
+
     # Go through database and group additivity kinetics entries
+    templateReactions = {}
     for reaction in reactionList:
-        # Generate the thermo data for the species involved
-        for reactant in reaction.reactants:
-            generateSpeciesThermo(reactant, database)
-        for product in reaction.products:
-            generateSpeciesThermo(product, database)
-            
         # If the kinetics are ArrheniusEP, replace them with Arrhenius
         if isinstance(reaction.kinetics, ArrheniusEP):
             reaction.kinetics = reaction.kinetics.toArrhenius(reaction.getEnthalpyOfReaction(298))
@@ -2212,6 +2375,7 @@ def kineticsData(request, reactant1, reactant2='', reactant3='', product1='', pr
             href = getReactionUrl(reaction, family=reaction.family, estimator=reaction.estimator, resonance=resonance)
             entry = Entry(data=reaction.kinetics)
             family = reaction.family
+            templateReactions.setdefault(family, reaction)
         elif isinstance(reaction, DepositoryReaction):
             if 'untrained' in reaction.depository.name:
                 continue
@@ -2240,13 +2404,10 @@ def kineticsData(request, reactant1, reactant2='', reactant3='', product1='', pr
                 reverseKinetics = None
             kineticsDataList.append([products, arrow, reactants, entry, reverseKinetics, source, href, is_forward])
 
-    # Construct new entry form from group-additive result
-    # Need to get group-additive reaction from generateReaction with only_families
-    # +--> otherwise, adjacency list doesn't store reaction template properly
+    # Construct new entry form from the first group-additive result of the
+    # (last) family, rather than generating the reactions of that family again
     if family:
-        additiveList = generateReactions(database, reactantList, productList, only_families=family, resonance=resonance)
-        additiveList = [rxn for rxn in additiveList if isinstance(rxn, TemplateReaction)]
-        reaction = additiveList[0]
+        reaction = templateReactions[family]
         new_entry = StringIO.StringIO(u'')
         try:
             if reactionHasReactants(reaction, reactantList):
@@ -2456,8 +2617,7 @@ def EniSearch(request):
             deposit_smiles = deposit.toSMILES()
             deposit_structure = getStructureInfo(deposit)
             
-            detergentA, detergentB = getAbrahamAB(detergent_smiles)
-            depositA, depositB = getAbrahamAB(deposit_smiles)
+            (detergentA, detergentB), (depositA, depositB) = getAbrahamAB([detergent_smiles, deposit_smiles])
             
             # Estimating the binding strength assuming the the detergent to be the donor and dirt to be acceptor            
             logK_AB = 7.354*detergentA*depositB
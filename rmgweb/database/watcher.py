@@ -0,0 +1,248 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG Website - A Django-powered website for Reaction Mechanism Generator     #
+#                                                                             #
+# Copyright (c) 2011-2018 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+
+"""
+This module watches the directories of the RMG database for changes, so that
+:class:`rmgweb.database.tools.RMGWebDatabase` can decide whether a part of the
+database needs reloading without scanning the file system on every request.
+
+Changes are detected with inotify when the ``pyinotify`` package is available,
+and by periodically polling file modification times otherwise. A directory is
+only reported as modified once no further changes have been seen for a short
+debounce window, so that e.g. a ``git pull`` touching many files results in a
+single reload.
+"""
+
+import os
+import sys
+import threading
+import time
+
+try:
+    import pyinotify
+except ImportError:
+    pyinotify = None
+
+
+class DatabaseWatcher(object):
+    """
+    Tracks changes to a set of watched directories in the background. The
+    attributes are:
+
+    =============== ============================================================
+    Attribute       Description
+    =============== ============================================================
+    `debounce`      The number of seconds a directory must be quiet before it is reported as modified
+    `interval`      The number of seconds between scans when polling
+    `clock`         The function returning the current time, in seconds
+    `mode`          Either ``'inotify'`` or ``'poll'``
+    `watched`       A dict mapping each watched directory to its file modification times (polling only)
+    `pending`       A dict mapping directories with recent changes to the time of the last change
+    `dirty`         The set of directories whose changes have settled
+    `changes`       A dict mapping each modified directory to the set of changed file paths
+    =============== ============================================================
+
+    """
+
+    def __init__(self, mode='inotify', debounce=2.0, interval=5.0, clock=time.time):
+        if mode == 'inotify' and pyinotify is None:
+            print >> sys.stderr, 'pyinotify is not available; polling the RMG database for changes instead.'
+            mode = 'poll'
+        if mode not in ['inotify', 'poll']:
+            raise ValueError('Invalid database watcher mode "{0}".'.format(mode))
+        self.mode = mode
+        self.debounce = debounce
+        self.interval = interval
+        self.clock = clock
+        self.watched = {}
+        self.pending = {}
+        self.dirty = set()
+        self.changes = {}
+        self.lock = threading.Lock()
+        self.thread = None
+        self.manager = None
+        self.stopped = threading.Event()
+
+    def start(self):
+        """
+        Start the background thread that receives or polls for changes.
+        """
+        if self.thread is not None:
+            return
+        print >> sys.stderr, 'Starting RMG database watcher ({0}) in process {1}'.format(self.mode, os.getpid())
+        if self.mode == 'inotify':
+            self.manager = pyinotify.WatchManager()
+            self.thread = pyinotify.ThreadedNotifier(self.manager, default_proc_fun=_EventHandler(watcher=self))
+            # Watch the directories again after being stopped
+            for dirpath in self.watched:
+                self.add_watch(dirpath)
+        else:
+            self.stopped.clear()
+            self.thread = threading.Thread(target=self._poll)
+        self.thread.setDaemon(True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop the background thread and wait for it to exit. The watched
+        directories are kept, and watching them again starts a new thread.
+        """
+        if self.thread is None:
+            return
+        if self.mode == 'inotify':
+            # Joins the notifier thread
+            self.thread.stop()
+        else:
+            self.stopped.set()
+            self.thread.join()
+        self.thread = None
+        self.manager = None
+
+    def watch(self, dirpath):
+        """
+        Start watching the directory at `dirpath`, or mark it as unmodified
+        if it is already being watched. Call this after loading the contents
+        of the directory.
+        """
+        new = dirpath not in self.watched
+        self.start()
+        with self.lock:
+            self.pending.pop(dirpath, None)
+            self.dirty.discard(dirpath)
+            self.changes.pop(dirpath, None)
+            if self.mode == 'poll':
+                self.watched[dirpath] = get_mtimes(dirpath)
+            else:
+                self.watched[dirpath] = None
+        if new and self.mode == 'inotify':
+            self.add_watch(dirpath)
+
+    def add_watch(self, dirpath):
+        """
+        Add an inotify watch on the directory at `dirpath` and everything
+        below it.
+        """
+        mask = (pyinotify.IN_CLOSE_WRITE | pyinotify.IN_CREATE | pyinotify.IN_DELETE | pyinotify.IN_MODIFY |
+                pyinotify.IN_MOVED_FROM | pyinotify.IN_MOVED_TO | pyinotify.IN_ATTRIB)
+        self.manager.add_watch(dirpath, mask, rec=True, auto_add=True)
+
+    def is_watching(self, dirpath):
+        """
+        Return ``True`` if the directory at `dirpath` is being watched.
+        """
+        return dirpath in self.watched
+
+    def is_dirty(self, dirpath):
+        """
+        Return ``True`` if the directory at `dirpath` has been modified since
+        :meth:`watch` was last called for it and the debounce window has
+        passed since the last change.
+        """
+        if dirpath in self.dirty:
+            return True
+        last = self.pending.get(dirpath)
+        if last is not None and self.clock() - last >= self.debounce:
+            with self.lock:
+                if self.pending.pop(dirpath, None) is not None:
+                    self.dirty.add(dirpath)
+            return dirpath in self.dirty
+        return False
+
+    def changed_files(self, dirpath):
+        """
+        Return the set of paths below `dirpath` that have changed since
+        :meth:`watch` was last called for it.
+        """
+        with self.lock:
+            return set(self.changes.get(dirpath, ()))
+
+    def notify(self, path):
+        """
+        Record a change to the file at `path`.
+        """
+        for dirpath in self.watched.keys():
+            if path == dirpath or path.startswith(dirpath.rstrip(os.sep) + os.sep):
+                with self.lock:
+                    self.pending[dirpath] = self.clock()
+                    self.changes.setdefault(dirpath, set()).add(path)
+
+    def poll(self):
+        """
+        Compare the modification times of the files in each watched
+        directory with those seen last time, and record any changes.
+        """
+        for dirpath in self.watched.keys():
+            mtimes = get_mtimes(dirpath)
+            with self.lock:
+                old = self.watched.get(dirpath)
+                if old is None:
+                    continue
+                self.watched[dirpath] = mtimes
+            for path in set(old) | set(mtimes):
+                if old.get(path) != mtimes.get(path):
+                    self.notify(path)
+
+    def _poll(self):
+        """
+        Call :meth:`poll` every `interval` seconds until stopped. Runs in the
+        background thread when inotify is not available.
+        """
+        while not self.stopped.wait(self.interval):
+            self.poll()
+
+
+if pyinotify is not None:
+    class _EventHandler(pyinotify.ProcessEvent):
+        """
+        Passes inotify events on to a :class:`DatabaseWatcher`.
+        """
+
+        def my_init(self, watcher):
+            self.watcher = watcher
+
+        def process_default(self, event):
+            self.watcher.notify(event.pathname)
+
+
+def get_mtimes(dirpath):
+    """
+    Return a dict mapping the path of every file below `dirpath` to its
+    modification time.
+    """
+    mtimes = {}
+    for root, dirs, files in os.walk(dirpath):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                mtimes[path] = os.stat(path).st_mtime
+            except OSError:
+                # File was removed while walking the tree
+                pass
+    return mtimes
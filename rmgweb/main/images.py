@@ -0,0 +1,402 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG Website - A Django-powered website for Reaction Mechanism Generator     #
+#                                                                             #
+# Copyright (c) 2011-2018 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+
+"""
+This module provides the on-disk cache of the structure images drawn by the
+``draw-molecule`` and ``draw-group`` views. Images are stored under a key
+made by hashing everything that determines their content (see
+:meth:`ImageCache.get_key`), so a cached image never goes stale, and the
+key doubles as a strong ETag. The cache is bounded in size by evicting the
+least recently used images.
+
+Pages showing many structures can instead include their SVG images inline,
+once each, as the ``<symbol>`` definitions of a :class:`StructureSprite`
+that every occurrence of a structure refers to with ``<use>``.
+"""
+
+import contextlib
+import errno
+import fcntl
+import hashlib
+import os
+import re
+import StringIO
+import tempfile
+import time
+from cgi import escape
+from collections import OrderedDict
+
+import rmgweb.settings
+
+# The content types of the image formats that structures can be drawn in
+IMAGE_CONTENT_TYPES = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+
+class ImageCache(object):
+    """
+    A content-addressed, size-bounded cache of images on disk. The
+    attributes are:
+
+    =============== ============================================================
+    Attribute       Description
+    =============== ============================================================
+    `path`          The directory the images are stored in
+    `maxsize`       The maximum total size of the images in bytes
+    `touch_age`     How old the access time of an image must be, in seconds, to be updated when it is read
+    =============== ============================================================
+
+    Each image is stored at ``path/ke/key.format``. Its modification time is
+    when it was drawn, and its access time is set when it is read (at most
+    once per `touch_age`), so that the least recently used images can be
+    evicted. The total size of the images is kept in ``path/size``, shared
+    by every process using the cache and only changed under a lock on it.
+    """
+
+    def __init__(self, path, maxsize, touch_age=3600):
+        self.path = path
+        self.maxsize = maxsize
+        self.touch_age = touch_age
+
+    @staticmethod
+    def get_key(*parts):
+        """
+        Return the cache key of the image determined by the given `parts`.
+        """
+        return hashlib.sha1(repr(parts)).hexdigest()
+
+    def get_path(self, key, format):
+        """
+        Return the path of the image with the given `key` and `format`.
+        """
+        return os.path.join(self.path, key[:2], '{0}.{1}'.format(key, format))
+
+    def get_mtime(self, key, format):
+        """
+        Return the time the image with the given `key` and `format` was
+        drawn, or ``None`` if it is not in the cache.
+        """
+        try:
+            return os.stat(self.get_path(key, format)).st_mtime
+        except OSError:
+            return None
+
+    def get(self, key, format):
+        """
+        Return the image with the given `key` and `format`, or ``None`` if it
+        is not in the cache.
+        """
+        path = self.get_path(key, format)
+        try:
+            with open(path, 'rb') as f:
+                # Before reading, which may itself update the access time
+                stat = os.fstat(f.fileno())
+                data = f.read()
+            now = time.time()
+            if now - stat.st_atime > self.touch_age:
+                os.utime(path, (now, stat.st_mtime))
+        except (IOError, OSError):
+            # Not cached, or evicted meanwhile
+            return None
+        return data
+
+    def set(self, key, format, data):
+        """
+        Store the image `data` with the given `key` and `format`, evicting
+        the least recently used images if the cache is then too big.
+        """
+        path = self.get_path(key, format)
+        dirpath = os.path.dirname(path)
+        try:
+            os.makedirs(dirpath)
+        except OSError, e:
+            if e.errno != errno.EEXIST:
+                raise
+        # Write to a temporary file first so that other processes never read a partial image
+        fd, temppath = tempfile.mkstemp(dir=dirpath)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.rename(temppath, path)
+        with self.lock_size() as f:
+            size = self.read_size(f) + len(data)
+            if size > self.maxsize:
+                size = self.evict()
+            self.write_size(f, size)
+
+    @contextlib.contextmanager
+    def lock_size(self):
+        """
+        Return a context manager holding the lock on the size file, which is
+        the open file itself.
+        """
+        try:
+            os.makedirs(self.path)
+        except OSError, e:
+            if e.errno != errno.EEXIST:
+                raise
+        f = os.fdopen(os.open(os.path.join(self.path, 'size'), os.O_RDWR | os.O_CREAT), 'r+')
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            yield f
+        finally:
+            f.close()
+
+    @staticmethod
+    def read_size(f):
+        """
+        Return the total size of the images saved in the open size file `f`.
+        A missing or unreadable size counts as empty; it is corrected the next
+        time images are evicted.
+        """
+        f.seek(0)
+        try:
+            return int(f.read() or 0)
+        except ValueError:
+            return 0
+
+    @staticmethod
+    def write_size(f, size):
+        """
+        Save the total `size` of the images to the open size file `f`.
+        """
+        f.seek(0)
+        f.truncate()
+        f.write(str(size))
+        f.flush()
+
+    def get_size(self):
+        """
+        Return the total size of the images in bytes, as saved in the size
+        file.
+        """
+        with self.lock_size() as f:
+            return self.read_size(f)
+
+    def evict(self):
+        """
+        Delete the least recently used images until the cache uses at most
+        90% of `maxsize`, and return the total size of the images left. The
+        caller must hold the lock on the size file.
+        """
+        files = []
+        for dirpath, dirnames, filenames in os.walk(self.path):
+            if dirpath == self.path:
+                # Only the size file is kept outside the image directories
+                continue
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_atime, stat.st_size, path))
+        size = sum([filesize for atime, filesize, path in files])
+        if size > self.maxsize:
+            files.sort()
+            for atime, filesize, path in files:
+                if size <= 0.9 * self.maxsize:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                size -= filesize
+        return size
+
+################################################################################
+
+# The image cache of the web process, made on first use from the settings
+_image_cache = None
+
+def get_image_cache():
+    """
+    Return the :class:`ImageCache` configured by the ``IMAGE_CACHE_*``
+    settings, or ``None`` if image caching is turned off.
+    """
+    global _image_cache
+    if _image_cache is None and rmgweb.settings.IMAGE_CACHE_PATH:
+        _image_cache = ImageCache(rmgweb.settings.IMAGE_CACHE_PATH, rmgweb.settings.IMAGE_CACHE_SIZE)
+    return _image_cache
+
+
+def get_normalized_adjlist(adjlist):
+    """
+    Return the given `adjlist` with the formatting that does not change the
+    structure it describes removed: leading and trailing whitespace, runs of
+    spaces, and blank lines.
+    """
+    lines = [' '.join(line.split()) for line in adjlist.splitlines()]
+    return '\n'.join([line for line in lines if line])
+
+
+def get_image_key(kind, adjlist, format):
+    """
+    Return the key in the image cache of the `format` image of the `kind`
+    of structure (``'molecule'`` or ``'group'``) with the given `adjlist`.
+    The key includes the RMG-Py version, which determines how structures
+    are drawn.
+    """
+    from rmgpy import __version__
+    return ImageCache.get_key(kind, get_normalized_adjlist(adjlist), format, __version__)
+
+
+def draw_structure(kind, adjlist, format):
+    """
+    Return the `format` image of the `kind` of structure (``'molecule'`` or
+    ``'group'``) with the given `adjlist`, or ``None`` if the adjacency list
+    is invalid.
+    """
+    from rmgpy.molecule import Molecule
+    from rmgpy.molecule.adjlist import InvalidAdjacencyListError
+    from rmgpy.molecule.draw import MoleculeDrawer
+    from rmgpy.molecule.group import Group
+
+    if kind == 'molecule':
+        try:
+            molecule = Molecule().fromAdjacencyList(adjlist)
+        except (InvalidAdjacencyListError, ValueError):
+            return None
+        output = StringIO.StringIO()
+        if format == 'png':
+            surface, _, _ = MoleculeDrawer().draw(molecule, format='png')
+            surface.write_to_png(output)
+        else:
+            MoleculeDrawer().draw(molecule, format='svg', target=output)
+        return output.getvalue()
+    else:
+        try:
+            group = Group().fromAdjacencyList(adjlist)
+        except (InvalidAdjacencyListError, ValueError):
+            return None
+        if format == 'png':
+            return group.draw('png')
+        else:
+            svgdata = group.draw('svg')
+            # Remove the scale and rotate transformations applied by pydot
+            return re.sub(r'scale\(0\.722222 0\.722222\) rotate\(0\) ', '', svgdata)
+
+
+def get_structure_image(kind, adjlist, format):
+    """
+    Return the `format` image of the `kind` of structure with the given
+    `adjlist` from the image cache, drawing and caching it if it is not
+    there yet. Returns ``None`` if the adjacency list is invalid.
+    """
+    cache = get_image_cache()
+    if cache is None:
+        return draw_structure(kind, adjlist, format)
+    key = get_image_key(kind, adjlist, format)
+    data = cache.get(key, format)
+    if data is None:
+        data = draw_structure(kind, adjlist, format)
+        if data is not None:
+            cache.set(key, format, data)
+    return data
+
+
+class StructureSprite(object):
+    """
+    Collects the SVG images of the structures shown on a page, so that they
+    are sent once, inline, as ``<symbol>`` definitions, and every occurrence
+    of a structure refers to its symbol with ``<use>``, rather than the
+    browser requesting each image separately. The attributes are:
+
+    =============== ============================================================
+    Attribute       Description
+    =============== ============================================================
+    `symbols`       The ``<symbol>`` markup of each structure, by identifier
+    `sizes`         The width and height of each symbol, by identifier, or ``None`` if it could not be drawn
+    =============== ============================================================
+
+    The ids within each image are prefixed with the id of its symbol, so
+    that the glyphs and clip paths of different images do not clash.
+    """
+
+    def __init__(self):
+        self.symbols = OrderedDict()
+        self.sizes = {}
+
+    def add(self, kind, identifier, adjlist):
+        """
+        Add the `kind` of structure with the given short `identifier` and
+        `adjlist` to the sprite, if not added before. Returns the width and
+        height of its image, or ``None`` if it cannot be drawn.
+        """
+        if identifier not in self.sizes:
+            self.add_svg(identifier, get_structure_image(kind, adjlist, 'svg'))
+        return self.sizes[identifier]
+
+    def add_svg(self, identifier, data):
+        """
+        Add the SVG image `data` of the structure with the given short
+        `identifier` to the sprite as a symbol. Returns the width and height
+        of the image, or ``None`` if it is not a usable SVG image.
+        """
+        size = None
+        match = re.search(r'<svg\b([^>]*)>(.*)</svg>', data or '', re.DOTALL)
+        if match:
+            attributes = dict(re.findall(r'([\w:]+)="([^"]*)"', match.group(1)))
+            width, height = attributes.get('width'), attributes.get('height')
+            if width and height:
+                size = (width, height)
+                viewbox = attributes.get('viewBox') or '0 0 {0} {1}'.format(
+                    re.match(r'[\d.]*', width).group(), re.match(r'[\d.]*', height).group())
+                symbol_id = 'structure-{0}'.format(identifier)
+                content = match.group(2)
+                content = re.sub(r'\bid="([^"]+)"', r'id="{0}-\1"'.format(symbol_id), content)
+                content = re.sub(r'href="#([^"]+)"', r'href="#{0}-\1"'.format(symbol_id), content)
+                content = re.sub(r'url\(#([^)]+)\)', r'url(#{0}-\1)'.format(symbol_id), content)
+                self.symbols[identifier] = '<symbol id="{0}" viewBox="{1}">{2}</symbol>'.format(symbol_id, viewbox, content)
+        self.sizes[identifier] = size
+        return size
+
+    def get_markup(self, kind, identifier, adjlist, title):
+        """
+        Return the markup that shows the `kind` of structure with the given
+        `identifier` and `adjlist` by referring to its symbol, with the given
+        `title`, or ``None`` if it cannot be drawn.
+        """
+        size = self.add(kind, identifier, adjlist)
+        if size is None:
+            return None
+        return '<svg class="structure" width="{0}" height="{1}" role="img"><title>{2}</title><use xlink:href="#structure-{3}"/></svg>'.format(
+            size[0], size[1], escape(title, True), identifier)
+
+    def render(self):
+        """
+        Return the hidden ``<svg>`` element with the symbol of every
+        structure added to the sprite, to be included once in the page, or an
+        empty string if there are none. It is hidden by giving it no size
+        rather than with ``display: none``, which stops some browsers from
+        drawing the clip paths in the symbols.
+        """
+        if not self.symbols:
+            return ''
+        return '<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" style="position: absolute; width: 0; height: 0; overflow: hidden;">{0}</svg>'.format(
+            ''.join(self.symbols.values()))
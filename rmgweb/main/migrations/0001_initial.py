@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG Website - A Django-powered website for Reaction Mechanism Generator     #
+#                                                                             #
+# Copyright (c) 2011-2018 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserProfile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('organization', models.CharField(max_length=100)),
+                ('website', models.CharField(blank=True, max_length=100)),
+                ('bio', models.TextField(blank=True)),
+                ('energyUnits', models.CharField(choices=[('J/mol', 'J/mol'), ('kJ/mol', 'kJ/mol'), ('cal/mol', 'cal/mol'), ('kcal/mol', 'kcal/mol'), ('cm^-1', 'cm^-1')], default='kcal/mol', max_length=100, verbose_name='Energy units')),
+                ('heatCapacityUnits', models.CharField(choices=[('J/(mol*K)', 'J/mol*K'), ('kJ/(mol*K)', 'kJ/mol*K'), ('cal/(mol*K)', 'cal/mol*K'), ('kcal/(mol*K)', 'kcal/mol*K')], default='cal/(mol*K)', max_length=100, verbose_name='Heat capacity units')),
+                ('rateCoefficientUnits', models.CharField(choices=[('m^3,mol,s', 'm^3, mol, s'), ('cm^3,mol,s', 'cm^3, mol, s'), ('m^3,molecule,s', 'm^3, molecule, s'), ('cm^3,molecule,s', 'cm^3, molecule, s')], default='cm^3,mol,s', max_length=100, verbose_name='Rate coefficient units')),
+                ('temperatureUnits', models.CharField(choices=[('K', 'K')], default='K', max_length=100, verbose_name='Temperature units')),
+                ('pressureUnits', models.CharField(choices=[('Pa', 'Pa'), ('bar', 'bar'), ('atm', 'atm'), ('torr', 'torr')], default='bar', max_length=100, verbose_name='Pressure units')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
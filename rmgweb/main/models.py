@@ -85,3 +85,17 @@ class UserProfile(models.Model):
     rateCoefficientUnits = models.CharField(verbose_name='Rate coefficient units', max_length=100, choices=RATECOEFFICIENT_UNITS, default='cm^3,mol,s')
     temperatureUnits = models.CharField(verbose_name='Temperature units', max_length=100, choices=TEMPERATURE_UNITS, default='K')
     pressureUnits = models.CharField(verbose_name='Pressure units', max_length=100, choices=PRESSURE_UNITS, default='bar')
+
+################################################################################
+
+class StructureIdentifier(models.Model):
+    """
+    A short identifier of a molecule or group structure, used in URLs in
+    place of its adjacency list. Molecules are identified by their augmented
+    InChIKey, so that the same molecule written with a different atom order
+    gets the same identifier; the adjacency list stored is the first one
+    seen. See :func:`rmgweb.main.tools.getStructureIdentifier`.
+    """
+    identifier = models.CharField(max_length=20, primary_key=True)
+    kind = models.CharField(max_length=10)
+    adjlist = models.TextField()
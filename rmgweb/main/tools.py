@@ -28,36 +28,108 @@
 #                                                                             #
 ###############################################################################
 
+import hashlib
 import math
 import numpy
 import re
 import urllib
 
 from django.core.urlresolvers import reverse
+from django.http import Http404
 
 import rmgpy.constants as constants
 from rmgpy.molecule.molecule import Molecule
 from rmgpy.molecule.group import Group
 
+import rmgweb.settings
+from rmgweb.database.cache import LRUCache
+from rmgweb.main.images import get_normalized_adjlist, StructureSprite
+
 ################################################################################
 
+# The identifiers, titles and markup of the structures of the loaded database,
+# by the identity of the structure object and the generation of the loaded
+# database; see memoizeStructure()
+markup_cache = LRUCache('structure-markup', maxsize=50000)
+markup_generation = 0
+
+# The ids of the structure objects (molecules, groups, species and entries) of
+# the loaded database, whose markup is memoized; see setDatabaseStructures()
+database_structures = frozenset()
+
+def memoizeStructure(name, item, function):
+    """
+    Return ``function(item)``. If `item` is one of the structure objects of
+    the loaded database (see :func:`setDatabaseStructures`), the value is
+    remembered under `name` for as long as the loaded database is unchanged
+    (see :func:`invalidateStructureMarkup`). Other objects, such as those
+    made from URLs, are never kept alive by the cache.
+    """
+    if id(item) not in database_structures:
+        return function(item)
+    key = (name, id(item), markup_generation)
+    cached = markup_cache.get(key)
+    # The id of a structure dropped from the database may have been reused
+    if cached is not None and cached[0] is item:
+        return cached[1]
+    value = function(item)
+    markup_cache.store(key, (item, value))
+    return value
+
+def setDatabaseStructures(ids):
+    """
+    Set the structure objects of the loaded database, whose markup is
+    memoized, to those with the given `ids`. The database keeps them alive,
+    so memoizing them does not hold on to anything else.
+    """
+    global database_structures
+    database_structures = frozenset(ids)
+
+def addDatabaseStructures(ids):
+    """
+    Add the structure objects with the given `ids` (e.g. those of a kinetics
+    family loaded lazily) to the structure objects of the loaded database.
+    """
+    global database_structures
+    database_structures = database_structures.union(ids)
+
+def invalidateStructureMarkup():
+    """
+    Forget the memoized identifiers, titles and markup of all structures,
+    which must be done whenever the loaded database changes or structures
+    in it are modified.
+    """
+    global markup_generation
+    markup_generation += 1
+    markup_cache.clear()
+
 def moleculeToAdjlist(molecule):
     """
     Convert a given :class:`Molecule` object `molecule` to a string 
     representation of its structure suitable for a URL.
     """
-    mol = molecule.copy(deep=True)
-    mol.clearLabeledAtoms()
-    adjlist = mol.toAdjacencyList(removeH=False)
-    return adjlist
+    return memoizeStructure('adjlist', molecule, getUnlabeledAdjlist)
 
-def moleculeToInfo(molecule):
+def getUnlabeledAdjlist(item):
+    """
+    Return the adjacency list of the :class:`Molecule` or :class:`Group`
+    `item`, including hydrogen atoms, without atom labels. The item is only
+    copied if it has labeled atoms to clear.
+    """
+    if any([atom.label for atom in item.atoms]):
+        item = item.copy(deep=True)
+        item.clearLabeledAtoms()
+    return item.toAdjacencyList(removeH=False)
+
+def moleculeToInfo(molecule, sprite=None):
     """
     Creates an html rendering which includes molecule structure image but
-    also allows you to click on it to enter a molecule info page.
+    also allows you to click on it to enter a molecule info page. If a
+    :class:`StructureSprite` is given, the image refers to its symbol in
+    the `sprite`.
     """
-    href = reverse('database:molecule-entry', kwargs={'adjlist': molecule.toAdjacencyList()})
-    structureMarkup = getStructureMarkup(molecule)
+    href = getStructureURL(molecule, 'database:molecule-entry-id')
+    structureMarkup = getStructureMarkup(molecule, sprite)
     markup = '<a href="'+ href + '">' + structureMarkup + '</a>'
     return markup
 
@@ -70,6 +142,26 @@ def moleculeFromURL(adjlist):
     molecule = Molecule().fromAdjacencyList(adjlist)
     return molecule
 
+def moleculeFromIdentifier(identifier):
+    """
+    Convert a given species `identifier` to the corresponding
+    :class:`Molecule` object. The identifier may be an InChI, an adjacency
+    list (with semicolons in place of newlines, as in URLs) or a SMILES
+    string. A :class:`ValueError` is raised if it cannot be parsed.
+    """
+    identifier = str(identifier).strip()
+    molecule = Molecule()
+    try:
+        if identifier.startswith('InChI=1'):
+            molecule.fromInChI(identifier)
+        elif '{' in identifier or ';' in identifier or '\n' in identifier:
+            molecule.fromAdjacencyList(identifier.replace(';', '\n'))
+        else:
+            molecule.fromSMILES(identifier)
+    except Exception, e:
+        raise ValueError('Invalid species identifier "{0}": {1!s}'.format(identifier, e))
+    return molecule
+
 ################################################################################
 
 def groupToURL(group):
@@ -77,18 +169,17 @@ def groupToURL(group):
     Convert a given :class:`Group` object `group` to a string 
     representation of its structure suitable for a URL.
     """
-    gro = group.copy(deep=True)
-    gro.clearLabeledAtoms()
-    adjlist = gro.toAdjacencyList(removeH=False)
-    return adjlist
+    return getUnlabeledAdjlist(group)
 
-def groupToInfo(group):
+def groupToInfo(group, sprite=None):
     """
     Creates an html rendering which includes group structure image but
-    also allows you to click on it to enter a group info page.
+    also allows you to click on it to enter a group info page. If a
+    :class:`StructureSprite` is given, the image refers to its symbol in
+    the `sprite`.
     """
-    href = reverse('database:group-entry', kwargs={'adjlist': group.toAdjacencyList()})
-    structureMarkup = getStructureMarkup(group)
+    href = getStructureURL(group, 'database:group-entry-id')
+    structureMarkup = getStructureMarkup(group, sprite)
     markup = '<a href="'+ href + '">' + structureMarkup + '</a>'
     return markup
 
@@ -103,11 +194,195 @@ def groupFromURL(adjlist):
 
 ################################################################################
 
-def getStructureInfo(object):
+# The kind and adjacency list of each structure, by short identifier
+structure_cache = LRUCache('structures', maxsize=10000)
+
+def getStructureData(item):
+    """
+    Return the kind (``'molecule'`` or ``'group'``), short identifier and
+    adjacency list of the given :class:`Molecule` or :class:`Group`. The
+    identifier does not depend on the order of the atoms: molecules are
+    identified by a hash of their augmented InChIKey, and groups (and
+    molecules without an InChI) by a hash of their adjacency list with the
+    atoms in canonical order (see :func:`getCanonicalAdjlist`).
+    """
+    return memoizeStructure('data', item, makeStructureData)
+
+def makeStructureData(item):
+    """
+    Return the kind, short identifier and adjacency list of the given
+    structure as :func:`getStructureData` does, without memoizing them.
+    """
+    if isinstance(item, Group):
+        kind = 'group'
+        adjlist = item.toAdjacencyList()
+        basis = getCanonicalAdjlist(item)
+    else:
+        kind = 'molecule'
+        adjlist = getUnlabeledAdjlist(item)
+        try:
+            basis = item.toAugmentedInChIKey()
+        except Exception:
+            basis = getCanonicalAdjlist(item)
+    identifier = hashlib.sha1(repr((kind, basis))).hexdigest()[:20]
+    return kind, identifier, adjlist
+
+def getCanonicalAdjlist(item):
+    """
+    Return the adjacency list of the :class:`Molecule` or :class:`Group`
+    `item` with its atoms in canonical order: sorted by RMG's connectivity
+    values (see :meth:`Graph.sortVertices`), with ties broken by the atom
+    types, electrons and labels of the atoms. The item is not modified.
+    """
+    item = item.copy(deep=True)
+    item.sortVertices()
+    def getSortingKey(atom):
+        if isinstance(item, Group):
+            atomType = sorted([atomType.label for atomType in atom.atomType])
+            return (-atom.connectivity1, -atom.connectivity2, -atom.connectivity3, atomType,
+                    sorted(atom.radicalElectrons), sorted(atom.charge), atom.label)
+        return (-atom.connectivity1, -atom.connectivity2, -atom.connectivity3, atom.symbol,
+                atom.radicalElectrons, atom.charge, atom.label)
+    item.vertices.sort(key=getSortingKey)
+    if isinstance(item, Group):
+        return get_normalized_adjlist(item.toAdjacencyList())
+    return get_normalized_adjlist(item.toAdjacencyList(removeH=False))
+
+def getStructureIdentifier(item):
+    """
+    Return the short identifier of the given :class:`Molecule` or
+    :class:`Group` used in URLs in place of its adjacency list, registering
+    it so that it can be looked up by :func:`getStructureAdjlist`.
+    """
+    kind, identifier, adjlist = getStructureData(item)
+    registerStructure(kind, identifier, adjlist)
+    return identifier
+
+def registerStructure(kind, identifier, adjlist):
+    """
+    Make sure the structure with the given short `identifier` is in the
+    database, storing the `kind` and `adjlist` given if it is new. The
+    first adjacency list seen for an identifier is the one that is kept.
+    """
+    from rmgweb.main.models import StructureIdentifier
+
+    if structure_cache.get(identifier) is None:
+        structure, created = StructureIdentifier.objects.get_or_create(identifier=identifier,
+                                                                       defaults={'kind': kind, 'adjlist': adjlist})
+        structure_cache.store(identifier, (structure.kind, structure.adjlist))
+
+def registerStructures(structures):
+    """
+    Register the given `structures`, a list of ``(kind, identifier,
+    adjlist)`` tuples as returned by :func:`getStructureData`, in bulk, as
+    :func:`registerStructure` does for one. Returns the list of the
+    structures with the adjacency lists stored for their identifiers, which
+    are the ones their images are drawn from.
+    """
+    from django.db import IntegrityError, transaction
+    from rmgweb.main.models import StructureIdentifier
+
+    structures = dict([(identifier, (kind, adjlist)) for kind, identifier, adjlist in structures])
+    identifiers = sorted(structures)
+    stored = []
+    # Keep each query within the limit on the number of SQLite parameters
+    for start in range(0, len(identifiers), 500):
+        chunk = identifiers[start:start + 500]
+        existing = dict([(identifier, (kind, adjlist)) for identifier, kind, adjlist in
+                         StructureIdentifier.objects.filter(identifier__in=chunk).values_list('identifier', 'kind', 'adjlist')])
+        missing = [StructureIdentifier(identifier=identifier, kind=structures[identifier][0], adjlist=structures[identifier][1])
+                   for identifier in chunk if identifier not in existing]
+        if missing:
+            try:
+                with transaction.atomic():
+                    StructureIdentifier.objects.bulk_create(missing)
+            except IntegrityError:
+                # Another process registered some of them meanwhile
+                for structure in missing:
+                    structure, created = StructureIdentifier.objects.get_or_create(identifier=structure.identifier,
+                        defaults={'kind': structure.kind, 'adjlist': structure.adjlist})
+                    existing[structure.identifier] = (structure.kind, structure.adjlist)
+        for identifier in chunk:
+            kind, adjlist = existing.get(identifier, structures[identifier])
+            stored.append((kind, identifier, adjlist))
+    return stored
+
+def getStructureAdjlist(kind, identifier):
+    """
+    Return the adjacency list of the `kind` of structure (``'molecule'`` or
+    ``'group'``) with the given short `identifier`, or ``None`` if there is
+    none.
+    """
+    from rmgweb.main.models import StructureIdentifier
+
+    cached = structure_cache.get(identifier)
+    if cached is None:
+        try:
+            structure = StructureIdentifier.objects.get(identifier=identifier)
+        except StructureIdentifier.DoesNotExist:
+            return None
+        cached = (structure.kind, structure.adjlist)
+        structure_cache.store(identifier, cached)
+    return cached[1] if cached[0] == kind else None
+
+def getStructureURL(item, name):
+    """
+    Return the URL of the view with the given `name` (e.g.
+    ``'draw-molecule-id'``) that takes the short identifier of the
+    :class:`Molecule` or :class:`Group` `item`.
+    """
+    return reverse(name, kwargs={'identifier': getStructureIdentifier(item)})
+
+def getMoleculeTitle(molecule):
+    """
+    Return the short description of the given `molecule` used as the title
+    of its image: its SMILES string, or its formula if it has none.
+    """
+    return memoizeStructure('title', molecule, makeMoleculeTitle)
+
+def makeMoleculeTitle(molecule):
+    """
+    Return the title of the given `molecule` as :func:`getMoleculeTitle`
+    does, without memoizing it.
+    """
+    try:
+        return molecule.toSMILES()
+    except Exception:
+        return molecule.getFormula()
+
+def structureIdentifierView(kind, view):
+    """
+    Return a view that takes the short `identifier` of a `kind` of structure
+    in place of the URL-quoted adjacency list taken by the given `view`.
+    """
+    def wrapper(request, identifier, *args, **kwargs):
+        adjlist = getStructureAdjlist(kind, identifier)
+        if adjlist is None:
+            raise Http404
+        return view(request, urllib.quote(adjlist), *args, **kwargs)
+    wrapper.__name__ = view.__name__
+    wrapper.__doc__ = view.__doc__
+    return wrapper
+
+################################################################################
+
+def getStructureInfo(object, sprite=None):
     """ 
     Convert either a Entry, Molecule, Species, or Group object to its html 
     markup containing a clickable image of the group or molecule that contains 
-    a link to its information page.
+    a link to its information page. If a :class:`StructureSprite` is given,
+    the image refers to its symbol in the `sprite` (see
+    :func:`getStructureSprite`). Otherwise the markup is memoized for the
+    object.
+    """
+    if sprite is None:
+        return memoizeStructure('info', object, makeStructureInfo)
+    return makeStructureInfo(object, sprite)
+
+def makeStructureInfo(object, sprite=None):
+    """
+    Return the markup of the given object as :func:`getStructureInfo` does,
+    without memoizing it.
     """
     from rmgpy.data.base import Entry, LogicNode, LogicOr, LogicAnd
     from rmgpy.species import Species
@@ -116,11 +391,11 @@ def getStructureInfo(object):
         object = object.item
         
     if isinstance(object, Molecule):
-        return moleculeToInfo(object)
+        return moleculeToInfo(object, sprite)
     elif isinstance(object, Species):
-        return moleculeToInfo(object.molecule[0])
+        return moleculeToInfo(object.molecule[0], sprite)
     elif isinstance(object, Group):
-        return groupToInfo(object)
+        return groupToInfo(object, sprite)
     elif isinstance(object, (LogicNode, LogicOr, LogicAnd)):
         return str(object)
     else:
@@ -143,39 +418,75 @@ def getLaTeXScientificNotation(value):
 
 ################################################################################
 
-def getStructureMarkup(item):
+def getStructureMarkup(item, sprite=None):
     """
     Return the HTML used to markup structure information for the given `item`.
     For a :class:`Molecule`, the markup is an ``<img>`` tag so that we can
     draw the molecule. For a :class:`Group`, the markup is the
-    adjacency list, wrapped in ``<pre>`` tags.
+    adjacency list, wrapped in ``<pre>`` tags. If a :class:`StructureSprite`
+    is given, molecules and groups are drawn by referring to their symbol in
+    the `sprite` instead of with an ``<img>`` tag. Otherwise the markup is
+    memoized for the item.
+    """
+    if sprite is None:
+        return memoizeStructure('markup', item, makeStructureMarkup)
+    return makeStructureMarkup(item, sprite)
+
+def makeStructureMarkup(item, sprite=None):
+    """
+    Return the markup of the given `item` as :func:`getStructureMarkup`
+    does, without memoizing it.
     """
     from rmgpy.molecule.molecule import Molecule
     from rmgpy.molecule.group import Group
     from rmgpy.species import Species
-    import urllib
     
     if isinstance(item, Molecule):
         # We can draw Molecule objects, so use that instead of an adjacency list
-        adjlist = item.toAdjacencyList(removeH=False)
-        url = urllib.quote(adjlist)
-        structure = '<img src="{0}" alt="{1}" title="{1}"/>'.format(reverse('draw-molecule', kwargs={'adjlist': url}), adjlist)
+        structure = getImageMarkup('molecule', item, getMoleculeTitle(item), sprite)
     elif isinstance(item, Species) and len(item.molecule) > 0:
         # We can draw Species objects, so use that instead of an adjacency list
-        adjlist = item.molecule[0].toAdjacencyList(removeH=False)
-        url = urllib.quote(adjlist)
-        structure = '<img src="{0}" alt="{1}" title="{1}"/>'.format(reverse('draw-molecule', kwargs={'adjlist': url}), item.label)
+        structure = getImageMarkup('molecule', item.molecule[0], item.label, sprite)
     elif isinstance(item, Species) and len(item.molecule) == 0:
         # We can draw Species objects, so use that instead of an adjacency list
         structure = item.label
     elif isinstance(item, Group):
         # We can draw Group objects, so use that instead of an adjacency list
         adjlist = item.toAdjacencyList()
-        url = urllib.quote(adjlist)
-        structure = '<img src="{0}" alt="{1}" title="{1}" />'.format(reverse('draw-group', kwargs={'adjlist': url}), adjlist)
+        structure = getImageMarkup('group', item, adjlist, sprite)
         #structure += '<pre style="font-size:small;" class="adjacancy_list">{0}</pre>'.format(adjlist)
     elif isinstance(item, str) or isinstance(item, unicode):
         structure = item
     else:
         structure = ''
     return structure
+
+def getImageMarkup(kind, item, title, sprite=None):
+    """
+    Return the markup of the image of the `kind` of structure (``'molecule'``
+    or ``'group'``) `item` with the given `title`: an ``<img>`` tag, or a
+    reference to its symbol in the `sprite` if one is given.
+    """
+    if sprite is not None:
+        # The image is drawn from the adjacency list stored for the identifier
+        identifier = getStructureIdentifier(item)
+        markup = sprite.get_markup(kind, identifier, getStructureAdjlist(kind, identifier), title)
+        if markup is not None:
+            return markup
+    url = getStructureURL(item, 'draw-{0}-id'.format(kind))
+    return '<img src="{0}" alt="{1}" title="{1}"/>'.format(url, title)
+
+def getStructureSprite(request):
+    """
+    Return a new :class:`StructureSprite` to collect the structures shown on
+    the page requested by `request`, or ``None`` if they should be drawn as
+    separate images. Views that support sprites inline the images when
+    requested with ``sprite=1``, or by default if ``STRUCTURE_SPRITES`` is
+    set; ``sprite=0`` turns them off.
+    """
+    value = request.GET.get('sprite')
+    if value is None:
+        enabled = rmgweb.settings.STRUCTURE_SPRITES
+    else:
+        enabled = value.lower() not in ('', '0', 'false', 'no', 'off')
+    return StructureSprite() if enabled else None
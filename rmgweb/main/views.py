@@ -28,6 +28,7 @@
 #                                                                             #
 ###############################################################################
 
+import datetime
 import re
 import os
 import urllib
@@ -43,8 +44,13 @@ from django.http import HttpResponse, HttpResponseRedirect, HttpResponseNotFound
 from django.shortcuts import render
 from django.template import RequestContext, loader
 from django.templatetags.static import static
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, quote_etag
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
 
+import rmgweb.settings
+from rmgweb.main.images import draw_structure, get_image_cache, get_image_key, IMAGE_CONTENT_TYPES
 from .forms import *
 
 def index(request):
@@ -295,62 +301,75 @@ def cactusResolver(request, query):
     response = f.read()
     return HttpResponse(response, content_type="text/plain")
     
-def drawMolecule(request, adjlist, format='png'):
+def getImageKey(kind, adjlist, format):
     """
-    Returns an image of the provided adjacency list `adjlist` for a molecule.
-    urllib is used to quote/unquote the adjacency list.
+    Return the key in the image cache of the `format` image of the `kind`
+    of structure (``'molecule'`` or ``'group'``) with the given `adjlist`
+    (as quoted in the URL), or ``None`` if images are not cached.
     """
-    from rmgpy.molecule import Molecule
-    from rmgpy.molecule.draw import MoleculeDrawer
-    from rmgpy.molecule.adjlist import InvalidAdjacencyListError
-
-    adjlist = str(urllib.unquote(adjlist))
-
-    try:
-        molecule = Molecule().fromAdjacencyList(adjlist)
-    except (InvalidAdjacencyListError, ValueError):
-        response = HttpResponseRedirect(static('img/invalid_icon.png'))
-    else:
-        if format == 'png':
-            response = HttpResponse(content_type="image/png")
-            surface, _, _ = MoleculeDrawer().draw(molecule, format='png')
-            surface.write_to_png(response)
-        elif format == 'svg':
-            response = HttpResponse(content_type="image/svg+xml")
-            MoleculeDrawer().draw(molecule, format='svg', target=response)
-        else:
-            response = HttpResponse('Image format not implemented.', status=501)
+    if get_image_cache() is None:
+        return None
+    return get_image_key(kind, str(urllib.unquote(adjlist)), format)
 
+def getImageLastModified(kind, adjlist, format):
+    """
+    Return the time the cached image of :func:`getImageKey` was drawn, or
+    ``None`` if it is not cached.
+    """
+    key = getImageKey(kind, adjlist, format)
+    if key is not None:
+        mtime = get_image_cache().get_mtime(key, format)
+        if mtime is not None:
+            return datetime.datetime.utcfromtimestamp(mtime)
+    return None
+
+def drawImage(kind, adjlist, format):
+    """
+    Return the response to a request for the `format` image of the `kind`
+    of structure with the given `adjlist`, serving it from the image cache
+    if possible, and drawing it otherwise.
+    """
+    if format not in IMAGE_CONTENT_TYPES:
+        return HttpResponse('Image format not implemented.', status=501)
+
+    cache = get_image_cache()
+    key = getImageKey(kind, adjlist, format)
+    data = cache.get(key, format) if key is not None else None
+    if data is None:
+        data = draw_structure(kind, str(urllib.unquote(adjlist)), format)
+        if data is None:
+            return HttpResponseRedirect(static('img/invalid_icon.png'))
+        if key is not None:
+            cache.set(key, format, data)
+
+    response = HttpResponse(data, content_type=IMAGE_CONTENT_TYPES[format])
+    if key is not None:
+        # The image for a key never changes, so it can be cached indefinitely
+        response['ETag'] = quote_etag(key)
+        response['Last-Modified'] = http_date(cache.get_mtime(key, format))
+        patch_cache_control(response, public=True, max_age=rmgweb.settings.IMAGE_CACHE_MAX_AGE)
     return response
 
+@condition(etag_func=lambda request, adjlist, format='png': getImageKey('molecule', adjlist, format),
+           last_modified_func=lambda request, adjlist, format='png': getImageLastModified('molecule', adjlist, format))
+def drawMolecule(request, adjlist, format='png'):
+    """
+    Returns an image of the provided adjacency list `adjlist` for a molecule.
+    urllib is used to quote/unquote the adjacency list. Images are cached,
+    and requests for images the browser already has are answered with 304.
+    """
+    return drawImage('molecule', adjlist, format)
+
+@condition(etag_func=lambda request, adjlist, format='png': getImageKey('group', adjlist, format),
+           last_modified_func=lambda request, adjlist, format='png': getImageLastModified('group', adjlist, format))
 def drawGroup(request, adjlist, format='png'):
     """
     Returns an image of the provided adjacency list `adjlist` for a molecular
-    group.  urllib is used to quote/unquote the adjacency list.
+    group.  urllib is used to quote/unquote the adjacency list. Images are
+    cached, and requests for images the browser already has are answered
+    with 304.
     """
-    from rmgpy.molecule.group import Group
-    from rmgpy.molecule.adjlist import InvalidAdjacencyListError
-
-    adjlist = str(urllib.unquote(adjlist))
-
-    try:
-        group = Group().fromAdjacencyList(adjlist)
-    except (InvalidAdjacencyListError, ValueError):
-        response = HttpResponseRedirect(static('img/invalid_icon.png'))
-    else:
-        if format == 'png':
-            response = HttpResponse(content_type="image/png")
-            response.write(group.draw('png'))
-        elif format == 'svg':
-            response = HttpResponse(content_type="image/svg+xml")
-            svgdata = group.draw('svg')
-            # Remove the scale and rotate transformations applied by pydot
-            svgdata = re.sub(r'scale\(0\.722222 0\.722222\) rotate\(0\) ', '', svgdata)
-            response.write(svgdata)
-        else:
-            response = HttpResponse('Image format not implemented.', status=501)
-
-    return response
+    return drawImage('group', adjlist, format)
 
 @login_required
 def restartWSGI(request):
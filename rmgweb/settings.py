@@ -32,6 +32,7 @@
 The Django settings for the RMG website.
 """
 
+import multiprocessing
 import os.path
 
 # Secret and per-configuration settings
@@ -168,3 +169,139 @@ INSTALLED_APPS = (
 # Settings relating to user account management
 LOGIN_URL = '/login'
 LOGIN_REDIRECT_URL = '/'
+
+# Binary snapshot of the loaded RMG database, used to warm-start new web
+# processes. The snapshot is only restored while the RMG-database commit and
+# file modification times are unchanged since it was written.
+# Set to None to always parse the database from source.
+DATABASE_SNAPSHOT_PATH = os.path.join(os.path.dirname(PROJECT_PATH), 'database', 'snapshot', 'rmgdatabase.pkl')
+
+# How RMGWebDatabase notices changes to the RMG database files: 'inotify'
+# (falls back to 'poll' if pyinotify is not installed), 'poll', or None to
+# scan the database directories on every request. Changes are only acted on
+# once the files have been quiet for DATABASE_WATCHER_DEBOUNCE seconds.
+DATABASE_WATCHER = 'inotify'
+DATABASE_WATCHER_INTERVAL = 5.0
+DATABASE_WATCHER_DEBOUNCE = 2.0
+
+# Whether changes to the RMG database files noticed while serving a request
+# are reloaded in a background thread (the request is then answered from the
+# previously loaded database) instead of blocking the request
+DATABASE_BACKGROUND_RELOAD = True
+
+# Whether kinetics families are only loaded and trained when first accessed,
+# rather than all at once when the kinetics database is loaded
+DATABASE_LAZY_FAMILIES = True
+
+# The number of worker processes used to parse the RMG database when more
+# than one part of it needs loading. The workers are forked from the loading
+# process, which in a threaded web server may hold locks (e.g. of logging or
+# database connections) that would then never be released in the workers, so
+# the default of 1 loads in the web process only. Raise it only for web
+# servers that load the database before starting any threads; the
+# 'snapshotdatabase' command loads in parallel by itself (see --processes).
+DATABASE_LOAD_PROCESSES = 1
+
+# The number of generated reaction lists, and of species thermo results, kept
+# in memory by each web process. They are also stored in the 'reactions' and
+# 'thermo' caches below, shared by all processes, and are keyed by the loaded
+# version of the database.
+REACTION_CACHE_SIZE = 256
+THERMO_CACHE_SIZE = 2048
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'reactions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(os.path.dirname(PROJECT_PATH), 'cache', 'reactions'),
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    'thermo': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(os.path.dirname(PROJECT_PATH), 'cache', 'thermo'),
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    },
+    'batch': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(os.path.dirname(PROJECT_PATH), 'cache', 'batch'),
+    },
+}
+
+# The number of worker processes used to generate reactions from the kinetics
+# families. Each worker is forked from the web process with a copy of the
+# loaded database, so this multiplies its memory use; set to 1 to generate
+# reactions in the web process only.
+REACTION_GENERATION_PROCESSES = 1
+
+# The number of worker processes used by the batch views (e.g. kinetics/batch)
+# of the database app. Like the reaction generation workers, they are forked
+# from the web process with a copy of the loaded database, and they are shared
+# by all batch requests to the process, so this also caps how much work the
+# batch views can do at once.
+BATCH_PROCESSES = min(2, multiprocessing.cpu_count())
+
+# The number of batch requests that each client address (BATCH_RATE_LIMIT) and
+# each logged-in user (BATCH_USER_RATE_LIMIT) may make per BATCH_RATE_PERIOD
+# seconds; further requests get a 429 response. The requests are counted in the
+# 'batch' cache above, shared by all processes. Set a limit to None to allow
+# any number of requests. Scripts may POST to the batch views without a CSRF
+# token, but POSTs from logged-in users must pass the CSRF check.
+BATCH_RATE_LIMIT = 20
+BATCH_USER_RATE_LIMIT = 200
+BATCH_RATE_PERIOD = 60 * 60
+
+# The number of reverse proxies in front of the web server that append the
+# address of the client to the X-Forwarded-For header. Clients are told apart
+# by the address seen by the outermost proxy, or by REMOTE_ADDR if this is 0.
+TRUSTED_PROXY_COUNT = 0
+
+# The RMG-Java PopulateReactions service queried for kinetics estimated by
+# RMG-Java. The 'legacy' protocol is that of the original server, which takes
+# one request per connection; the 'framed' protocol keeps up to
+# RMG_JAVA_POOL_SIZE connections open and reuses them. Requests that fail
+# are retried RMG_JAVA_RETRIES times, after RMG_JAVA_RETRY_DELAY seconds,
+# doubling each time. If RMG_JAVA_RECORD_PATH is set, every request and
+# response is saved there, to be replayed by 'manage.py replayrmgjava'.
+RMG_JAVA_HOST = 'localhost'
+RMG_JAVA_PORT = 5000
+RMG_JAVA_PROTOCOL = 'legacy'
+RMG_JAVA_POOL_SIZE = 4
+RMG_JAVA_TIMEOUT = 10.0
+RMG_JAVA_RETRIES = 3
+RMG_JAVA_RETRY_DELAY = 0.5
+RMG_JAVA_RECORD_PATH = None
+
+# Where the molecule and group images drawn by the website are cached, and
+# the maximum total size of the cached images in bytes. The least recently
+# used images are deleted when the cache grows beyond this. The images are
+# served to be cached by browsers and proxies for IMAGE_CACHE_MAX_AGE
+# seconds. Set IMAGE_CACHE_PATH to None to draw every image on request.
+IMAGE_CACHE_PATH = os.path.join(os.path.dirname(PROJECT_PATH), 'cache', 'images')
+IMAGE_CACHE_SIZE = 512 * 1024 * 1024
+IMAGE_CACHE_MAX_AGE = 365 * 24 * 60 * 60
+
+# The images of every molecule and group in the RMG database are drawn into the
+# image cache by running 'manage.py prerenderimages' after a deploy. The
+# progress is saved to PRERENDER_STATUS_PATH and shown to staff at
+# database/prerender. Set PRERENDER_IMAGES to also have each web process draw
+# them in the background after loading the database, using PRERENDER_PROCESSES
+# worker processes forked from the web process; only one process pre-renders
+# at a time, but forking from a threaded server can deadlock.
+PRERENDER_IMAGES = False
+PRERENDER_PROCESSES = 1
+PRERENDER_STATUS_PATH = os.path.join(os.path.dirname(PROJECT_PATH), 'cache', 'prerender.json')
+
+# Whether pages listing many structures (e.g. the tables of kinetics rules and
+# depositories) include their SVG images inline, once each, rather than as
+# separate images that the browser requests one by one. Either way can be
+# chosen per request with '?sprite=1' or '?sprite=0'; compare the two with
+# 'manage.py benchmarksprites'.
+STRUCTURE_SPRITES = False
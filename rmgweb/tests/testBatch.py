@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG Website - A Django-powered website for Reaction Mechanism Generator     #
+#                                                                             #
+# Copyright (c) 2011-2018 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import TestCase
+from django.test.client import RequestFactory
+
+import rmgweb.settings
+from rmgweb.database.batch import batchView, getClientAddress, isBatchRateLimited
+
+class BatchRateLimitTest(TestCase):
+
+    def setUp(self):
+        self.settings = (rmgweb.settings.BATCH_RATE_LIMIT, rmgweb.settings.BATCH_USER_RATE_LIMIT,
+                         rmgweb.settings.TRUSTED_PROXY_COUNT)
+        rmgweb.settings.BATCH_RATE_LIMIT = 2
+        rmgweb.settings.BATCH_USER_RATE_LIMIT = 4
+        rmgweb.settings.TRUSTED_PROXY_COUNT = 0
+        caches['batch'].clear()
+        self.user = User.objects.create_user('batch', 'batch@example.com', 'password')
+
+    def tearDown(self):
+        (rmgweb.settings.BATCH_RATE_LIMIT, rmgweb.settings.BATCH_USER_RATE_LIMIT,
+         rmgweb.settings.TRUSTED_PROXY_COUNT) = self.settings
+        caches['batch'].clear()
+
+    def get_request(self, user=None, **kwargs):
+        request = RequestFactory().post('/database/kinetics/batch/', **kwargs)
+        request.user = user or AnonymousUser()
+        return request
+
+    def test_anonymous(self):
+        """
+        Test that clients that are not logged in are limited to BATCH_RATE_LIMIT requests per address
+        """
+        request = self.get_request(REMOTE_ADDR='10.0.0.1')
+        self.assertFalse(isBatchRateLimited(request))
+        self.assertFalse(isBatchRateLimited(request))
+        self.assertTrue(isBatchRateLimited(request))
+        self.assertFalse(isBatchRateLimited(self.get_request(REMOTE_ADDR='10.0.0.2')))
+
+    def test_logged_in(self):
+        """
+        Test that logged-in users are limited to BATCH_USER_RATE_LIMIT requests
+        """
+        request = self.get_request(self.user, REMOTE_ADDR='10.0.0.1')
+        for i in range(4):
+            self.assertFalse(isBatchRateLimited(request))
+        self.assertTrue(isBatchRateLimited(request))
+
+    def test_client_address(self):
+        """
+        Test that the client address is taken from X-Forwarded-For only behind trusted proxies
+        """
+        request = self.get_request(REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='1.2.3.4, 192.168.0.7')
+        self.assertEqual(getClientAddress(request), '10.0.0.1')
+        rmgweb.settings.TRUSTED_PROXY_COUNT = 1
+        self.assertEqual(getClientAddress(request), '192.168.0.7')
+        rmgweb.settings.TRUSTED_PROXY_COUNT = 2
+        self.assertEqual(getClientAddress(request), '1.2.3.4')
+
+    def test_csrf(self):
+        """
+        Test that POSTs without a CSRF token are only accepted from clients that are not logged in
+        """
+        view = batchView(lambda request: HttpResponse('done'))
+        self.assertEqual(view(self.get_request(REMOTE_ADDR='10.0.0.1')).status_code, 200)
+        self.assertEqual(view(self.get_request(self.user, REMOTE_ADDR='10.0.0.1')).status_code, 403)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG Website - A Django-powered website for Reaction Mechanism Generator     #
+#                                                                             #
+# Copyright (c) 2011-2018 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+
+import os
+
+from django.test import TestCase
+
+import rmgweb.settings
+from rmgweb.database.tools import RMGWebDatabase
+
+class DatabaseLoadTest(TestCase):
+
+    def setUp(self):
+        self.settings = (rmgweb.settings.DATABASE_WATCHER, rmgweb.settings.DATABASE_LOAD_PROCESSES,
+                         rmgweb.settings.DATABASE_SNAPSHOT_PATH)
+        rmgweb.settings.DATABASE_WATCHER = None
+        rmgweb.settings.DATABASE_LOAD_PROCESSES = 1
+        rmgweb.settings.DATABASE_SNAPSHOT_PATH = None
+
+    def tearDown(self):
+        (rmgweb.settings.DATABASE_WATCHER, rmgweb.settings.DATABASE_LOAD_PROCESSES,
+         rmgweb.settings.DATABASE_SNAPSHOT_PATH) = self.settings
+
+    def test_reload_solvation(self):
+        """
+        Test that reloading the solvation database leaves the live copy untouched until it is swapped in
+        """
+        database = RMGWebDatabase()
+        database.load('solvation')
+        solvation = database.solvation
+        solvents = dict(solvation.libSolvent.entries)
+        solutes = dict(solvation.libSolute.entries)
+        self.assertGreater(len(solvents), 0)
+
+        # Forget the timestamps so that the whole directory is reloaded
+        dirpath = os.path.join(rmgweb.settings.DATABASE_PATH, 'solvation')
+        database.timestamps = dict([(path, mtime) for path, mtime in database.timestamps.items()
+                                    if not path.startswith(dirpath)])
+        database.load('solvation')
+
+        self.assertIsNot(database.solvation, solvation)
+        self.assertIsNot(database.solvation.libSolvent, solvation.libSolvent)
+        self.assertEqual(solvation.libSolvent.entries, solvents)
+        self.assertEqual(solvation.libSolute.entries, solutes)
+        self.assertEqual(sorted(database.solvation.libSolvent.entries), sorted(solvents))
+
+    def test_parallel_load(self):
+        """
+        Test that loading in worker processes gives the same solvent and solute libraries as loading here
+        """
+        serial = RMGWebDatabase()
+        serial.load('solvation')
+        serial.load('statmech')
+
+        parallel = RMGWebDatabase()
+        parallel.load_parallel([os.path.join(rmgweb.settings.DATABASE_PATH, 'solvation'),
+                                os.path.join(rmgweb.settings.DATABASE_PATH, 'statmech')], 2)
+        for name in ['libSolvent', 'libSolute']:
+            entries = getattr(parallel.solvation, name).entries
+            self.assertGreater(len(entries), 0)
+            self.assertEqual(sorted(entries), sorted(getattr(serial.solvation, name).entries))
+        self.assertEqual(sorted(parallel.statmech.groups), sorted(serial.statmech.groups))
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG Website - A Django-powered website for Reaction Mechanism Generator     #
+#                                                                             #
+# Copyright (c) 2011-2018 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase
+
+from rmgweb.database.watcher import DatabaseWatcher
+
+
+class DatabaseWatcherTest(TestCase):
+
+    def setUp(self):
+        self.dirpath = tempfile.mkdtemp()
+        self.path = os.path.join(self.dirpath, 'library.py')
+        with open(self.path, 'w') as f:
+            f.write('entry()\n')
+        # The changes are found by calling poll() at times set by the test,
+        # rather than by the background thread, which never gets to poll
+        self.now = 1000.0
+        self.watcher = DatabaseWatcher(mode='poll', debounce=2.0, interval=3600.0, clock=lambda: self.now)
+        self.watcher.watch(self.dirpath)
+
+    def tearDown(self):
+        self.watcher.stop()
+        shutil.rmtree(self.dirpath)
+
+    def test_unmodified(self):
+        """
+        Test that a watched directory is clean until something changes
+        """
+        self.watcher.poll()
+        self.now += 10.0
+        self.assertTrue(self.watcher.is_watching(self.dirpath))
+        self.assertFalse(self.watcher.is_dirty(self.dirpath))
+
+    def test_modified_after_debounce(self):
+        """
+        Test that a change is only reported once the debounce window has passed
+        """
+        mtime = os.stat(self.path).st_mtime
+        os.utime(self.path, (mtime + 10, mtime + 10))
+        self.watcher.poll()
+        self.now += 1.0
+        self.assertFalse(self.watcher.is_dirty(self.dirpath))
+        self.now += 1.0
+        self.assertTrue(self.watcher.is_dirty(self.dirpath))
+        self.assertEqual(self.watcher.changed_files(self.dirpath), set([self.path]))
+
+        # Watching the directory again marks it as clean
+        self.watcher.watch(self.dirpath)
+        self.assertFalse(self.watcher.is_dirty(self.dirpath))
+
+    def test_debounce_restarts(self):
+        """
+        Test that each change restarts the debounce window
+        """
+        self.watcher.notify(self.path)
+        self.now += 1.5
+        self.watcher.notify(self.path)
+        self.now += 1.5
+        self.assertFalse(self.watcher.is_dirty(self.dirpath))
+        self.now += 0.5
+        self.assertTrue(self.watcher.is_dirty(self.dirpath))
+
+    def test_new_file(self):
+        """
+        Test that adding a file marks the directory as modified
+        """
+        path = os.path.join(self.dirpath, 'other.py')
+        with open(path, 'w') as f:
+            f.write('entry()\n')
+        self.watcher.poll()
+        self.now += 2.0
+        self.assertTrue(self.watcher.is_dirty(self.dirpath))
+        self.assertEqual(self.watcher.changed_files(self.dirpath), set([path]))
+
+    def test_stop(self):
+        """
+        Test that stopping the watcher ends its background thread
+        """
+        thread = self.watcher.thread
+        self.assertTrue(thread.is_alive())
+        self.watcher.stop()
+        self.assertFalse(thread.is_alive())
+        self.assertIsNone(self.watcher.thread)
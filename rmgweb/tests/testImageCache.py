@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG Website - A Django-powered website for Reaction Mechanism Generator     #
+#                                                                             #
+# Copyright (c) 2011-2018 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+
+import os
+import shutil
+import tempfile
+import time
+
+from django.test import TestCase
+
+from rmgweb.main.images import ImageCache, StructureSprite, get_normalized_adjlist
+
+
+class ImageCacheTest(TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.cache = ImageCache(self.path, maxsize=1300)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_get_and_set(self):
+        """
+        Test that a stored image is returned under its key and format only
+        """
+        key = self.cache.get_key('molecule', '1 C u0 p0 c0', 'png')
+        self.assertIsNone(self.cache.get(key, 'png'))
+        self.assertIsNone(self.cache.get_mtime(key, 'png'))
+        self.cache.set(key, 'png', 'image')
+        self.assertEqual(self.cache.get(key, 'png'), 'image')
+        self.assertIsNotNone(self.cache.get_mtime(key, 'png'))
+        self.assertIsNone(self.cache.get(key, 'svg'))
+        self.assertNotEqual(key, self.cache.get_key('molecule', '1 C u0 p0 c0', 'svg'))
+
+    def test_evict_least_recently_used(self):
+        """
+        Test that the least recently read images are evicted first
+        """
+        keys = [self.cache.get_key('molecule', str(i), 'png') for i in range(4)]
+        for index, key in enumerate(keys):
+            self.cache.set(key, 'png', 'x' * 300)
+            path = self.cache.get_path(key, 'png')
+            os.utime(path, (time.time() - 10000 + index, time.time()))
+        # Reading the oldest image makes it the most recently used
+        self.cache.get(keys[0], 'png')
+        self.cache.set(self.cache.get_key('molecule', '4', 'png'), 'png', 'x' * 300)
+        self.assertEqual(self.cache.get_size(), 900)
+        self.assertIsNotNone(self.cache.get(keys[0], 'png'))
+        self.assertIsNone(self.cache.get(keys[1], 'png'))
+        self.assertIsNone(self.cache.get(keys[2], 'png'))
+
+    def test_shared_size(self):
+        """
+        Test that the size is shared by caches in the same directory, without walking the tree
+        """
+        self.cache.set(self.cache.get_key('molecule', '0', 'png'), 'png', 'x' * 300)
+        other = ImageCache(self.path, maxsize=1300)
+        def evict():
+            raise AssertionError('The cache was walked')
+        other.evict = evict
+        other.set(other.get_key('molecule', '1', 'png'), 'png', 'x' * 300)
+        self.assertEqual(self.cache.get_size(), 600)
+
+    def test_touch_age(self):
+        """
+        Test that reading an image only updates its access time once it is old enough
+        """
+        key = self.cache.get_key('molecule', '0', 'png')
+        self.cache.set(key, 'png', 'image')
+        path = self.cache.get_path(key, 'png')
+        utime = os.utime
+        utime(path, (time.time() - 60, time.time()))
+        touched = []
+        os.utime = lambda path, times: touched.append(path)
+        try:
+            self.cache.get(key, 'png')
+            self.assertEqual(touched, [])
+            utime(path, (time.time() - 10000, time.time()))
+            self.cache.get(key, 'png')
+            self.assertEqual(touched, [path])
+        finally:
+            os.utime = utime
+
+    def test_normalized_adjlist(self):
+        """
+        Test that whitespace differences do not change the normalized adjlist
+        """
+        self.assertEqual(get_normalized_adjlist('1  C u0 p0 c0 {2,S}\n2 H u0 p0 c0 {1,S}\n\n'),
+                         get_normalized_adjlist(' 1 C u0 p0 c0 {2,S}\r\n2 H  u0 p0 c0 {1,S}'))
+
+
+class StructureSpriteTest(TestCase):
+
+    svg = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+           '<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+           'width="57pt" height="21pt" viewBox="0 0 57 21" version="1.1">\n'
+           '<defs><symbol id="glyph0-0"><path d="M 1 1"/></symbol><clipPath id="clip1"><path d="M 0 0"/></clipPath></defs>\n'
+           '<g clip-path="url(#clip1)"><use xlink:href="#glyph0-0" x="1" y="2"/></g>\n'
+           '</svg>\n')
+
+    def test_add_svg(self):
+        """
+        Test that an image becomes a symbol whose ids do not clash with other symbols
+        """
+        sprite = StructureSprite()
+        self.assertEqual(sprite.add_svg('abc', self.svg), ('57pt', '21pt'))
+        self.assertEqual(sprite.add_svg('def', self.svg), ('57pt', '21pt'))
+        markup = sprite.render()
+        self.assertIn('<symbol id="structure-abc" viewBox="0 0 57 21">', markup)
+        self.assertIn('id="structure-abc-glyph0-0"', markup)
+        self.assertIn('url(#structure-def-clip1)', markup)
+        self.assertIn('xlink:href="#structure-def-glyph0-0"', markup)
+        self.assertNotIn('<?xml', markup)
+
+    def test_invalid_svg(self):
+        """
+        Test that a structure that could not be drawn is left out of the sprite
+        """
+        sprite = StructureSprite()
+        self.assertIsNone(sprite.add_svg('abc', None))
+        self.assertEqual(sprite.render(), '')
+
+    def test_get_markup(self):
+        """
+        Test that the markup of a structure refers to its symbol
+        """
+        sprite = StructureSprite()
+        sprite.add_svg('abc', self.svg)
+        markup = sprite.get_markup('molecule', 'abc', '', 'C<O>')
+        self.assertIn('<use xlink:href="#structure-abc"/>', markup)
+        self.assertIn('<title>C&lt;O&gt;</title>', markup)
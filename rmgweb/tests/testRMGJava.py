@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG Website - A Django-powered website for Reaction Mechanism Generator     #
+#                                                                             #
+# Copyright (c) 2011-2018 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+
+import os
+import shutil
+import socket
+import tempfile
+import threading
+
+from django.test import TestCase
+
+from rmgweb.database.rmgjava import RMGJavaClient, RMGJavaError, ReplayServer
+
+REQUEST = 'reactant1 (molecule/cm3) 1\n1 C u0 p0 c0\n\nEND\n'
+
+
+def getResponse(species=1):
+    """
+    Return a PopulateReactions response listing the given number of species.
+    """
+    dictionary = '\n\n'.join(['species{0:d}\n1 C u0 p0 c0'.format(i) for i in range(species)])
+    return dictionary + '\n\n\n\nReactions:\n\nspecies0 --> species0\t1.0e+13\t0.0\t10.0\tEstimated\n'
+
+RESPONSE = getResponse()
+
+
+class RMGJavaClientTest(TestCase):
+
+    def setUp(self):
+        self.dirpath = tempfile.mkdtemp()
+        self.servers = []
+
+    def tearDown(self):
+        for server in self.servers:
+            server.stop()
+        shutil.rmtree(self.dirpath)
+
+    def startServer(self, protocol, **kwargs):
+        server = ReplayServer(protocol=protocol, **kwargs)
+        server.start()
+        self.servers.append(server)
+        return server
+
+    def test_legacy(self):
+        """
+        Test that a response is read in full over the legacy protocol
+        """
+        server = self.startServer('legacy')
+        response = getResponse(40000)
+        self.assertGreater(len(response), 1000000)
+        server.responses[REQUEST] = response
+        client = RMGJavaClient(port=server.port, protocol='legacy')
+        self.assertEqual(client.query(REQUEST), response)
+        self.assertEqual(client.query(REQUEST), response)
+        self.assertEqual(server.connections, 2)
+
+    def test_framed_reuses_connections(self):
+        """
+        Test that the framed protocol reuses one connection for many requests
+        """
+        server = self.startServer('framed')
+        server.responses[REQUEST] = 'response'
+        client = RMGJavaClient(port=server.port, protocol='framed')
+        for i in range(5):
+            self.assertEqual(client.query(REQUEST), 'response')
+        self.assertEqual(server.requests, 5)
+        self.assertEqual(server.connections, 1)
+        client.close()
+
+    def test_framed_stale_connection(self):
+        """
+        Test that a pooled connection closed by the server is replaced by a
+        new one without using up a retry
+        """
+        server = self.startServer('framed')
+        server.responses[REQUEST] = 'response'
+        client = RMGJavaClient(port=server.port, protocol='framed', retries=0)
+
+        # Make a connection whose other end is already closed
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.bind(('localhost', 0))
+        listener.listen(1)
+        stale = socket.create_connection(listener.getsockname())
+        accepted, _ = listener.accept()
+        accepted.close()
+        listener.close()
+        client.connections.put(stale)
+
+        self.assertEqual(client.query(REQUEST), 'response')
+        self.assertEqual(client.connections.qsize(), 1)
+        connection = client.connections.get_nowait()
+        self.assertIsNot(connection, stale)
+        client.connections.put(connection)
+        self.assertEqual(server.connections, 1)
+        client.close()
+
+    def test_query_many(self):
+        """
+        Test that many requests are answered in order, using at most
+        `pool_size` connections
+        """
+        server = self.startServer('framed', delay=0.05)
+        requests = ['request {0:d}\nEND\n'.format(i) for i in range(20)]
+        for request in requests:
+            server.responses[request] = request.upper()
+        client = RMGJavaClient(port=server.port, protocol='framed', pool_size=4)
+        self.assertEqual(client.query_many(requests), [request.upper() for request in requests])
+        self.assertLessEqual(server.connections, 4)
+        client.close()
+
+    def test_retry(self):
+        """
+        Test that a request is retried until the server is up, and fails
+        once the retries are used up
+        """
+        server = ReplayServer(protocol='legacy')
+        port = server.port
+        server.server_close()
+
+        client = RMGJavaClient(port=port, protocol='legacy', retries=1, retry_delay=0.05)
+        self.assertRaises(RMGJavaError, client.query, REQUEST)
+
+        def start():
+            self.startServer('legacy', port=port).responses[REQUEST] = RESPONSE
+        timer = threading.Timer(0.2, start)
+        timer.start()
+        client = RMGJavaClient(port=port, protocol='legacy', retries=5, retry_delay=0.1)
+        self.assertEqual(client.query(REQUEST), RESPONSE)
+        timer.join()
+
+        # Empty and truncated responses over the legacy protocol are retried
+        server = self.startServer('legacy')
+        client = RMGJavaClient(port=server.port, protocol='legacy', retries=2, retry_delay=0.01)
+        for response in ['', RESPONSE[:len(RESPONSE) // 2], RESPONSE[:-20]]:
+            server.responses[REQUEST] = response
+            server.requests = 0
+            self.assertRaises(RMGJavaError, client.query, REQUEST)
+            self.assertEqual(server.requests, 3)
+
+        def complete():
+            server.responses[REQUEST] = RESPONSE
+        timer = threading.Timer(0.1, complete)
+        timer.start()
+        client = RMGJavaClient(port=server.port, protocol='legacy', retries=5, retry_delay=0.1)
+        self.assertEqual(client.query(REQUEST), RESPONSE)
+        timer.join()
+
+    def test_record_and_replay(self):
+        """
+        Test that recorded responses are replayed
+        """
+        server = self.startServer('legacy')
+        server.responses[REQUEST] = RESPONSE
+        client = RMGJavaClient(port=server.port, protocol='legacy', record_path=self.dirpath)
+        client.query(REQUEST)
+        self.assertEqual(len(os.listdir(self.dirpath)), 2)
+
+        replay = self.startServer('framed', path=self.dirpath, missing='missing')
+        client = RMGJavaClient(port=replay.port, protocol='framed')
+        self.assertEqual(client.query(REQUEST), RESPONSE)
+        self.assertEqual(client.query('other\nEND\n'), 'missing')
+        client.close()
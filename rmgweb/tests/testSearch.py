@@ -207,3 +207,33 @@ multiplicity 2
 
         self.assertEqual(response.status_code, 302)
 
+
+
+class ReactionCacheTest(TestCase):
+
+    def test_records_not_shared(self):
+        """
+        Test that modifying a reaction rebuilt from a reaction cache record leaves the record alone
+        """
+        from rmgpy.kinetics import Arrhenius
+        from rmgpy.reaction import Reaction
+        from rmgpy.species import Species
+
+        from rmgweb.database.tools import database, reactionFromRecord, reactionToRecord
+
+        reaction = Reaction(reactants=[Species().fromSMILES('[CH3]'), Species().fromSMILES('[H]')],
+                            products=[Species().fromSMILES('C')],
+                            kinetics=Arrhenius(A=(1e13, 'cm^3/(mol*s)'), n=0, Ea=(0, 'kJ/mol'), T0=(1, 'K')))
+        record = reactionToRecord(reaction)
+        reaction.kinetics.changeRate(2)
+
+        first = reactionFromRecord(database, record)
+        self.assertAlmostEqual(first.kinetics.A.value_si, 1e7)
+        first.kinetics.changeRate(2)
+        first.reactants[0].label = 'CH3'
+        first.reactants.reverse()
+
+        second = reactionFromRecord(database, record)
+        self.assertAlmostEqual(second.kinetics.A.value_si, 1e7)
+        self.assertEqual(second.reactants[0].label, '')
+        self.assertTrue(second.reactants[0].isIsomorphic(Species().fromSMILES('[CH3]')))
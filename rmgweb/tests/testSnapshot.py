@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG Website - A Django-powered website for Reaction Mechanism Generator     #
+#                                                                             #
+# Copyright (c) 2011-2018 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase
+
+import rmgweb.settings
+from rmgweb.database.families import LazyFamilyRegistry
+from rmgweb.database.tools import RMGWebDatabase
+
+class SnapshotTest(TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.lazy = rmgweb.settings.DATABASE_LAZY_FAMILIES
+        rmgweb.settings.DATABASE_LAZY_FAMILIES = True
+
+    def tearDown(self):
+        rmgweb.settings.DATABASE_LAZY_FAMILIES = self.lazy
+        shutil.rmtree(self.path)
+
+    def test_restore_lazy_families(self):
+        """
+        Test that a snapshot saved with lazily loaded families restores them all trained
+        """
+        label = 'R_Recombination'
+        database = RMGWebDatabase()
+        database.restore_attempted = True
+        families_path = os.path.join(rmgweb.settings.DATABASE_PATH, 'kinetics', 'families')
+        # Limit the registry to one family to keep the test short
+        database.database.kinetics.families = LazyFamilyRegistry(families_path, database.load_family, labels=[label])
+        self.assertFalse(database.kinetics.families.is_loaded(label))
+
+        path = os.path.join(self.path, 'snapshot.pkl')
+        database.save_snapshot(path)
+
+        restored = RMGWebDatabase()
+        self.assertTrue(restored.restore_snapshot(path))
+        families = restored.kinetics.families
+        self.assertTrue(families.is_loaded(label))
+        self.assertGreater(len(families[label].rules.entries), 0)
+
+    def test_unchanged_after_restore(self):
+        """
+        Test that the snapshot key is not recomputed after restoring until something is reloaded
+        """
+        database = RMGWebDatabase()
+        database.restore_attempted = True
+        path = os.path.join(self.path, 'snapshot.pkl')
+        database.save_snapshot(path)
+        self.assertFalse(database.update_snapshot(path))
+
+        restored = RMGWebDatabase()
+        self.assertTrue(restored.restore_snapshot(path))
+        def get_snapshot_key():
+            raise AssertionError('The snapshot key was recomputed')
+        restored.get_snapshot_key = get_snapshot_key
+        self.assertFalse(restored.update_snapshot(path))
+
+
+class LazyFamilyRegistryTest(TestCase):
+
+    def setUp(self):
+        self.loaded = []
+        self.registry = LazyFamilyRegistry(None, self.load_family, labels=['A', 'B', 'C'])
+
+    def load_family(self, label):
+        self.loaded.append(label)
+        return 'family ' + label
+
+    def test_keys(self):
+        """
+        Test that listing the labels does not load any families
+        """
+        self.assertEqual(sorted(self.registry), ['A', 'B', 'C'])
+        self.assertEqual(sorted(self.registry.keys()), ['A', 'B', 'C'])
+        self.assertTrue('A' in self.registry)
+        self.assertEqual(self.loaded, [])
+
+    def test_access(self):
+        """
+        Test that every way of getting at the families loads them
+        """
+        self.assertEqual(self.registry.pop('A'), 'family A')
+        self.assertEqual(self.registry.pop('A', None), None)
+        self.assertEqual(self.registry.setdefault('B'), 'family B')
+        self.assertEqual(self.registry.popitem()[1][:7], 'family ')
+        self.assertEqual(len(self.registry), 1)
+        self.assertEqual(self.registry.values()[0][:7], 'family ')
+        self.assertEqual(sorted(self.loaded), ['A', 'B', 'C'])
+
+    def test_copy(self):
+        """
+        Test that a copy of the registry still loads the families lazily
+        """
+        self.registry['A']
+        registry = self.registry.copy()
+        self.assertTrue(isinstance(registry, LazyFamilyRegistry))
+        self.assertTrue(registry.is_loaded('A'))
+        self.assertFalse(registry.is_loaded('B'))
+        self.assertEqual(registry['B'], 'family B')
+        self.assertFalse(self.registry.is_loaded('B'))
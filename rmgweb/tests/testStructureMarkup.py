@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+###############################################################################
+#                                                                             #
+# RMG Website - A Django-powered website for Reaction Mechanism Generator     #
+#                                                                             #
+# Copyright (c) 2011-2018 Prof. William H. Green (whgreen@mit.edu),           #
+# Prof. Richard H. West (r.west@neu.edu) and the RMG Team (rmg_dev@mit.edu)   #
+#                                                                             #
+# Permission is hereby granted, free of charge, to any person obtaining a     #
+# copy of this software and associated documentation files (the 'Software'),  #
+# to deal in the Software without restriction, including without limitation   #
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,    #
+# and/or sell copies of the Software, and to permit persons to whom the       #
+# Software is furnished to do so, subject to the following conditions:        #
+#                                                                             #
+# The above copyright notice and this permission notice shall be included in  #
+# all copies or substantial portions of the Software.                         #
+#                                                                             #
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR  #
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,    #
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE #
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER      #
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING     #
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER         #
+# DEALINGS IN THE SOFTWARE.                                                   #
+#                                                                             #
+###############################################################################
+
+from django.test import TestCase
+from rmgpy.molecule import Molecule
+from rmgweb.main.models import StructureIdentifier
+from rmgpy.molecule import Group
+from rmgweb.main.tools import getStructureAdjlist, getStructureData, getStructureIdentifier, getStructureInfo, \
+    invalidateStructureMarkup, markup_cache, moleculeToAdjlist, registerStructures, setDatabaseStructures, structure_cache
+
+class StructureMarkupTest(TestCase):
+
+    def setUp(self):
+        invalidateStructureMarkup()
+        structure_cache.clear()
+        setDatabaseStructures([])
+
+    def test_memoized(self):
+        """
+        Test that the markup of a molecule is only made once until invalidated
+        """
+        molecule = Molecule().fromSMILES('CCO')
+        setDatabaseStructures([id(molecule)])
+        markup = getStructureInfo(molecule)
+        self.assertIn('<img', markup)
+        size = len(markup_cache.items)
+        self.assertEqual(getStructureInfo(molecule), markup)
+        self.assertEqual(len(markup_cache.items), size)
+        invalidateStructureMarkup()
+        self.assertEqual(len(markup_cache.items), 0)
+        self.assertEqual(getStructureInfo(molecule), markup)
+
+    def test_transient_not_memoized(self):
+        """
+        Test that the markup of a molecule that is not in the database is not kept
+        """
+        molecule = Molecule().fromSMILES('CCO')
+        self.assertIn('<img', getStructureInfo(molecule))
+        self.assertEqual(len(markup_cache.items), 0)
+
+    def test_adjlist_without_labels(self):
+        """
+        Test that atom labels are left out of the adjacency list without modifying the molecule
+        """
+        molecule = Molecule().fromSMILES('CO')
+        unlabeled = moleculeToAdjlist(molecule)
+        labeled = Molecule().fromSMILES('CO')
+        labeled.atoms[0].label = '*1'
+        self.assertEqual(moleculeToAdjlist(labeled), unlabeled)
+        self.assertEqual(labeled.atoms[0].label, '*1')
+
+    def test_identifier(self):
+        """
+        Test that the same structure with its atoms in a different order gets the same identifier
+        """
+        ethanol = Molecule().fromAdjacencyList("""
+1 C u0 p0 c0 {2,S} {4,S} {5,S} {6,S}
+2 C u0 p0 c0 {1,S} {3,S} {7,S} {8,S}
+3 O u0 p2 c0 {2,S} {9,S}
+4 H u0 p0 c0 {1,S}
+5 H u0 p0 c0 {1,S}
+6 H u0 p0 c0 {1,S}
+7 H u0 p0 c0 {2,S}
+8 H u0 p0 c0 {2,S}
+9 H u0 p0 c0 {3,S}
+""")
+        renumbered = Molecule().fromAdjacencyList("""
+1 O u0 p2 c0 {3,S} {4,S}
+2 H u0 p0 c0 {3,S}
+3 C u0 p0 c0 {1,S} {2,S} {5,S} {6,S}
+4 H u0 p0 c0 {1,S}
+5 H u0 p0 c0 {3,S}
+6 C u0 p0 c0 {3,S} {7,S} {8,S} {9,S}
+7 H u0 p0 c0 {6,S}
+8 H u0 p0 c0 {6,S}
+9 H u0 p0 c0 {6,S}
+""")
+        kind, identifier, adjlist = getStructureData(ethanol)
+        self.assertEqual(kind, 'molecule')
+        self.assertEqual(getStructureData(renumbered)[1], identifier)
+        self.assertNotEqual(getStructureData(Molecule().fromSMILES('COC'))[1], identifier)
+
+        group = Group().fromAdjacencyList("""
+1 *1 C  u0 {2,S} {3,S}
+2    O  u0 {1,S}
+3    R!H u0 {1,S}
+""")
+        renumbered = Group().fromAdjacencyList("""
+1    R!H u0 {3,S}
+2    O  u0 {3,S}
+3 *1 C  u0 {1,S} {2,S}
+""")
+        self.assertEqual(getStructureData(renumbered)[:2], getStructureData(group)[:2])
+
+    def test_registered_on_demand(self):
+        """
+        Test that a structure is registered with the first adjacency list seen when it is first linked to
+        """
+        molecule = Molecule().fromSMILES('CCO')
+        kind, identifier, adjlist = getStructureData(molecule)
+        self.assertEqual(StructureIdentifier.objects.count(), 0)
+        self.assertIn(identifier, getStructureInfo(molecule))
+        self.assertEqual(getStructureAdjlist('molecule', identifier), adjlist)
+
+        # The same molecule with another atom order maps to the stored adjacency list
+        other = Molecule().fromSMILES('OCC')
+        structure_cache.clear()
+        self.assertEqual(getStructureIdentifier(other), identifier)
+        self.assertEqual(StructureIdentifier.objects.count(), 1)
+        self.assertEqual(getStructureAdjlist('molecule', identifier), adjlist)
+
+    def test_registered(self):
+        """
+        Test that structures are registered in bulk with the adjacency lists already stored
+        """
+        molecules = [Molecule().fromSMILES(smiles) for smiles in ['C', 'CC', 'CCO']]
+        structures = [getStructureData(molecule) for molecule in molecules]
+        self.assertEqual(sorted(registerStructures(structures)), sorted(structures))
+        others = [getStructureData(Molecule().fromSMILES(smiles)) for smiles in ['C', 'CC', 'OCC']]
+        self.assertEqual(sorted(registerStructures(others)), sorted(structures))
+        self.assertEqual(StructureIdentifier.objects.count(), 3)
+        for molecule, (kind, identifier, adjlist) in zip(molecules, structures):
+            self.assertEqual(getStructureAdjlist(kind, identifier), adjlist)
+            self.assertIn(identifier, getStructureInfo(molecule))
@@ -39,6 +39,7 @@ import rmgweb
 import rmgweb.main.views
 import rmgweb.database.views
 import rmgweb.rmg.views
+from rmgweb.main.tools import structureIdentifierView
 
 
 # Uncomment the next two lines to enable the admin:
@@ -85,7 +86,11 @@ urlpatterns = [
     # Pressure dependence
     url(r'^pdep/', include('rmgweb.pdep.urls')),
 
-    # Molecule drawing
+    # Molecule drawing, by short identifier (see rmgweb.main.tools.getStructureIdentifier) or adjacency list
+    url(r'^molecule/id/(?P<identifier>[0-9a-f]+)/(?P<format>\w+)$', structureIdentifierView('molecule', rmgweb.main.views.drawMolecule), name='draw-molecule-id'),
+    url(r'^molecule/id/(?P<identifier>[0-9a-f]+)$', structureIdentifierView('molecule', rmgweb.main.views.drawMolecule), name='draw-molecule-id'),
+    url(r'^group/id/(?P<identifier>[0-9a-f]+)/(?P<format>\w+)$', structureIdentifierView('group', rmgweb.main.views.drawGroup), name='draw-group-id'),
+    url(r'^group/id/(?P<identifier>[0-9a-f]+)$', structureIdentifierView('group', rmgweb.main.views.drawGroup), name='draw-group-id'),
     url(r'^molecule/(?P<adjlist>[\S\s]+)/(?P<format>\w+)$', rmgweb.main.views.drawMolecule, name='draw-molecule'),
     url(r'^molecule/(?P<adjlist>[\S\s]+)$', rmgweb.main.views.drawMolecule, name='draw-molecule'),
     url(r'^group/(?P<adjlist>[\S\s]+)/(?P<format>\w+)$', rmgweb.main.views.drawGroup, name='draw-group'),